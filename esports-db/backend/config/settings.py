@@ -35,6 +35,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # первым: полное время запроса включает остальные middleware
+    "core.metrics.MetricsMiddleware",
+    # сразу за метриками: время сжатия попадает в Server-Timing
+    "core.compression.CompressionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.security.SecurityMiddleware",
@@ -86,11 +90,66 @@ AUTH_PASSWORD_VALIDATORS = [
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "core.authentication.CachedTokenAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.AllowAny",
     ],
+    # orjson, выдача как у JSONRenderer (core/renderers.py)
+    "DEFAULT_RENDERER_CLASSES": [
+        "core.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+}
+
+# Кэш токенов (core/authentication.py): LRU token -> user на TTL секунд.
+TOKEN_AUTH_CACHE = {
+    "MAX_ENTRIES": 10000,
+    "TTL": 30,
+}
+
+# Буфер истории просмотров (core/view_history.py): пишем пачкой
+# при MAX_SIZE разных просмотров или через MAX_AGE секунд.
+VIEW_HISTORY_BUFFER = {
+    "ENABLED": True,
+    "MAX_SIZE": 500,
+    "MAX_AGE": 5.0,
+}
+
+# Кэш ответов read-only эндпоинтов (core/response_cache.py).
+# BACKEND: "locmem" — память процесса, "file" — общий каталог для всех воркеров.
+# locmem не видит записей из других воркеров: при нескольких воркерах
+# (gunicorn -w N, uvicorn --workers N) нужен "file". "TTL": N у locmem
+# ограничивает это отставание N секундами, но ключи и ETag меняются раз в N.
+RESPONSE_CACHE = {
+    "ENABLED": True,
+    "BACKEND": "locmem",
+    "LOCATION": BASE_DIR / "cache" / "responses",
+    "MAX_ENTRIES": 2000,
+}
+
+# Метрики запросов (core/metrics.py): Server-Timing и /api/admin/metrics/.
+METRICS = {
+    "ENABLED": True,
+    "SERVER_TIMING": True,
+}
+
+# Сжатие ответов (core/compression.py): br/gzip по Accept-Encoding
+COMPRESSION = {
+    "ENABLED": True,
+    "MIN_SIZE": 1024,
+    "BROTLI_QUALITY": 4,
+    "GZIP_LEVEL": 6,
+}
+
+# Живая лента матчей (core/live.py, /api/live/matches/): лимиты на воркер
+LIVE_FEED = {
+    "MAX_CONNECTIONS": 200,
+    "QUEUE_SIZE": 100,
+    "KEEPALIVE": 15,
+    # только WSGI: соединение держит поток воркера
+    "MAX_DURATION": 300,
+    "RETRY_AFTER": 10,
 }
 
 
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from .models import (
     Game, Tournament, Team, Player,
-    TournamentTeam, Match, MatchResult, Standing
+    TournamentTeam, Match, MatchResult, Standing, GroupStanding, TeamRating
 )
 
 @admin.register(Game)
@@ -55,6 +55,19 @@ class StandingAdmin(admin.ModelAdmin):
     list_filter = ("tournament",)
 
 
+@admin.register(GroupStanding)
+class GroupStandingAdmin(admin.ModelAdmin):
+    list_display = ("tournament", "rank", "team", "played", "wins", "draws", "losses", "points")
+    list_filter = ("tournament",)
+
+
+@admin.register(TeamRating)
+class TeamRatingAdmin(admin.ModelAdmin):
+    list_display = ("team", "game", "rating", "matches", "last_match_date")
+    list_filter = ("game",)
+    ordering = ("game", "-rating")
+
+
 class TeamRegistrationRequestAdmin(admin.ModelAdmin):
     list_display = ("id", "team_name", "tournament", "user", "status", "created_at")
     list_filter = ("status", "tournament")
@@ -7,3 +7,7 @@ class CoreConfig(AppConfig):
 
     def ready(self):
         from . import signals
+        from .metrics import install_query_counting, install_serializer_timing
+
+        install_query_counting()
+        install_serializer_timing()
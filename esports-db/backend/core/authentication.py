@@ -0,0 +1,93 @@
+"""
+TokenAuthentication с кэшем в памяти процесса.
+
+Стандартный TokenAuthentication делает JOIN Token+User на каждый запрос.
+Здесь держим ограниченный LRU: ключ токена -> (снимок пользователя, токен)
+с коротким TTL. Выход (LogoutView), удаление токена и любое сохранение
+пользователя (в т.ч. is_active=False, смена is_staff) вычищают записи явно —
+см. signals.py. TTL страхует остальные воркеры: сигналы видит только тот
+процесс, где произошла запись.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+
+
+class TokenCache:
+    def __init__(self, max_entries=10000, ttl=30):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # key -> (expires_at, user, token)
+        self._by_user = {}          # user_id -> {key, ...}
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, user, token = entry
+            if expires_at <= now:
+                self._pop(key)
+                return None
+            self._data.move_to_end(key)
+        # копия: запрос не должен менять объект, общий для других запросов
+        return copy.copy(user), token
+
+    def set(self, key, user, token):
+        with self._lock:
+            self._pop(key)
+            self._data[key] = (time.monotonic() + self.ttl, user, token)
+            self._by_user.setdefault(user.pk, set()).add(key)
+            while len(self._data) > self.max_entries:
+                self._pop(next(iter(self._data)))
+
+    def _pop(self, key):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            keys = self._by_user.get(entry[1].pk)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_user[entry[1].pk]
+
+    def evict(self, key):
+        with self._lock:
+            self._pop(key)
+
+    def evict_user(self, user_id):
+        with self._lock:
+            for key in list(self._by_user.get(user_id, ())):
+                self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._by_user.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_conf = getattr(settings, "TOKEN_AUTH_CACHE", {})
+token_cache = TokenCache(
+    max_entries=_conf.get("MAX_ENTRIES", 10000),
+    ttl=_conf.get("TTL", 30),
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            return cached
+
+        # проверки (нет токена / пользователь отключён) — в родителе
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user, token)
+        return user, token
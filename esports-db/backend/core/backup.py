@@ -0,0 +1,199 @@
+"""
+Резервные копии PostgreSQL для команды backup_db.
+
+stream    — pg_dump -F c пишет в stdout, поток сразу сжимается в файл на
+            хосте: без временного файла в контейнере и без docker cp.
+directory — pg_dump -F d -j N (параллельно по таблицам) для больших баз.
+
+Где запускать pg_dump/pg_restore, решает runner: DockerRunner — внутри
+контейнера через docker exec, LocalRunner — локальные бинарники (или
+любая подмена через programs, например в тестах). После дампа архив
+проверяется через pg_restore --list.
+"""
+import gzip
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+CHUNK_SIZE = 1024 * 1024
+COMPRESSIONS = ("gzip", "pg", "none")
+
+
+class BackupError(Exception):
+    pass
+
+
+class LocalRunner:
+    """pg_dump/pg_restore на этой машине. programs: {"pg_dump": [argv...]} — подмена бинарника."""
+
+    def __init__(self, programs=None, env=None):
+        self.programs = programs or {}
+        self.env = env
+
+    def command(self, argv):
+        return list(self.programs.get(argv[0], [argv[0]])) + list(argv[1:])
+
+    def popen(self, argv, **kwargs):
+        if self.env is not None:
+            kwargs.setdefault("env", self.env)
+        return subprocess.Popen(self.command(argv), **kwargs)
+
+    def run(self, argv, **kwargs):
+        if self.env is not None:
+            kwargs.setdefault("env", self.env)
+        return subprocess.run(self.command(argv), check=True, **kwargs)
+
+    # directory-режим: pg_dump пишет сразу в каталог на хосте
+    def dump_dir(self, local_dir):
+        return str(local_dir)
+
+    def fetch_dir(self, remote_dir, local_dir):
+        pass
+
+    def cleanup(self, remote_dir):
+        pass
+
+
+class DockerRunner(LocalRunner):
+    """То же внутри контейнера. -i без -t: tty портит бинарный stdout."""
+
+    def __init__(self, container):
+        super().__init__()
+        self.container = container
+
+    def command(self, argv):
+        return ["docker", "exec", "-i", self.container, *argv]
+
+    def dump_dir(self, local_dir):
+        return f"/tmp/{Path(local_dir).name}"
+
+    def fetch_dir(self, remote_dir, local_dir):
+        subprocess.run(["docker", "cp", f"{self.container}:{remote_dir}", str(local_dir)], check=True)
+
+    def cleanup(self, remote_dir):
+        subprocess.run(self.command(["rm", "-rf", remote_dir]), check=False)
+
+
+@dataclass
+class BackupResult:
+    path: Path
+    dump_bytes: int      # сколько отдал pg_dump
+    written_bytes: int   # сколько легло на диск
+    seconds: float
+    entries: int = None  # элементов в оглавлении (pg_restore --list)
+
+    @property
+    def throughput(self):
+        """МБ/с по объёму дампа."""
+        return self.dump_bytes / 1024 / 1024 / self.seconds if self.seconds else 0.0
+
+
+def _stderr_text(f):
+    f.seek(0)
+    return f.read().decode(errors="replace").strip()
+
+
+def stream_dump(runner, db, user, out_path, compress="gzip", level=6):
+    """
+    pg_dump -F c -> stdout -> файл. gzip — сжатие на хосте (pg_dump с -Z 0),
+    pg — сжатие самим pg_dump, none — без сжатия.
+    """
+    if compress not in COMPRESSIONS:
+        raise BackupError(f"unknown compression {compress!r}")
+    out_path = Path(out_path)
+    argv = ["pg_dump", "-U", user, "-d", db, "-F", "c", "-Z", str(level) if compress == "pg" else "0"]
+
+    started = time.monotonic()
+    dumped = 0
+    with tempfile.TemporaryFile() as stderr:
+        proc = runner.popen(argv, stdout=subprocess.PIPE, stderr=stderr)
+        try:
+            opener = gzip.open(out_path, "wb", compresslevel=level) if compress == "gzip" else open(out_path, "wb")
+            with opener as f:
+                while True:
+                    chunk = proc.stdout.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    dumped += len(chunk)
+        finally:
+            proc.stdout.close()
+            code = proc.wait()
+        if code != 0:
+            out_path.unlink(missing_ok=True)
+            raise BackupError(f"pg_dump exited with {code}: {_stderr_text(stderr)}")
+
+    return BackupResult(out_path, dumped, out_path.stat().st_size, time.monotonic() - started)
+
+
+def directory_dump(runner, db, user, out_dir, jobs=4, level=6, verify=True):
+    """pg_dump -F d -j jobs; проверка — до того, как каталог уберут из контейнера."""
+    out_dir = Path(out_dir)
+    remote = runner.dump_dir(out_dir)
+    started = time.monotonic()
+    try:
+        _run(runner, ["pg_dump", "-U", user, "-d", db, "-F", "d", "-j", str(jobs), "-Z", str(level), "-f", remote])
+        entries = None
+        if verify:
+            entries = _count_entries(_run(runner, ["pg_restore", "--list", remote]))
+            if not entries:
+                raise BackupError("pg_restore --list returned an empty table of contents")
+        runner.fetch_dir(remote, out_dir)
+    finally:
+        runner.cleanup(remote)
+
+    size = sum(p.stat().st_size for p in out_dir.rglob("*") if p.is_file())
+    return BackupResult(out_dir, size, size, time.monotonic() - started, entries)
+
+
+def _run(runner, argv):
+    try:
+        return runner.run(argv, capture_output=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise BackupError(f"{argv[0]} exited with {e.returncode}: {e.stderr.decode(errors='replace').strip()}")
+
+
+def _count_entries(listing):
+    # строки оглавления; комментарии начинаются с ';'
+    lines = listing.decode(errors="replace").splitlines()
+    return sum(1 for line in lines if line.strip() and not line.startswith(";"))
+
+
+def verify_stream(runner, path, compress="gzip"):
+    """
+    Прогоняет архив через pg_restore --list (stdin). Возвращает число
+    элементов оглавления; пустое/битое оглавление — BackupError.
+    """
+    opener = gzip.open if compress == "gzip" else open
+    with tempfile.TemporaryFile() as stderr:
+        proc = runner.popen(["pg_restore", "--list"], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=stderr)
+
+        def feed():
+            # пишем в отдельном потоке: иначе длинное оглавление в stdout заблокирует запись
+            try:
+                with opener(path, "rb") as f:
+                    shutil.copyfileobj(f, proc.stdin, CHUNK_SIZE)
+            except BrokenPipeError:
+                pass  # pg_restore завершился раньше — код возврата скажет почему
+            finally:
+                try:
+                    proc.stdin.close()
+                except BrokenPipeError:
+                    pass
+
+        feeder = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+        listing = proc.stdout.read()
+        code = proc.wait()
+        feeder.join()
+        if code != 0:
+            raise BackupError(f"pg_restore --list failed ({code}): {_stderr_text(stderr)}")
+
+    entries = _count_entries(listing)
+    if not entries:
+        raise BackupError("pg_restore --list returned an empty table of contents")
+    return entries
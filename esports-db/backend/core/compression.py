@@ -0,0 +1,162 @@
+"""
+Сжатие ответов по Accept-Encoding: brotli (если установлен), затем gzip.
+
+Сжимаем только типы из TYPES и тела не меньше MIN_SIZE байт: маленький
+JSON сжатием почти не уменьшается, а CPU тратится на каждый ответ.
+Потоковые ответы (SSE /api/live/matches/, выгрузки /api/export/) не
+трогаем: буферизация сломала бы доставку событий по одному.
+
+Ответы из кэша (core/response_cache.py) с одним ETag одинаковы, поэтому
+их сжатое тело запоминается в небольшом LRU процесса: повторный HIT не
+сжимается заново. ETag сжатого ответа ослабляется (W/"..."), как у
+django.middleware.gzip — If-None-Match с ним по-прежнему даёт 304.
+
+Цена и выигрыш по эндпоинтам: manage.py bench_responses.
+"""
+import gzip
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from .metrics import current_metrics
+
+try:
+    import brotli
+except ImportError:  # необязательная зависимость
+    brotli = None
+
+DEFAULT_TYPES = ("application/json", "text/html", "text/csv", "text/plain", "application/x-ndjson")
+
+_token_re = re.compile(r"^\s*([a-z0-9*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$")
+
+
+def _conf():
+    return getattr(settings, "COMPRESSION", {})
+
+
+def accepted_encodings(header):
+    """{"br": 1.0, "gzip": 0.5, ...} из Accept-Encoding; q=0 — запрещено."""
+    result = {}
+    for token in header.lower().split(","):
+        m = _token_re.match(token)
+        if not m:
+            continue
+        try:
+            q = float(m.group(2)) if m.group(2) is not None else 1.0
+        except ValueError:
+            continue
+        result[m.group(1)] = q
+    return result
+
+
+def choose_encoding(header, available):
+    """Первая кодировка из available (по нашему приоритету) с наибольшим q > 0."""
+    accepted = accepted_encodings(header)
+    best, best_q = None, 0.0
+    for coding in available:
+        q = accepted.get(coding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(body, coding, conf):
+    if coding == "br":
+        return brotli.compress(body, quality=conf.get("BROTLI_QUALITY", 4))
+    return gzip.compress(body, compresslevel=conf.get("GZIP_LEVEL", 6), mtime=0)
+
+
+class CompressedBodies:
+    """LRU (ETag, кодировка) -> сжатое тело."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            body = self._items.get(key)
+            if body is not None:
+                self._items.move_to_end(key)
+            return body
+
+    def set(self, key, body):
+        with self._lock:
+            self._items[key] = body
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+compressed_bodies = CompressedBodies()
+
+
+class CompressionMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def available(self):
+        return ("br", "gzip") if brotli is not None else ("gzip",)
+
+    def process_response(self, request, response):
+        conf = _conf()
+        if not conf.get("ENABLED", True) or response.streaming:
+            return response
+        # тело зависит от Accept-Encoding, даже если этот ответ не сжимаем
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if response.has_header("Content-Encoding") or response.status_code == 304:
+            return response
+        content_type = response.get("Content-Type", "").split(";")[0].strip()
+        if content_type not in conf.get("TYPES", DEFAULT_TYPES):
+            return response
+        body = response.content
+        if len(body) < conf.get("MIN_SIZE", 1024):
+            return response
+        coding = choose_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""), self.available())
+        if coding is None:
+            return response
+
+        etag = response.get("ETag")
+        key = (etag, coding) if etag else None
+        compressed = compressed_bodies.get(key) if key else None
+        if compressed is None:
+            started = time.perf_counter()
+            compressed = compress(body, coding, conf)
+            metrics = current_metrics()
+            if metrics is not None:
+                metrics.compress_time += time.perf_counter() - started
+            if len(compressed) >= len(body):
+                return response
+            if key:
+                compressed_bodies.set(key, compressed)
+
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = coding
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        return response
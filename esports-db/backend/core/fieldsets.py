@@ -0,0 +1,248 @@
+"""
+Форма выдачи сериализаторов из query-параметров:
+?fields=id,team1_name,result.winner_name, ?omit=result,next_match и
+?expand=tournament,team1.players,result.winner.
+
+Вложенные сериализаторы выбираются через точку: fields=result.winner_name
+оставит от result только winner_name. Неизвестные имена игнорируются.
+Применяется только к чтению (GET/HEAD); на запись сериализатор полный.
+
+Вместе с полями сокращаются и JOIN'ы: select_related_paths() по
+оставшимся полям (source вида "team1.name", вложенный result) собирает
+список для select_related, и SparseFieldsetViewMixin подставляет в
+queryset только его — ?fields=id,match_date обходится без JOIN вовсе.
+
+?expand= заменяет id связи вложенным объектом; что можно раскрыть,
+задаёт expandable_fields сериализатора. План запроса строится по итоговому
+дереву полей: FK/OneToOne — в select_related, обратные и M2M связи — в
+prefetch_related (Prefetch со своим select_related). Число запросов
+ограничено числом to-many уровней в ?expand=, а не числом строк.
+"""
+import sys
+
+from django.db.models import Prefetch
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = "fields"
+OMIT_PARAM = "omit"
+EXPAND_PARAM = "expand"
+# team1.players.team.players... глубже не раскрываем
+EXPAND_MAX_DEPTH = 3
+
+
+def parse_spec(raw):
+    """"id,result.winner_name" -> {"id": {}, "result": {"winner_name": {}}}; пусто -> None."""
+    if not raw:
+        return None
+    tree = {}
+    for item in raw.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        node = tree
+        for part in item.split("."):
+            node = node.setdefault(part, {})
+    return tree or None
+
+
+def _children(field):
+    if isinstance(field, serializers.ListSerializer):
+        field = field.child
+    return field if isinstance(field, serializers.Serializer) else None
+
+
+def prune(serializer, fields=None, omit=None):
+    """Удаляет поля у (уже привязанного) сериализатора, рекурсивно по вложенным."""
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    current = serializer.fields
+    if fields is not None:
+        for name in list(current):
+            if name not in fields:
+                current.pop(name)
+    if omit is not None:
+        for name, sub in omit.items():
+            if name not in current:
+                continue
+            if not sub:
+                current.pop(name)
+            elif _children(current[name]) is not None:
+                prune(current[name], omit=sub)
+    if fields is not None:
+        for name, sub in fields.items():
+            if sub and name in current and _children(current[name]) is not None:
+                prune(current[name], fields=sub)
+
+
+def _resolve(serializer, spec):
+    # "TeamSerializer" или ("PlayerSerializer", {"many": True}); классы из модуля сериализатора,
+    # чтобы ссылаться на ещё не объявленные
+    name, kwargs = spec if isinstance(spec, tuple) else (spec, {})
+    return getattr(sys.modules[type(serializer).__module__], name), kwargs
+
+
+def expand(serializer, tree, depth=0):
+    """Подменяет поля из expandable_fields вложенными сериализаторами (рекурсивно по tree)."""
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    if depth >= EXPAND_MAX_DEPTH:
+        return
+    expandable = getattr(serializer, "expandable_fields", {})
+    for name, sub in tree.items():
+        if name in expandable:
+            cls, kwargs = _resolve(serializer, expandable[name])
+            serializer.fields[name] = cls(read_only=True, **kwargs)
+        elif name not in serializer.fields or _children(serializer.fields[name]) is None:
+            continue
+        if sub:
+            expand(serializer.fields[name], sub, depth + 1)
+
+
+def _relation_path(model, bits, to_many=False):
+    """
+    ["team1"] / ["result", "winner"] -> "result__winner", если по пути только
+    FK/OneToOne (to_many=True — последняя связь обратная FK или M2M); иначе None.
+    """
+    for i, bit in enumerate(bits):
+        try:
+            field = model._meta.get_field(bit)
+        except FieldDoesNotExist:
+            return None
+        if not field.is_relation:
+            return None
+        last_many = to_many and i == len(bits) - 1
+        if last_many != bool(field.one_to_many or field.many_to_many):
+            return None
+        model = field.related_model
+    return "__".join(bits)
+
+
+def query_plan(serializer, prefix=""):
+    """
+    (select_related, prefetch_related) под поля сериализатора: вложенные
+    FK/OneToOne идут в JOIN, to-many — в Prefetch со своим планом.
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    model = getattr(getattr(serializer, "Meta", None), "model", None)
+    select, prefetch = set(), []
+    if model is None:
+        return select, prefetch
+    for field in serializer.fields.values():
+        if field.source == "*" or not getattr(field, "source_attrs", None):
+            continue
+        nested = _children(field)
+        if isinstance(field, serializers.ListSerializer):
+            path = _relation_path(model, field.source_attrs, to_many=True)
+            if path is None or nested is None:
+                continue
+            child_select, child_prefetch = query_plan(nested)
+            qs = nested.Meta.model._default_manager.all()
+            if child_select:
+                qs = qs.select_related(*sorted(child_select))
+            if child_prefetch:
+                qs = qs.prefetch_related(*child_prefetch)
+            prefetch.append(Prefetch(prefix + path, queryset=qs))
+            continue
+        bits = field.source_attrs if nested is not None else field.source_attrs[:-1]
+        if not bits:
+            continue
+        path = _relation_path(model, bits)
+        if path is None:
+            continue
+        select.add(prefix + path)
+        if nested is not None:
+            child_select, child_prefetch = query_plan(nested, prefix=f"{prefix}{path}__")
+            select |= child_select
+            prefetch += child_prefetch
+    return select, prefetch
+
+
+def select_related_paths(serializer):
+    """JOIN'ы, которые нужны оставшимся полям сериализатора."""
+    return query_plan(serializer)[0]
+
+
+def related_models(serializer):
+    """Модели всех вложенных сериализаторов — от них зависит выдача."""
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    models = set()
+    for field in serializer.fields.values():
+        nested = _children(field)
+        if nested is not None:
+            model = getattr(getattr(nested, "Meta", None), "model", None)
+            if model is not None:
+                models.add(model)
+            models |= related_models(nested)
+    return models
+
+
+def shape(serializer, params):
+    """?expand= раньше ?fields=/?omit=: fields=tournament.name работает вместе с expand=tournament."""
+    tree = parse_spec(params.get(EXPAND_PARAM))
+    if tree is not None:
+        expand(serializer, tree)
+    fields = parse_spec(params.get(FIELDS_PARAM))
+    omit = parse_spec(params.get(OMIT_PARAM))
+    if fields is not None or omit is not None:
+        prune(serializer, fields=fields, omit=omit)
+
+
+def apply_query_plan(qs, serializer):
+    """select_related/prefetch_related ровно под поля serializer (вместо прежних)."""
+    select, prefetch = query_plan(serializer)
+    qs = qs.select_related(None)
+    # select_related() без аргументов — это "все FK", а не "ничего"
+    if select:
+        qs = qs.select_related(*sorted(select))
+    if prefetch:
+        qs = qs.prefetch_related(*prefetch)
+    return qs
+
+
+def expand_cache_scopes(serializer_class, params):
+    """Метки кэша для моделей, раскрытых через ?expand=."""
+    tree = parse_spec(params.get(EXPAND_PARAM))
+    if tree is None:
+        return []
+    serializer = serializer_class()
+    expand(serializer, tree)
+    return sorted(m._meta.label_lower for m in related_models(serializer))
+
+
+class SparseFieldsetsMixin:
+    """Для ModelSerializer: ?expand= / ?fields= / ?omit= из request в context."""
+    expandable_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None or request.method not in SAFE_METHODS:
+            return
+        shape(self, request.query_params)
+
+
+class SparseFieldsetViewMixin:
+    """
+    Для ViewSet: list/retrieve получают select_related/prefetch_related ровно
+    под поля, которые отдаст get_serializer() (с учётом ?expand=, ?fields=,
+    ?omit=). Ставится перед CachedReadMixin: раскрытые модели добавляются к
+    меткам кэша.
+    """
+    sparse_actions = ("list", "retrieve")
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if self.request.method in SAFE_METHODS and getattr(self, "action", None) in self.sparse_actions:
+            qs = self.select_related_for(qs)
+        return qs
+
+    def select_related_for(self, qs):
+        return apply_query_plan(qs, self.get_serializer())
+
+    def get_related_cache_scopes(self, request):
+        # вызывается из CachedReadMixin.dispatch, до initialize_request — только request.GET
+        return expand_cache_scopes(self.get_serializer_class(), request.GET)
@@ -0,0 +1,210 @@
+"""
+Личные встречи команд (HeadToHead) для /api/teams/{id}/h2h/{other_id}/.
+
+Строка на пару (min(id), max(id)). На каждое сохранение/удаление
+MatchResult применяем к строке пары только разницу "стало - было" через
+F()-выражения и обновляем последнюю встречу одним запросом по паре.
+Полный проход — recompute_h2h() (команда recompute_h2h). Импорт турнира
+применяет разницу по своим результатам (apply_results_delta) — меняются
+только пары из пакета.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F, Q
+
+from .models import HeadToHead, Match, MatchResult
+from .response_cache import bump_models
+
+STAT_FIELDS = ("matches", "low_wins", "high_wins", "draws", "low_maps", "high_maps")
+
+
+def pair_key(team1_id, team2_id):
+    return (team1_id, team2_id) if team1_id < team2_id else (team2_id, team1_id)
+
+
+def contribution(team1_id, team2_id, winner_id, score1, score2):
+    """Counter полей HeadToHead для одного результата (с точки зрения пары)."""
+    if team1_id is None or team2_id is None or team1_id == team2_id:
+        return Counter()
+    if winner_id is None and score1 != score2:
+        winner_id = team1_id if score1 > score2 else team2_id
+
+    low, _ = pair_key(team1_id, team2_id)
+    low_maps, high_maps = (score1, score2) if team1_id == low else (score2, score1)
+    c = Counter(matches=1, low_maps=low_maps, high_maps=high_maps)
+    if winner_id is None:
+        c["draws"] = 1
+    elif winner_id == low:
+        c["low_wins"] = 1
+    else:
+        c["high_wins"] = 1
+    return c
+
+
+def _pair_matches(low, high):
+    return Match.objects.filter(
+        Q(team1_id=low, team2_id=high) | Q(team1_id=high, team2_id=low),
+        result__isnull=False,
+    )
+
+
+def refresh_last_meeting(low, high):
+    last = _pair_matches(low, high).order_by("-match_date", "-id").values_list("id", "match_date").first()
+    HeadToHead.objects.filter(team_low_id=low, team_high_id=high).update(
+        last_match_id=last[0] if last else None,
+        last_match_date=last[1] if last else None,
+    )
+
+
+def on_result_change(match_id, before, after):
+    """before/after — dict(winner_id, score_team1, score_team2) или None."""
+    teams = Match.objects.filter(pk=match_id).values_list("team1_id", "team2_id").first()
+    if teams is None or None in teams or teams[0] == teams[1]:
+        return
+    team1_id, team2_id = teams
+
+    def contrib(r):
+        if r is None:
+            return Counter()
+        return contribution(team1_id, team2_id, r["winner_id"], r["score_team1"], r["score_team2"])
+
+    delta = contrib(after)
+    delta.subtract(contrib(before))
+    delta = {k: v for k, v in delta.items() if v}
+
+    low, high = pair_key(team1_id, team2_id)
+    pair = HeadToHead.objects.filter(team_low_id=low, team_high_id=high)
+    with transaction.atomic():
+        if delta:
+            # удаление результата (в т.ч. каскадом от команды) только меняет
+            # или удаляет строку пары — вставка сослалась бы на удаляемую команду
+            if after is not None:
+                HeadToHead.objects.get_or_create(team_low_id=low, team_high_id=high)
+            pair.update(**{field: F(field) + value for field, value in delta.items()})
+            if after is None:
+                pair.filter(matches__lte=0).delete()
+        if before is None or after is None:
+            # встреча появилась или исчезла — последняя могла смениться
+            refresh_last_meeting(low, high)
+
+
+def tournament_results(tournament_id):
+    """(team1_id, team2_id, winner_id, score1, score2) по результатам турнира."""
+    return list(
+        MatchResult.objects.filter(match__tournament_id=tournament_id).values_list(
+            "match__team1_id", "match__team2_id", "winner_id", "score_team1", "score_team2",
+        )
+    )
+
+
+def apply_results_delta(before, after):
+    """
+    Разница "стало - было" по парам для набора результатов (строки как у
+    tournament_results): before — до массовой записи, after — после.
+    Возвращает число затронутых пар.
+    """
+    totals = {}
+    for rows, sign in ((after, 1), (before, -1)):
+        for t1, t2, winner_id, s1, s2 in rows:
+            c = contribution(t1, t2, winner_id, s1, s2)
+            if c:
+                totals.setdefault(pair_key(t1, t2), Counter()).update({k: sign * v for k, v in c.items()})
+
+    with transaction.atomic():
+        HeadToHead.objects.bulk_create(
+            [HeadToHead(team_low_id=low, team_high_id=high) for low, high in totals],
+            batch_size=2000,
+            ignore_conflicts=True,
+        )
+        for (low, high), delta in totals.items():
+            pair = HeadToHead.objects.filter(team_low_id=low, team_high_id=high)
+            changes = {field: F(field) + value for field, value in delta.items() if value}
+            if changes:
+                pair.update(**changes)
+            pair.filter(matches__lte=0).delete()
+            refresh_last_meeting(low, high)
+
+    bump_models(HeadToHead)
+    return len(totals)
+
+
+def recompute_h2h(team_ids=None):
+    """
+    Полный пересчёт всех пар (или только пар, где обе команды из team_ids).
+    Возвращает число пар.
+    """
+    totals = {}
+    last = {}
+    results = MatchResult.objects.filter(match__team1__isnull=False, match__team2__isnull=False)
+    old = HeadToHead.objects.all()
+    if team_ids is not None:
+        results = results.filter(match__team1_id__in=team_ids, match__team2_id__in=team_ids)
+        old = old.filter(team_low_id__in=team_ids, team_high_id__in=team_ids)
+    results = (
+        results
+        .order_by("match__match_date", "match_id")
+        .values_list("match_id", "match__match_date", "match__team1_id", "match__team2_id",
+                     "winner_id", "score_team1", "score_team2")
+    )
+    for match_id, match_date, t1, t2, winner_id, s1, s2 in results.iterator(chunk_size=5000):
+        c = contribution(t1, t2, winner_id, s1, s2)
+        if not c:
+            continue
+        key = pair_key(t1, t2)
+        totals.setdefault(key, Counter()).update(c)
+        last[key] = (match_id, match_date)
+
+    with transaction.atomic():
+        old.delete()
+        HeadToHead.objects.bulk_create(
+            [
+                HeadToHead(
+                    team_low_id=low, team_high_id=high,
+                    last_match_id=last[(low, high)][0], last_match_date=last[(low, high)][1],
+                    **{f: c.get(f, 0) for f in STAT_FIELDS},
+                )
+                for (low, high), c in totals.items()
+            ],
+            batch_size=2000,
+        )
+
+    bump_models(HeadToHead)
+    return len(totals)
+
+
+def h2h_for(team_id, other_id):
+    """Сводка с точки зрения team_id — один индексный запрос по паре."""
+    low, high = pair_key(team_id, other_id)
+    row = (
+        HeadToHead.objects.select_related("last_match", "last_match__result")
+        .filter(team_low_id=low, team_high_id=high)
+        .first()
+    )
+    if row is None:
+        row = HeadToHead(team_low_id=low, team_high_id=high)
+
+    mine_low = team_id == low
+    data = {
+        "matches": row.matches,
+        "wins": row.low_wins if mine_low else row.high_wins,
+        "losses": row.high_wins if mine_low else row.low_wins,
+        "draws": row.draws,
+        "maps_won": row.low_maps if mine_low else row.high_maps,
+        "maps_lost": row.high_maps if mine_low else row.low_maps,
+        "last_match": None,
+    }
+    m = row.last_match if row.last_match_id else None
+    if m is not None:
+        res = getattr(m, "result", None)
+        data["last_match"] = {
+            "id": m.id,
+            "tournament_id": m.tournament_id,
+            "match_date": m.match_date,
+            "round": m.round,
+            "team1_id": m.team1_id,
+            "team2_id": m.team2_id,
+            "score": f"{res.score_team1}:{res.score_team2}" if res else None,
+            "winner_id": res.winner_id if res else None,
+        }
+    return data
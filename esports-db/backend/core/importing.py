@@ -0,0 +1,447 @@
+"""
+Массовый импорт турнира: участники, матчи, результаты и итоговые места
+одним пакетом (API POST /api/tournaments/{id}/import/ и команда
+import_tournament).
+
+Пакет — JSON {"entrants": [...], "matches": [...], "results": [...],
+"standings": [...]} или те же секции отдельными CSV с заголовком:
+
+    entrants   name, country, logo_url
+    matches    key, team1, team2, match_date, round, status,
+               bracket_round, bracket_position, next_match, next_match_slot
+    results    match, winner, score_team1, score_team2, details
+    standings  team, place
+
+Команды указываются по названию: это участники пакета или уже заявленные
+в турнир. Новые команды создаются, существующие не меняются. key — ключ
+матча во внешнем источнике (Match.external_id): повторный импорт того же
+пакета обновляет матчи, а не дублирует их. results.match и next_match
+ссылаются на key (из пакета или импортированный раньше).
+
+Сначала весь пакет проверяется за один проход — ошибки собираются
+построчно, и при любой ошибке ничего не пишется. Затем всё пишется в
+одной транзакции через bulk_create(update_conflicts=True) пачками. Сигналы
+при этом не срабатывают (и победитель по сетке дальше не продвигается —
+в пакете завершённого турнира команды указаны у всех матчей), поэтому
+участие, групповые таблицы, рейтинги игры и личные встречи участников
+пересчитываются в конце, а кэш ответов сбрасывается явно. Пересчёт
+ограничен турниром: рейтинги игры — с даты его первого матча, личные
+встречи — разницей по результатам пакета, так что цена импорта зависит
+от пакета, а не от размера базы.
+"""
+import csv
+import io
+import json
+import time
+from datetime import datetime, time as dt_time
+
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Match, MatchResult, Standing, Team, TournamentTeam
+from .response_cache import bump_generation, bump_models, tournament_scope
+
+SECTIONS = ("entrants", "matches", "results", "standings")
+MAX_ROWS = 200_000
+BATCH_SIZE = 2000
+MATCH_STATUSES = {code for code, _ in Match.STATUS_CHOICES}
+MATCH_UPDATE_FIELDS = [
+    "team1", "team2", "match_date", "round", "status",
+    "bracket_round", "bracket_position", "next_match", "next_match_slot",
+]
+
+_validate_url = URLValidator()
+
+
+class BundleError(ValueError):
+    """errors — [{"section", "row", "errors": {поле: сообщение}}]; row с 1."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(f"{len(errors)} invalid row(s)")
+
+
+def read_csv(data):
+    """CSV (bytes или str, с заголовком) -> список словарей."""
+    if isinstance(data, bytes):
+        data = data.decode("utf-8-sig")
+    return list(csv.DictReader(io.StringIO(data)))
+
+
+def load_json(data):
+    if isinstance(data, bytes):
+        data = data.decode("utf-8-sig")
+    try:
+        bundle = json.loads(data)
+    except ValueError as e:
+        raise BundleError([{"section": "bundle", "row": 0, "errors": {"json": str(e)}}])
+    if not isinstance(bundle, dict):
+        raise BundleError([{"section": "bundle", "row": 0, "errors": {"json": "expected an object"}}])
+    return bundle
+
+
+class _Row:
+    """Разбор одной строки секции; ошибки копятся в errors."""
+
+    def __init__(self, section, index, data):
+        self.section = section
+        self.index = index
+        self.data = data if isinstance(data, dict) else {}
+        self.errors = {} if isinstance(data, dict) else {"row": "expected an object"}
+
+    def raw(self, field):
+        value = self.data.get(field)
+        if isinstance(value, str):
+            value = value.strip()
+        return None if value in ("", None) else value
+
+    def text(self, field, required=False, max_length=None):
+        value = self.raw(field)
+        if value is None:
+            if required:
+                self.errors[field] = "required"
+            return None
+        value = str(value)
+        if max_length and len(value) > max_length:
+            self.errors[field] = f"longer than {max_length} characters"
+            return None
+        return value
+
+    def integer(self, field, default=None, minimum=0, required=False):
+        value = self.raw(field)
+        if value is None:
+            if required:
+                self.errors[field] = "required"
+            return default
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            self.errors[field] = "must be an integer"
+            return default
+        if value < minimum:
+            self.errors[field] = f"must be >= {minimum}"
+            return default
+        return value
+
+    def moment(self, field):
+        value = self.raw(field)
+        if value is None:
+            self.errors[field] = "required"
+            return None
+        value = str(value)
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            parsed = datetime.combine(day, dt_time(0, 0)) if day else None
+        if parsed is None:
+            self.errors[field] = "must be an ISO date or datetime"
+            return None
+        return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+    def url(self, field):
+        value = self.text(field, max_length=200)
+        if value is not None:
+            try:
+                _validate_url(value)
+            except ValidationError:
+                self.errors[field] = "must be a URL"
+                return None
+        return value
+
+
+def validate_bundle(tournament, bundle):
+    """Проверяет пакет целиком; возвращает план записи или бросает BundleError."""
+    unknown = sorted(set(bundle) - set(SECTIONS))
+    if unknown:
+        raise BundleError([{"section": "bundle", "row": 0, "errors": {s: "unknown section" for s in unknown}}])
+    sections = {}
+    for name in SECTIONS:
+        rows = bundle.get(name) or []
+        if not isinstance(rows, list):
+            raise BundleError([{"section": name, "row": 0, "errors": {name: "expected a list"}}])
+        sections[name] = rows
+    total = sum(len(rows) for rows in sections.values())
+    if total > MAX_ROWS:
+        raise BundleError([{"section": "bundle", "row": 0, "errors": {"rows": f"more than {MAX_ROWS} rows"}}])
+
+    errors = []
+
+    def done(row):
+        if row.errors:
+            errors.append({"section": row.section, "row": row.index, "errors": row.errors})
+        return not row.errors
+
+    # участники: пакет + уже заявленные
+    entrants = {}
+    for i, data in enumerate(sections["entrants"], start=1):
+        row = _Row("entrants", i, data)
+        name = row.text("name", required=True, max_length=120)
+        country = row.text("country", max_length=80) or ""
+        logo_url = row.url("logo_url")
+        if name in entrants:
+            row.errors["name"] = "duplicate entrant"
+        if done(row):
+            entrants[name] = {"country": country, "logo_url": logo_url}
+    registered = set(
+        TournamentTeam.objects.filter(tournament=tournament).values_list("team__name", flat=True)
+    )
+    known_teams = set(entrants) | registered
+
+    def team(row, field, required=False):
+        name = row.text(field, required=required)
+        if name is not None and name not in known_teams:
+            row.errors[field] = f"unknown team {name!r} (not an entrant)"
+            return None
+        return name
+
+    # матчи; импортированные раньше — для ссылок results.match и next_match
+    existing = {}
+    existing_ids = {}
+    for key, match_id, team1, team2 in (
+        Match.objects.filter(tournament=tournament, external_id__isnull=False)
+        .values_list("external_id", "id", "team1__name", "team2__name")
+    ):
+        existing[key] = (team1, team2)
+        existing_ids[key] = match_id
+    matches = {}
+    links = []  # (строка, key, next_match) — проверяются, когда известны все ключи
+    for i, data in enumerate(sections["matches"], start=1):
+        row = _Row("matches", i, data)
+        key = row.text("key", required=True, max_length=64)
+        team1, team2 = team(row, "team1"), team(row, "team2")
+        if team1 is not None and team1 == team2:
+            row.errors["team2"] = "a team cannot play itself"
+        status = row.text("status")
+        if status is not None and status not in MATCH_STATUSES:
+            row.errors["status"] = f"must be one of {', '.join(sorted(MATCH_STATUSES))}"
+        slot = row.integer("next_match_slot", minimum=1)
+        next_key = row.text("next_match")
+        if next_key is not None and slot not in (1, 2):
+            row.errors["next_match_slot"] = "must be 1 or 2 when next_match is set"
+        clean = {
+            "team1": team1, "team2": team2,
+            "match_date": row.moment("match_date"),
+            "round": row.text("round", required=True, max_length=80),
+            "status": status,
+            "bracket_round": row.integer("bracket_round"),
+            "bracket_position": row.integer("bracket_position"),
+            "next_match": next_key,
+            "next_match_slot": slot if next_key is not None else None,
+        }
+        if key in matches:
+            row.errors["key"] = "duplicate match key"
+        if done(row):
+            matches[key] = clean
+            if next_key is not None:
+                links.append((i, key, next_key))
+    for i, key, next_key in links:
+        if next_key == key:
+            problem = "a match cannot feed itself"
+        elif next_key not in matches and next_key not in existing:
+            problem = f"unknown match {next_key!r}"
+        else:
+            continue
+        errors.append({"section": "matches", "row": i, "errors": {"next_match": problem}})
+        del matches[key]
+
+    def match_teams(key):
+        if key in matches:
+            return matches[key]["team1"], matches[key]["team2"]
+        return existing.get(key)
+
+    results = {}
+    for i, data in enumerate(sections["results"], start=1):
+        row = _Row("results", i, data)
+        key = row.text("match", required=True)
+        teams = match_teams(key) if key is not None else None
+        if key is not None and teams is None:
+            row.errors["match"] = f"unknown match {key!r}"
+        elif teams is not None and None in teams:
+            row.errors["match"] = "both teams must be known to record a result"
+        score1 = row.integer("score_team1", default=0)
+        score2 = row.integer("score_team2", default=0)
+        winner = row.text("winner")
+        if winner is not None and teams is not None and winner not in teams:
+            row.errors["winner"] = "must be team1 or team2 of the match"
+        if winner is None and teams is not None and score1 != score2:
+            # как advance_winner: без явного победителя решает счёт
+            winner = teams[0] if score1 > score2 else teams[1]
+        clean = {"winner": winner, "score_team1": score1, "score_team2": score2, "details": row.url("details")}
+        if key in results:
+            row.errors["match"] = "duplicate result for the match"
+        if done(row):
+            results[key] = clean
+
+    standings = {}
+    places = set()
+    for i, data in enumerate(sections["standings"], start=1):
+        row = _Row("standings", i, data)
+        name = team(row, "team", required=True)
+        place = row.integer("place", minimum=1, required=True)
+        if name in standings:
+            row.errors["team"] = "duplicate standing"
+        if place is not None and place in places:
+            row.errors["place"] = f"place {place} is already taken"
+        if done(row):
+            standings[name] = place
+            places.add(place)
+
+    if errors:
+        errors.sort(key=lambda e: (SECTIONS.index(e["section"]) if e["section"] in SECTIONS else -1, e["row"]))
+        raise BundleError(errors)
+
+    # матч с результатом без явного статуса — сыгран
+    for key, match in matches.items():
+        if match["status"] is None:
+            match["status"] = "finished" if key in results else "scheduled"
+    return {
+        "entrants": entrants, "matches": matches, "results": results, "standings": standings,
+        "existing": existing_ids,
+    }
+
+
+def _team_ids(names):
+    ids = {}
+    names = list(names)
+    for start in range(0, len(names), BATCH_SIZE):
+        ids.update(Team.objects.filter(name__in=names[start:start + BATCH_SIZE]).values_list("name", "id"))
+    return ids
+
+
+def _write(tournament, plan):
+    entrants = plan["entrants"]
+    team_ids = _team_ids(entrants)
+    new_teams = [
+        Team(name=name, country=info["country"], logo_url=info["logo_url"])
+        for name, info in entrants.items() if name not in team_ids
+    ]
+    Team.objects.bulk_create(new_teams, batch_size=BATCH_SIZE, ignore_conflicts=True)
+    if new_teams:
+        team_ids.update(_team_ids(name for name in entrants if name not in team_ids))
+    team_ids.update(
+        TournamentTeam.objects.filter(tournament=tournament).values_list("team__name", "team_id")
+    )
+    TournamentTeam.objects.bulk_create(
+        [TournamentTeam(tournament=tournament, team_id=team_ids[name]) for name in entrants],
+        batch_size=BATCH_SIZE, ignore_conflicts=True,
+    )
+
+    # победитель матча, импортированного раньше, может быть не из заявки
+    winners = {r["winner"] for r in plan["results"].values() if r["winner"] and r["winner"] not in team_ids}
+    if winners:
+        team_ids.update(_team_ids(winners))
+
+    # next_match на уже существующий матч ставится сразу; на созданный в этом
+    # же пакете — вторым upsert'ом только этих строк (bulk_update на CASE WHEN
+    # по всем матчам в разы медленнее)
+    matches = plan["matches"]
+    existing_ids = plan["existing"]
+    rows = [
+        Match(
+            tournament=tournament, external_id=key,
+            team1_id=team_ids.get(m["team1"]), team2_id=team_ids.get(m["team2"]),
+            match_date=m["match_date"], round=m["round"], status=m["status"],
+            bracket_round=m["bracket_round"], bracket_position=m["bracket_position"],
+            next_match_id=existing_ids.get(m["next_match"]), next_match_slot=m["next_match_slot"],
+        )
+        for key, m in matches.items()
+    ]
+    upsert = {"batch_size": BATCH_SIZE, "update_conflicts": True, "unique_fields": ["tournament", "external_id"]}
+    Match.objects.bulk_create(rows, update_fields=MATCH_UPDATE_FIELDS, **upsert)
+    # id после upsert: на части бэкендов bulk_create их не возвращает
+    match_ids = dict(
+        Match.objects.filter(tournament=tournament, external_id__isnull=False).values_list("external_id", "id")
+    )
+    pending = []
+    for row in rows:
+        next_key = matches[row.external_id]["next_match"]
+        if next_key is not None and row.next_match_id is None:
+            row.next_match_id = match_ids[next_key]
+            row.pk = None  # конфликт — по (tournament, external_id), не по id
+            pending.append(row)
+    Match.objects.bulk_create(pending, update_fields=["next_match"], **upsert)
+
+    MatchResult.objects.bulk_create(
+        [
+            MatchResult(
+                match_id=match_ids[key], winner_id=team_ids.get(r["winner"]),
+                score_team1=r["score_team1"], score_team2=r["score_team2"], details=r["details"],
+            )
+            for key, r in plan["results"].items()
+        ],
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["match"],
+        update_fields=["winner", "score_team1", "score_team2", "details"],
+    )
+    Standing.objects.bulk_create(
+        [Standing(tournament=tournament, team_id=team_ids[name], place=place)
+         for name, place in plan["standings"].items()],
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["tournament", "team"],
+        update_fields=["place"],
+    )
+    return len(new_teams)
+
+
+def _derived_snapshot(tournament):
+    """Состояние турнира до записи: результаты для h2h и первый матч для рейтингов."""
+    from .h2h import tournament_results
+
+    first = Match.objects.filter(tournament=tournament).aggregate(first=Min("match_date"))["first"]
+    return tournament_results(tournament.id), first
+
+
+def _rebuild_derived(tournament, snapshot):
+    from .h2h import apply_results_delta, tournament_results
+    from .participation import rebuild_participation
+    from .ratings import recompute_ratings_since
+    from .standings import recompute_standings
+
+    results_before, first_before = snapshot
+    rebuild_participation([tournament.id])
+    recompute_standings([tournament.id])
+    # матч мог уехать на другую дату: пересчёт с самой ранней из старой и новой
+    first = Match.objects.filter(tournament=tournament).aggregate(first=Min("match_date"))["first"]
+    dates = [d for d in (first_before, first) if d is not None]
+    if dates:
+        recompute_ratings_since(tournament.game_id, min(dates))
+    apply_results_delta(results_before, tournament_results(tournament.id))
+
+
+def import_bundle(tournament, bundle, dry_run=False, rebuild=True):
+    """
+    Проверка + запись пакета. Возвращает сводку; при ошибках в данных —
+    BundleError со списком ошибок по строкам (и ничего не записано).
+    """
+    started = time.monotonic()
+    plan = validate_bundle(tournament, bundle)
+    created = sum(1 for key in plan["matches"] if key not in plan["existing"])
+    summary = {
+        "entrants": len(plan["entrants"]),
+        "matches_created": created,
+        "matches_updated": len(plan["matches"]) - created,
+        "results": len(plan["results"]),
+        "standings": len(plan["standings"]),
+        "dry_run": dry_run,
+    }
+    if dry_run:
+        summary["seconds"] = round(time.monotonic() - started, 3)
+        return summary
+
+    with transaction.atomic():
+        snapshot = _derived_snapshot(tournament) if rebuild else None
+        teams_created = _write(tournament, plan)
+        if rebuild:
+            _rebuild_derived(tournament, snapshot)
+
+    bump_models(Team, TournamentTeam, Match, MatchResult, Standing)
+    bump_generation(tournament_scope(tournament.id))
+    summary["teams_created"] = teams_created
+    summary["seconds"] = round(time.monotonic() - started, 3)
+    return summary
@@ -0,0 +1,297 @@
+"""
+Живая лента матчей: /api/live/matches/ (Server-Sent Events).
+
+Вместо опроса /api/matches/upcoming/ и карточки матча страница держит одно
+соединение, а сервер присылает матч, когда у него меняется статус или
+результат. Фильтры — ?tournament=1,2&team=3&match=4 (между параметрами И,
+внутри параметра ИЛИ); без фильтров — все матчи.
+
+Broadcaster — один на процесс. Сигналы (signals.py) после коммита
+вызывают publish_match(): матч читается и сериализуется один раз, готовая
+строка события раскладывается по очередям подписчиков. Если подписчиков
+нет, ничего не читается.
+
+Ограничения:
+- MAX_CONNECTIONS на воркер; сверх лимита — 503 с Retry-After.
+- Очередь подписчика ограничена QUEUE_SIZE. Медленный клиент не тормозит
+  запись: при переполнении его очередь сбрасывается и он получает
+  событие resync (перечитать данные через REST).
+- Под WSGI соединение занимает поток воркера, поэтому поток отпускается
+  через MAX_DURATION секунд (EventSource сам переподключится). Под ASGI
+  (config/asgi.py) соединение — корутина, лимит держит только память.
+"""
+import asyncio
+import itertools
+import json
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from .models import Match
+
+FILTER_PARAMS = ("tournament", "team", "match")
+
+
+def _format(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {data}")
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+KEEPALIVE = b": keepalive\n\n"
+
+
+class Subscription:
+    def __init__(self, filters, queue_size):
+        self.filters = filters  # {"tournament": {1, 2}, "team": {3}} — пустые не храним
+        self.queue_size = queue_size
+        self._queue = deque()
+        self._overflowed = False
+        self._lock = threading.Lock()
+        self._notify = None
+        self.closed = False
+
+    def wants(self, keys):
+        """keys: {"tournament": {id}, "team": {team1_id, team2_id}, "match": {id}}."""
+        return all(wanted & keys.get(name, set()) for name, wanted in self.filters.items())
+
+    def put(self, chunk):
+        # вызывается из потока, записавшего матч: не блокируемся никогда
+        with self._lock:
+            if self._overflowed:
+                return
+            if len(self._queue) >= self.queue_size:
+                self._queue.clear()
+                self._overflowed = True
+            else:
+                self._queue.append(chunk)
+            notify = self._notify
+        if notify is not None:
+            notify()
+
+    def drain(self):
+        with self._lock:
+            chunks = list(self._queue)
+            self._queue.clear()
+            if self._overflowed:
+                self._overflowed = False
+                chunks.append(_format("resync", "{}"))
+        return chunks
+
+
+class Broadcaster:
+    def __init__(self, max_connections=200, queue_size=100):
+        self.max_connections = max_connections
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._ids = itertools.count(1)
+
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def subscribe(self, filters):
+        """Subscription или None, если лимит соединений исчерпан."""
+        with self._lock:
+            if len(self._subscribers) >= self.max_connections:
+                return None
+            sub = Subscription(filters, self.queue_size)
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        sub.closed = True
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def publish(self, event, payload, keys):
+        """Рассылает событие подходящим подписчикам; число получателей."""
+        with self._lock:
+            targets = [s for s in self._subscribers if s.wants(keys)]
+        if not targets:
+            return 0
+        chunk = _format(event, json.dumps(payload, cls=DjangoJSONEncoder, ensure_ascii=False), next(self._ids))
+        for sub in targets:
+            sub.put(chunk)
+        return len(targets)
+
+
+_broadcaster = None
+_broadcaster_lock = threading.Lock()
+
+
+def _conf():
+    return getattr(settings, "LIVE_FEED", {})
+
+
+def get_broadcaster():
+    global _broadcaster
+    if _broadcaster is None:
+        conf = _conf()
+        with _broadcaster_lock:
+            if _broadcaster is None:
+                _broadcaster = Broadcaster(
+                    max_connections=conf.get("MAX_CONNECTIONS", 200),
+                    queue_size=conf.get("QUEUE_SIZE", 100),
+                )
+    return _broadcaster
+
+
+@receiver(setting_changed)
+def _reset_broadcaster(setting, **kwargs):
+    global _broadcaster
+    if setting == "LIVE_FEED":
+        _broadcaster = None
+
+
+def match_keys(tournament_id, team1_id, team2_id, match_id):
+    return {
+        "tournament": {tournament_id},
+        "team": {team1_id, team2_id} - {None},
+        "match": {match_id},
+    }
+
+
+def _send_match(match_id):
+    from .serializers import MatchSerializer
+
+    broadcaster = get_broadcaster()
+    if not broadcaster.subscriber_count():
+        return
+    match = (
+        Match.objects.select_related("tournament", "team1", "team2", "result", "result__winner")
+        .filter(pk=match_id)
+        .first()
+    )
+    if match is None:
+        return  # удалён в той же транзакции — о нём скажет match_deleted
+    keys = match_keys(match.tournament_id, match.team1_id, match.team2_id, match.pk)
+    broadcaster.publish("match", MatchSerializer(match).data, keys)
+
+
+def publish_match(match_id):
+    """Матч изменился: после коммита отправить его подписчикам (в форме /api/matches/{id}/)."""
+    if get_broadcaster().subscriber_count():
+        transaction.on_commit(lambda: _send_match(match_id))
+
+
+def publish_match_deleted(match):
+    broadcaster = get_broadcaster()
+    if not broadcaster.subscriber_count():
+        return
+    payload = {"id": match.pk, "tournament": match.tournament_id, "team1": match.team1_id, "team2": match.team2_id}
+    keys = match_keys(match.tournament_id, match.team1_id, match.team2_id, match.pk)
+    transaction.on_commit(lambda: broadcaster.publish("match_deleted", payload, keys))
+
+
+def parse_filters(params):
+    """{"tournament": {1, 2}, ...} из ?tournament=1,2; ValueError на нечисловые id."""
+    filters = {}
+    for name in FILTER_PARAMS:
+        raw = params.get(name)
+        if raw:
+            filters[name] = {int(x) for x in raw.split(",") if x.strip()}
+    return filters
+
+
+class SyncEventStream:
+    """Поток событий для WSGI: ждёт в потоке воркера."""
+
+    def __init__(self, broadcaster, sub, keepalive, max_duration):
+        self.broadcaster = broadcaster
+        self.sub = sub
+        self.keepalive = keepalive
+        self.max_duration = max_duration
+        self._wakeup = threading.Event()
+        sub._notify = self._wakeup.set
+
+    def __iter__(self):
+        deadline = time.monotonic() + self.max_duration
+        try:
+            yield b"retry: 3000\n\n"
+            while not self.sub.closed and time.monotonic() < deadline:
+                chunks = self.sub.drain()
+                if chunks:
+                    yield b"".join(chunks)
+                    continue
+                if not self._wakeup.wait(self.keepalive):
+                    yield KEEPALIVE
+                self._wakeup.clear()
+        finally:
+            self.close()
+
+    def close(self):
+        self.broadcaster.unsubscribe(self.sub)
+        self._wakeup.set()
+
+
+class AsyncEventStream:
+    """Поток событий для ASGI: ждёт в event loop, без отдельного потока."""
+
+    def __init__(self, broadcaster, sub, keepalive):
+        self.broadcaster = broadcaster
+        self.sub = sub
+        self.keepalive = keepalive
+
+    async def __aiter__(self):
+        loop = asyncio.get_running_loop()
+        wakeup = asyncio.Event()
+        # put() приходит из потока, записавшего матч
+        self.sub._notify = lambda: loop.call_soon_threadsafe(wakeup.set)
+        try:
+            yield b"retry: 3000\n\n"
+            while not self.sub.closed:
+                chunks = self.sub.drain()
+                if chunks:
+                    yield b"".join(chunks)
+                    continue
+                try:
+                    await asyncio.wait_for(wakeup.wait(), self.keepalive)
+                except asyncio.TimeoutError:
+                    yield KEEPALIVE
+                wakeup.clear()
+        finally:
+            self.close()
+
+    def close(self):
+        self.sub._notify = None
+        self.broadcaster.unsubscribe(self.sub)
+
+
+@require_GET
+def live_matches(request):
+    try:
+        filters = parse_filters(request.GET)
+    except ValueError:
+        return JsonResponse({"error": "tournament, team and match must be comma-separated ids"}, status=400)
+
+    conf = _conf()
+    broadcaster = get_broadcaster()
+    sub = broadcaster.subscribe(filters)
+    if sub is None:
+        response = JsonResponse({"error": "too many live connections"}, status=503)
+        response["Retry-After"] = str(conf.get("RETRY_AFTER", 10))
+        return response
+
+    keepalive = conf.get("KEEPALIVE", 15)
+    if isinstance(request, ASGIRequest):
+        stream = AsyncEventStream(broadcaster, sub, keepalive)
+    else:
+        stream = SyncEventStream(broadcaster, sub, keepalive, conf.get("MAX_DURATION", 300))
+    # close() потока снимает подписку, даже если ответ так и не начали отдавать
+    response = StreamingHttpResponse(stream, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx: не буферизовать
+    return response
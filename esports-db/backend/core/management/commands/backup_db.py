@@ -1,46 +1,72 @@
 import os
-import subprocess
 from datetime import datetime
 from pathlib import Path
 
-from django.core.management.base import BaseCommand
 from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.backup import (
+    COMPRESSIONS, BackupError, DockerRunner, LocalRunner,
+    directory_dump, stream_dump, verify_stream,
+)
+
 
 class Command(BaseCommand):
-    help = "Create PostgreSQL backup using pg_dump inside Docker container"
+    help = "Create PostgreSQL backup: pg_dump в контейнере (или локально) с потоковой записью на хост"
 
-    def handle(self, *args, **options):
-        container = os.getenv("PG_DOCKER_CONTAINER", "esports_postgres")
+    def add_arguments(self, parser):
+        parser.add_argument("--mode", choices=("stream", "directory"), default="stream",
+                            help="stream — один сжатый файл, directory — pg_dump -F d -j (большие базы)")
+        parser.add_argument("--runner", choices=("docker", "local"), default="docker",
+                            help="где запускать pg_dump: docker exec в PG_DOCKER_CONTAINER или локально")
+        parser.add_argument("--compress", choices=COMPRESSIONS, default="gzip",
+                            help="stream: gzip на хосте, pg — сжатие pg_dump, none — без сжатия")
+        parser.add_argument("--level", type=int, default=6, help="уровень сжатия")
+        parser.add_argument("--jobs", type=int, default=4, help="directory: параллельных процессов pg_dump")
+        parser.add_argument("--no-verify", action="store_true", help="не проверять архив через pg_restore --list")
+        parser.add_argument("--out", default=None, help="каталог для копий (по умолчанию backend/backups)")
 
+    def get_runner(self, kind):
+        if kind == "docker":
+            return DockerRunner(os.getenv("PG_DOCKER_CONTAINER", "esports_postgres"))
+        db = settings.DATABASES["default"]
+        env = dict(os.environ)
+        env.update({
+            "PGHOST": str(db.get("HOST") or "127.0.0.1"),
+            "PGPORT": str(db.get("PORT") or "5432"),
+            "PGPASSWORD": str(db.get("PASSWORD") or ""),
+        })
+        return LocalRunner(env=env)
+
+    def handle(self, *args, **options):
         db = settings.DATABASES["default"]["NAME"]
         user = settings.DATABASES["default"]["USER"]
 
         # куда сохраняем на хосте (в папку backend/backups)
-        base_dir = Path(settings.BASE_DIR)
-        out_dir = base_dir / "backups"
-        out_dir.mkdir(exist_ok=True)
-
+        out_dir = Path(options["out"]) if options["out"] else Path(settings.BASE_DIR) / "backups"
+        out_dir.mkdir(parents=True, exist_ok=True)
         ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-        out_file = out_dir / f"{db}_{ts}.backup"
-
-        # 1) делаем бэкап внутри контейнера
-        tmp_path = f"/tmp/{db}_{ts}.backup"
-        cmd_dump = [
-            "docker", "exec", "-t", container,
-            "pg_dump", "-U", user, "-d", db, "-F", "c", "-f", tmp_path
-        ]
-
-        # 2) копируем файл на хост
-        cmd_cp = [
-            "docker", "cp",
-            f"{container}:{tmp_path}",
-            str(out_file)
-        ]
-
-        self.stdout.write(f"Running: {' '.join(cmd_dump)}")
-        subprocess.check_call(cmd_dump)
 
-        self.stdout.write(f"Running: {' '.join(cmd_cp)}")
-        subprocess.check_call(cmd_cp)
+        runner = self.get_runner(options["runner"])
+        verify = not options["no_verify"]
+        try:
+            if options["mode"] == "directory":
+                result = directory_dump(runner, db, user, out_dir / f"{db}_{ts}.dir",
+                                        jobs=options["jobs"], level=options["level"], verify=verify)
+            else:
+                suffix = ".backup.gz" if options["compress"] == "gzip" else ".backup"
+                result = stream_dump(runner, db, user, out_dir / f"{db}_{ts}{suffix}",
+                                     compress=options["compress"], level=options["level"])
+                if verify:
+                    result.entries = verify_stream(runner, result.path, compress=options["compress"])
+        except BackupError as e:
+            raise CommandError(str(e))
 
-        self.stdout.write(self.style.SUCCESS(f"Backup saved to: {out_file}"))
+        mb = 1024 * 1024
+        self.stdout.write(
+            f"Dumped {result.dump_bytes / mb:.1f} MB in {result.seconds:.1f}s "
+            f"({result.throughput:.1f} MB/s), on disk {result.written_bytes / mb:.1f} MB"
+        )
+        if result.entries is not None:
+            self.stdout.write(f"Verified: pg_restore --list shows {result.entries} entries")
+        self.stdout.write(self.style.SUCCESS(f"Backup saved to: {result.path}"))
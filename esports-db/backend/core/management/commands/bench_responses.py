@@ -0,0 +1,93 @@
+import gzip
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test.utils import override_settings
+from django.urls import Resolver404, resolve
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from core import compression
+from core.models import Team, Tournament
+from core.renderers import FastJSONRenderer, orjson
+
+
+def default_paths():
+    """Самые тяжёлые ответы на текущих данных: крупный турнир, полные страницы списков."""
+    tournament = Tournament.objects.annotate(n=Count("matches")).order_by("-n").first()
+    team = Team.objects.order_by("id").first()
+    paths = ["/api/matches/?page_size=500", "/api/tournaments/?page_size=500", "/api/teams/"]
+    if tournament is not None:
+        paths.insert(0, f"/api/tournaments/{tournament.id}/page/")
+    if team is not None:
+        paths.append(f"/api/teams/{team.id}/recent_matches/?limit=100")
+    return paths
+
+
+def timed(func, repeat):
+    """(результат, медиана в мс)."""
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - started)
+    return result, statistics.median(samples) * 1000
+
+
+class Command(BaseCommand):
+    help = "Рендер JSON (DRF vs orjson) и сжатие (gzip/brotli) по эндпоинтам: время и байты"
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="*", help="пути API (по умолчанию — самые тяжёлые ответы)")
+        parser.add_argument("--repeat", type=int, default=20, help="повторов на замер (берётся медиана)")
+
+    def handle(self, *args, **options):
+        paths = options["paths"] or default_paths()
+        repeat = max(options["repeat"], 1)
+        # ссылки пагинации строятся по Host: берём разрешённый
+        host = next((h.lstrip(".") for h in settings.ALLOWED_HOSTS if "*" not in h), "localhost")
+        factory = APIRequestFactory(HTTP_HOST=host)
+        codecs = [
+            ("gzip-1", lambda b: gzip.compress(b, compresslevel=1, mtime=0)),
+            ("gzip-6", lambda b: gzip.compress(b, compresslevel=6, mtime=0)),
+        ]
+        if compression.brotli is not None:
+            for quality in (1, 4, 11):
+                codecs.append((f"br-{quality}", lambda b, q=quality: compression.brotli.compress(b, quality=q)))
+        if orjson is None:
+            self.stdout.write(self.style.WARNING("orjson не установлен: FastJSONRenderer = JSONRenderer"))
+
+        drf, fast = JSONRenderer(), FastJSONRenderer()
+        # данные берём из самих view, без кэша ответов
+        with override_settings(RESPONSE_CACHE={"ENABLED": False}):
+            for path in paths:
+                try:
+                    match = resolve(urlsplit(path).path)
+                except Resolver404:
+                    raise CommandError(f"Unknown path: {path}")
+                response = match.func(factory.get(path), *match.args, **match.kwargs)
+                data = getattr(response, "data", None)
+                if response.status_code != 200 or data is None:
+                    self.stdout.write(self.style.WARNING(f"{path}: HTTP {response.status_code}, skipped"))
+                    continue
+                self.report(path, data, drf, fast, codecs, repeat)
+
+    def report(self, path, data, drf, fast, codecs, repeat):
+        body, drf_ms = timed(lambda: drf.render(data), repeat)
+        fast_body, fast_ms = timed(lambda: fast.render(data), repeat)
+        same = "same bytes" if fast_body == body else "DIFFERENT BYTES"
+        self.stdout.write(self.style.MIGRATE_HEADING(path))
+        self.stdout.write(
+            f"  json      {len(body) / 1024:9.1f} KB   drf {drf_ms:7.2f} ms   orjson {fast_ms:7.2f} ms"
+            f"   x{drf_ms / max(fast_ms, 1e-6):.1f}   {same}"
+        )
+        for name, codec in codecs:
+            packed, ms = timed(lambda: codec(body), repeat)
+            self.stdout.write(
+                f"  {name:<9} {len(packed) / 1024:9.1f} KB   {ms:7.2f} ms   {len(packed) / len(body):6.1%} of json"
+            )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core.view_history import compact_view_history
+
+
+class Command(BaseCommand):
+    help = "Свернуть историю просмотров в дневные счётчики и оставить последние N записей на пользователя"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keep", type=int, default=50, help="сколько последних записей оставить каждому пользователю")
+
+    def handle(self, *args, **options):
+        stats = compact_view_history(keep=options["keep"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rolled up: {stats['rolled_up']} daily rows, deleted: {stats['deleted']} rows in {stats['seconds']}s"
+        ))
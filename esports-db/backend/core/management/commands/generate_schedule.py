@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.models import Tournament
+from core.scheduling import FORMATS, ScheduleError, generate_schedule
+
+
+class Command(BaseCommand):
+    help = "Генерирует сетку на выбывание или круговое расписание турнира из заявленных команд"
+
+    def add_arguments(self, parser):
+        parser.add_argument("tournament", type=int)
+        parser.add_argument("--format", choices=FORMATS, default="single_elimination")
+        parser.add_argument("--seeding", default=None,
+                            help="'random' или id команд через запятую (по умолчанию — порядок заявки)")
+        parser.add_argument("--seed", type=int, default=None, help="зерно жребия для --seeding random")
+        parser.add_argument("--start", default=None, help="начало первого раунда, ISO (по умолчанию start_date 12:00)")
+        parser.add_argument("--round-hours", type=float, default=24)
+        parser.add_argument("--match-minutes", type=float, default=0)
+        parser.add_argument("--replace", action="store_true", help="пересоздать уже сгенерированные матчи")
+
+    def handle(self, *args, **options):
+        try:
+            tournament = Tournament.objects.get(pk=options["tournament"])
+        except Tournament.DoesNotExist:
+            raise CommandError(f"Tournament {options['tournament']} not found")
+
+        seeding = options["seeding"]
+        if seeding and seeding != "random":
+            try:
+                seeding = [int(x) for x in seeding.split(",") if x.strip()]
+            except ValueError:
+                raise CommandError("--seeding must be 'random' or comma-separated team ids")
+
+        start = None
+        if options["start"]:
+            start = parse_datetime(options["start"])
+            if start is None:
+                raise CommandError("--start must be an ISO datetime")
+            if timezone.is_naive(start):
+                start = timezone.make_aware(start)
+
+        try:
+            summary = generate_schedule(
+                tournament,
+                options["format"],
+                seeding=seeding,
+                start=start,
+                round_interval=timedelta(hours=options["round_hours"]),
+                match_interval=timedelta(minutes=options["match_minutes"]),
+                replace=options["replace"],
+                rng_seed=options["seed"],
+            )
+        except ScheduleError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{summary['format']}: {summary['teams']} teams, {summary['rounds']} rounds, "
+            f"{summary['matches']} matches created"
+        ))
@@ -0,0 +1,57 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importing import SECTIONS, BundleError, import_bundle, load_json, read_csv
+from core.models import Tournament
+
+MAX_SHOWN_ERRORS = 50
+
+
+class Command(BaseCommand):
+    help = "Импорт участников, матчей, результатов и мест турнира одним пакетом (JSON или CSV по секциям)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("tournament", type=int)
+        parser.add_argument("bundle", nargs="?", help="JSON-пакет {entrants, matches, results, standings}")
+        for section in SECTIONS:
+            parser.add_argument(f"--{section}", metavar="CSV", help=f"секция {section} в CSV")
+        parser.add_argument("--dry-run", action="store_true", help="только проверить пакет")
+        parser.add_argument("--skip-derived", action="store_true",
+                            help="не пересчитывать участие/таблицы/рейтинги/h2h (можно позже отдельными командами)")
+
+    def handle(self, *args, **options):
+        try:
+            tournament = Tournament.objects.get(pk=options["tournament"])
+        except Tournament.DoesNotExist:
+            raise CommandError(f"Tournament {options['tournament']} not found")
+
+        csv_sections = {s: options[s] for s in SECTIONS if options[s]}
+        if bool(options["bundle"]) == bool(csv_sections):
+            raise CommandError("pass either a JSON bundle or --entrants/--matches/--results/--standings CSV files")
+
+        try:
+            if options["bundle"]:
+                bundle = load_json(Path(options["bundle"]).read_bytes())
+            else:
+                bundle = {s: read_csv(Path(path).read_bytes()) for s, path in csv_sections.items()}
+            summary = import_bundle(
+                tournament, bundle, dry_run=options["dry_run"], rebuild=not options["skip_derived"],
+            )
+        except OSError as e:
+            raise CommandError(str(e))
+        except BundleError as e:
+            for error in e.errors[:MAX_SHOWN_ERRORS]:
+                details = "; ".join(f"{field}: {message}" for field, message in error["errors"].items())
+                self.stderr.write(f"{error['section']} row {error['row']}: {details}")
+            if len(e.errors) > MAX_SHOWN_ERRORS:
+                self.stderr.write(f"... and {len(e.errors) - MAX_SHOWN_ERRORS} more")
+            raise CommandError(f"Bundle rejected: {e}")
+
+        rows = sum(summary[k] for k in ("entrants", "matches_created", "matches_updated", "results", "standings"))
+        verb = "Validated" if summary["dry_run"] else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {rows} rows in {summary['seconds']:.2f}s: " + ", ".join(
+                f"{k}={v}" for k, v in summary.items() if k not in ("dry_run", "seconds")
+            )
+        ))
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.participation import rebuild_participation
+
+
+class Command(BaseCommand):
+    help = "Пересобрать индекс участия команд (TeamParticipation) из TournamentTeam и матчей"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tournament", type=int, action="append", dest="tournaments",
+                            help="только указанные турниры (можно несколько раз)")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        created = rebuild_participation(tournament_ids=options["tournaments"])
+        self.stdout.write(self.style.SUCCESS(
+            f"TeamParticipation rebuilt: {created} rows in {time.monotonic() - started:.2f}s"
+        ))
@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.h2h import recompute_h2h
+
+
+class Command(BaseCommand):
+    help = "Полный пересчёт личных встреч команд (HeadToHead) по результатам матчей"
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        count = recompute_h2h()
+        self.stdout.write(self.style.SUCCESS(
+            f"Head-to-head recomputed for {count} pairs in {time.monotonic() - started:.2f}s"
+        ))
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.ratings import recompute_ratings
+
+
+class Command(BaseCommand):
+    help = "Полный пересчёт рейтинга Эло команд (TeamRating, TeamRatingHistory) по истории результатов"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--game", type=int, action="append", dest="games",
+                            help="только указанные игры (можно несколько раз)")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        count = recompute_ratings(game_ids=options["games"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Ratings recomputed over {count} matches in {time.monotonic() - started:.2f}s"
+        ))
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.standings import recompute_standings
+
+
+class Command(BaseCommand):
+    help = "Полный пересчёт групповых таблиц (GroupStanding) по результатам матчей"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tournament", type=int, action="append", dest="tournaments",
+                            help="только указанные турниры (можно несколько раз)")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        count = recompute_standings(tournament_ids=options["tournaments"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Standings recomputed for {count} tournaments in {time.monotonic() - started:.2f}s"
+        ))
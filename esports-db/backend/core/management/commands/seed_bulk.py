@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.seeding import PRESETS, BulkSeeder, rebuild_derived
+
+
+class Command(BaseCommand):
+    help = "Синтетические данные для нагрузочных тестов: детерминированно по --seed, COPY на PostgreSQL"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--preset", choices=sorted(PRESETS), default="small",
+                            help="small ~10k матчей, medium ~100k, large ~1M (50k команд)")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--teams", type=int, default=None, help="переопределить число команд пресета")
+        parser.add_argument("--tournaments", type=int, default=None, help="переопределить число турниров пресета")
+        parser.add_argument("--skip-derived", action="store_true",
+                            help="не пересобирать участие/таблицы/рейтинги/h2h (можно позже отдельными командами)")
+
+    def handle(self, *args, **options):
+        params = dict(PRESETS[options["preset"]])
+        for key in ("teams", "tournaments"):
+            if options[key] is not None:
+                params[key] = options[key]
+
+        started = time.monotonic()
+        try:
+            seeder = BulkSeeder(seed=options["seed"], log=self.stdout.write, **params)
+        except ValueError as e:
+            raise CommandError(str(e))
+        counts = seeder.run()
+        if not options["skip_derived"]:
+            rebuild_derived(log=self.stdout.write)
+
+        summary = ", ".join(f"{k}={v}" for k, v in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Seeded {summary} in {time.monotonic() - started:.1f}s"))
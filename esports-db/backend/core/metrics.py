@@ -0,0 +1,295 @@
+"""
+Метрики запросов: число и время SQL, время сериализации и полное время
+по каждому view (например, TeamViewSet.recent_matches).
+
+MetricsMiddleware считает их на запрос, отдаёт в заголовке Server-Timing
+и складывает в гистограммы процесса. /api/admin/metrics/ (только staff)
+отдаёт гистограммы в текстовом формате Prometheus. Значения — по
+процессу: Prometheus опрашивает каждый воркер отдельно.
+
+SQL считает один execute_wrapper, который install_query_counting() ставит
+на каждое соединение (сигнал connection_created): под ASGI async ORM и
+sync_to_async выполняют запросы в других потоках, на их собственных
+соединениях. Запрос относится к тому HTTP-запросу, чей RequestMetrics
+лежит в ContextVar — sync_to_async переносит контекст в поток.
+
+Накладные расходы — perf_counter и инкремент счётчика на SQL-запрос,
+bisect и блокировка на каждое наблюдение; можно держать включённым.
+"""
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+_current = ContextVar("request_metrics", default=None)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+
+class RequestMetrics:
+    __slots__ = ("sql_count", "sql_time", "serializer_time", "serializer_depth", "compress_time")
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        self.compress_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - started
+            self.sql_count += 1
+
+
+def _execute_wrapper(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def _add_execute_wrapper(connection, **kwargs):
+    # обёртки живут на объекте соединения потока и переживают переподключение
+    if _execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute_wrapper)
+
+
+def install_query_counting():
+    """Счётчик SQL на всех соединениях (вызывается из CoreConfig.ready)."""
+    connection_created.connect(_add_execute_wrapper, dispatch_uid="metrics_execute_wrapper")
+    for connection in connections.all(initialized_only=True):
+        _add_execute_wrapper(connection)
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets, labels):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.labels = labels
+        self._lock = threading.Lock()
+        self._series = {}  # значения меток -> [счётчики по корзинам..., +Inf], sum
+
+    def observe(self, value, *label_values):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1])) for k, v in self._series.items())
+        for label_values, (counts, total) in items:
+            labels = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values))
+            cumulative = 0
+            for le, count in zip([*map(_fmt, self.buckets), "+Inf"], counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {_fmt(total)}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Counter:
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, *label_values):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + 1
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            labels = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values))
+            lines.append(f"{self.name}{{{labels}}} {value}")
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt(value):
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+VIEW_LABELS = ("view", "method")
+REQUEST_DURATION = Histogram("http_request_duration_seconds", "Полное время ответа", DURATION_BUCKETS, VIEW_LABELS)
+SQL_DURATION = Histogram("http_request_sql_duration_seconds", "Суммарное время SQL за запрос",
+                         DURATION_BUCKETS, VIEW_LABELS)
+SQL_QUERIES = Histogram("http_request_sql_queries", "Число SQL-запросов за запрос", QUERY_BUCKETS, VIEW_LABELS)
+SERIALIZER_DURATION = Histogram("http_request_serializer_duration_seconds", "Время serializer.data за запрос",
+                                DURATION_BUCKETS, VIEW_LABELS)
+REQUESTS = Counter("http_requests_total", "Число ответов", ("view", "method", "status"))
+
+REGISTRY = (REQUESTS, REQUEST_DURATION, SQL_DURATION, SQL_QUERIES, SERIALIZER_DURATION)
+
+
+def render_prometheus():
+    lines = []
+    for metric in REGISTRY:
+        lines += metric.expose()
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics():
+    for metric in REGISTRY:
+        metric.clear()
+
+
+def current_metrics():
+    """RequestMetrics текущего запроса или None (вне MetricsMiddleware)."""
+    return _current.get()
+
+
+HTTP_METHODS = frozenset(("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "TRACE", "CONNECT"))
+
+
+def method_label(request):
+    """Метод для меток; произвольный метод клиента не должен плодить серии."""
+    return request.method if request.method in HTTP_METHODS else "other"
+
+
+def view_label(request):
+    """
+    Владелец.действие: ViewSet.action, APIView.method, модуль.функция
+    (views_async.team_history_view); без маршрута — "unresolved".
+    """
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unresolved"
+    func = match.func
+    cls = getattr(func, "cls", None) or getattr(func, "view_class", None)
+    if cls is None:
+        return f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+    method = method_label(request).lower()
+    actions = getattr(func, "actions", None)
+    if actions:
+        return f"{cls.__name__}.{actions.get(method, method)}"
+    return f"{cls.__name__}.{method}"
+
+
+def _conf():
+    return getattr(settings, "METRICS", {})
+
+
+class MetricsMiddleware:
+    # sync и async: синхронный middleware под ASGI увёл бы каждый запрос в поток
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        conf = _conf()
+        if not conf.get("ENABLED", True):
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._record(request, response, metrics, started, conf)
+
+    async def __acall__(self, request):
+        conf = _conf()
+        if not conf.get("ENABLED", True):
+            return await self.get_response(request)
+
+        # SQL из потоков async ORM считает _execute_wrapper их соединений:
+        # sync_to_async копирует контекст, а с ним и _current
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._record(request, response, metrics, started, conf)
+
+    def _record(self, request, response, metrics, started, conf):
+        total = time.perf_counter() - started
+        label, method = view_label(request), method_label(request)
+        REQUESTS.inc(label, method, response.status_code)
+        REQUEST_DURATION.observe(total, label, method)
+        SQL_DURATION.observe(metrics.sql_time, label, method)
+        SQL_QUERIES.observe(metrics.sql_count, label, method)
+        SERIALIZER_DURATION.observe(metrics.serializer_time, label, method)
+
+        if conf.get("SERVER_TIMING", True):
+            compress = f"compress;dur={metrics.compress_time * 1000:.1f}, " if metrics.compress_time else ""
+            response["Server-Timing"] = (
+                f'db;dur={metrics.sql_time * 1000:.1f};desc="{metrics.sql_count} queries", '
+                f"serialize;dur={metrics.serializer_time * 1000:.1f}, "
+                f"{compress}total;dur={total * 1000:.1f}"
+            )
+        return response
+
+
+def _timed_data(prop):
+    fget = prop.fget
+
+    @functools.wraps(fget)
+    def data(self):
+        metrics = _current.get()
+        if metrics is None or metrics.serializer_depth:
+            return fget(self)
+        metrics.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return fget(self)
+        finally:
+            metrics.serializer_time += time.perf_counter() - started
+            metrics.serializer_depth -= 1
+
+    data._metrics_timed = True
+    return property(data)
+
+
+def install_serializer_timing():
+    """Оборачивает Serializer.data / ListSerializer.data (вызывается из CoreConfig.ready)."""
+    from rest_framework import serializers
+
+    for cls in (serializers.Serializer, serializers.ListSerializer):
+        if not getattr(cls.data.fget, "_metrics_timed", False):
+            cls.data = _timed_data(cls.data)
@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-18 10:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_teamregistrationrequest'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['match_date', 'id'], name='core_match_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['tournament', 'match_date', 'id'], name='core_match_tourn_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tournament',
+            index=models.Index(fields=['-start_date', '-id'], name='core_tourn_start_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tournament',
+            index=models.Index(fields=['game', '-start_date', '-id'], name='core_tourn_game_start_id_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0 on 2026-10-18 11:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_match_tournament_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='viewhistory',
+            name='viewed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.CreateModel(
+            name='ViewHistoryDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('item_type', models.CharField(choices=[('tournament', 'Tournament'), ('team', 'Team'), ('game', 'Game'), ('match', 'Match')], max_length=20)),
+                ('item_id', models.PositiveIntegerField()),
+                ('views', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['item_type', 'item_id', 'day'], name='core_viewhi_item_ty_9ffa95_idx')],
+                'unique_together': {('day', 'item_type', 'item_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 6.0 on 2026-10-18 11:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_participation(apps, schema_editor):
+    TournamentTeam = apps.get_model("core", "TournamentTeam")
+    Match = apps.get_model("core", "Match")
+    TeamParticipation = apps.get_model("core", "TeamParticipation")
+
+    pairs = {}
+    for team_id, tournament_id, game_id in TournamentTeam.objects.values_list(
+        "team_id", "tournament_id", "tournament__game_id"
+    ).iterator():
+        pairs[(team_id, tournament_id)] = game_id
+    for field in ("team1_id", "team2_id"):
+        for team_id, tournament_id, game_id in Match.objects.values_list(
+            field, "tournament_id", "tournament__game_id"
+        ).iterator():
+            pairs[(team_id, tournament_id)] = game_id
+
+    TeamParticipation.objects.bulk_create(
+        [
+            TeamParticipation(team_id=team_id, tournament_id=tournament_id, game_id=game_id)
+            for (team_id, tournament_id), game_id in pairs.items()
+            if team_id is not None
+        ],
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_view_history_daily'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeamParticipation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participations', to='core.game')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participations', to='core.team')),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participations', to='core.tournament')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['game', 'team'], name='core_teampa_game_id_b5c4c0_idx')],
+                'unique_together': {('team', 'tournament')},
+            },
+        ),
+        migrations.RunPython(fill_participation, migrations.RunPython.noop),
+    ]
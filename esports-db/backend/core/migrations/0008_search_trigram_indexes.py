@@ -0,0 +1,39 @@
+# Generated by Django 6.0 on 2026-10-18 12:05
+
+from django.db import migrations
+
+# GIN trigram-индексы для /api/search/ (core/search.py). Только PostgreSQL:
+# на SQLite поиск работает через icontains без индексов.
+TRIGRAM_INDEXES = [
+    ("core_team_name_trgm", "core_team", "name"),
+    ("core_player_nickname_trgm", "core_player", "nickname"),
+    ("core_player_real_name_trgm", "core_player", "real_name"),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ({column} gin_trgm_ops)"
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_teamparticipation'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
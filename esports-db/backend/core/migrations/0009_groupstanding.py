@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-18 12:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupStanding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('played', models.IntegerField(default=0)),
+                ('wins', models.IntegerField(default=0)),
+                ('draws', models.IntegerField(default=0)),
+                ('losses', models.IntegerField(default=0)),
+                ('score_for', models.IntegerField(default=0)),
+                ('score_against', models.IntegerField(default=0)),
+                ('points', models.IntegerField(default=0)),
+                ('rank', models.IntegerField(default=0)),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='group_standings', to='core.team')),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='group_standings', to='core.tournament')),
+            ],
+            options={
+                'ordering': ['rank'],
+                'indexes': [models.Index(fields=['tournament', 'rank'], name='core_groups_tournam_057c62_idx')],
+                'unique_together': {('tournament', 'team')},
+            },
+        ),
+    ]
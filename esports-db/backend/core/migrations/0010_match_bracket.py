@@ -0,0 +1,44 @@
+# Generated by Django 6.0 on 2026-10-18 13:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_groupstanding'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='bracket_position',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='bracket_round',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='next_match',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='feeder_matches', to='core.match'),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='next_match_slot',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='match',
+            name='team1',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='matches_as_team1', to='core.team'),
+        ),
+        migrations.AlterField(
+            model_name='match',
+            name='team2',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='matches_as_team2', to='core.team'),
+        ),
+    ]
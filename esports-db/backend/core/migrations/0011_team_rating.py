@@ -0,0 +1,46 @@
+# Generated by Django 6.0 on 2026-10-18 14:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_match_bracket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeamRating',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating', models.FloatField()),
+                ('matches', models.IntegerField(default=0)),
+                ('last_match_date', models.DateTimeField(blank=True, null=True)),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='team_ratings', to='core.game')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ratings', to='core.team')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['game', '-rating'], name='core_rating_game_rating_idx')],
+                'unique_together': {('team', 'game')},
+            },
+        ),
+        migrations.CreateModel(
+            name='TeamRatingHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('played_at', models.DateTimeField()),
+                ('rating_before', models.FloatField()),
+                ('rating_after', models.FloatField()),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.game')),
+                ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rating_changes', to='core.match')),
+                ('opponent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.team')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rating_history', to='core.team')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['team', 'game', 'played_at'], name='core_rating_hist_team_idx')],
+                'unique_together': {('match', 'team')},
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0 on 2026-10-18 14:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_team_rating'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HeadToHead',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('matches', models.IntegerField(default=0)),
+                ('low_wins', models.IntegerField(default=0)),
+                ('high_wins', models.IntegerField(default=0)),
+                ('draws', models.IntegerField(default=0)),
+                ('low_maps', models.IntegerField(default=0)),
+                ('high_maps', models.IntegerField(default=0)),
+                ('last_match_date', models.DateTimeField(blank=True, null=True)),
+                ('last_match', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.match')),
+                ('team_high', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.team')),
+                ('team_low', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.team')),
+            ],
+            options={
+                'unique_together': {('team_low', 'team_high')},
+            },
+        ),
+    ]
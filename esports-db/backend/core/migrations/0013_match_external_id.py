@@ -0,0 +1,22 @@
+# Generated by Django 6.0 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_head_to_head'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='external_id',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='match',
+            constraint=models.UniqueConstraint(fields=('tournament', 'external_id'), name='core_match_tourn_external_uniq'),
+        ),
+    ]
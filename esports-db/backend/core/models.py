@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 class Game(models.Model):
     title = models.CharField(max_length=120, unique=True)
@@ -30,6 +31,13 @@ class Tournament(models.Model):
     format = models.CharField(max_length=20, choices=FORMAT_CHOICES, default="playoff")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="registration")
 
+    class Meta:
+        indexes = [
+            # keyset-пагинация списка: ORDER BY start_date DESC, id DESC
+            models.Index(fields=["-start_date", "-id"], name="core_tourn_start_id_idx"),
+            models.Index(fields=["game", "-start_date", "-id"], name="core_tourn_game_start_id_idx"),
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.game.title})"
 
@@ -74,14 +82,60 @@ class Match(models.Model):
     ]
 
     tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE, related_name="matches")
-    team1 = models.ForeignKey(Team, on_delete=models.CASCADE, related_name="matches_as_team1")
-    team2 = models.ForeignKey(Team, on_delete=models.CASCADE, related_name="matches_as_team2")
+    # пусто = участник ещё не определён (матч следующего раунда сетки)
+    team1 = models.ForeignKey(Team, on_delete=models.CASCADE, null=True, blank=True, related_name="matches_as_team1")
+    team2 = models.ForeignKey(Team, on_delete=models.CASCADE, null=True, blank=True, related_name="matches_as_team2")
     match_date = models.DateTimeField()
     round = models.CharField(max_length=80)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="scheduled")
 
+    # структура сетки/расписания (core/scheduling.py)
+    bracket_round = models.PositiveSmallIntegerField(null=True, blank=True)
+    bracket_position = models.PositiveIntegerField(null=True, blank=True)
+    next_match = models.ForeignKey(
+        "self", on_delete=models.SET_NULL, null=True, blank=True, related_name="feeder_matches"
+    )
+    next_match_slot = models.PositiveSmallIntegerField(null=True, blank=True)  # 1 -> team1, 2 -> team2
+    # ключ матча во внешнем источнике (core/importing.py): повторный импорт обновляет, а не дублирует
+    external_id = models.CharField(max_length=64, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # keyset-пагинация списка: ORDER BY match_date, id
+            models.Index(fields=["match_date", "id"], name="core_match_date_id_idx"),
+            models.Index(fields=["tournament", "match_date", "id"], name="core_match_tourn_date_id_idx"),
+        ]
+        constraints = [
+            # без condition: ON CONFLICT (tournament_id, external_id) требует обычный уникальный индекс;
+            # NULL'ы уникальность не нарушают
+            models.UniqueConstraint(fields=["tournament", "external_id"], name="core_match_tourn_external_uniq"),
+        ]
+
     def __str__(self):
-        return f"{self.tournament.name}: {self.team1.name} vs {self.team2.name}"
+        team1 = self.team1.name if self.team1 else "TBD"
+        team2 = self.team2.name if self.team2 else "TBD"
+        return f"{self.tournament.name}: {team1} vs {team2}"
+
+
+class TeamParticipation(models.Model):
+    """
+    Денормализованный индекс участия: команда играла в турнире (через
+    TournamentTeam или как team1/team2 матча). game дублируется из турнира,
+    чтобы ?game= был одним индексным semi-join. Поддерживается сигналами,
+    перестраивается командой rebuild_participation.
+    """
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name="participations")
+    tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE, related_name="participations")
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name="participations")
+
+    class Meta:
+        unique_together = ("team", "tournament")
+        indexes = [
+            models.Index(fields=["game", "team"]),
+        ]
+
+    def __str__(self):
+        return f"{self.team_id} @ {self.tournament_id} ({self.game_id})"
 
 
 class MatchResult(models.Model):
@@ -107,6 +161,37 @@ class Standing(models.Model):
     def __str__(self):
         return f"{self.tournament.name}: {self.team.name} place {self.place}"
 
+class GroupStanding(models.Model):
+    """
+    Агрегированная таблица групповой стадии (форматы groups/mixed).
+    Обновляется дельтами при сохранении MatchResult (core/standings.py),
+    полный пересчёт — команда recompute_standings.
+    """
+    tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE, related_name="group_standings")
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name="group_standings")
+    played = models.IntegerField(default=0)
+    wins = models.IntegerField(default=0)
+    draws = models.IntegerField(default=0)
+    losses = models.IntegerField(default=0)
+    score_for = models.IntegerField(default=0)
+    score_against = models.IntegerField(default=0)
+    points = models.IntegerField(default=0)
+    rank = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ("tournament", "team")
+        ordering = ["rank"]
+        indexes = [
+            models.Index(fields=["tournament", "rank"]),
+        ]
+
+    @property
+    def score_diff(self):
+        return self.score_for - self.score_against
+
+    def __str__(self):
+        return f"{self.tournament_id}: {self.team_id} #{self.rank} ({self.points} pts)"
+
 class UserProfile(models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="profile")
     bio = models.TextField(blank=True, default="")
@@ -145,12 +230,29 @@ class ViewHistory(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="view_history")
     item_type = models.CharField(max_length=20, choices=ITEM_TYPES)
     item_id = models.PositiveIntegerField()
-    viewed_at = models.DateTimeField(auto_now_add=True)
+    # не auto_now_add: буфер (core/view_history.py) пишет время самого просмотра
+    viewed_at = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         indexes = [
             models.Index(fields=["user", "item_type", "viewed_at"]),
         ]
+
+
+class ViewHistoryDaily(models.Model):
+    """
+    Дневные счётчики просмотров — остаются после чистки ViewHistory.
+    """
+    day = models.DateField()
+    item_type = models.CharField(max_length=20, choices=ViewHistory.ITEM_TYPES)
+    item_id = models.PositiveIntegerField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("day", "item_type", "item_id")
+        indexes = [
+            models.Index(fields=["item_type", "item_id", "day"]),
+        ]
 class TeamApplication(models.Model):
     STATUS_CHOICES = [
         ("pending", "ожидает"),
@@ -237,3 +339,69 @@ class TeamRegistrationRequest(models.Model):
 
     def __str__(self):
         return f"Req({self.team_name}) -> {self.tournament_id} [{self.status}]"
+
+
+class TeamRating(models.Model):
+    """
+    Текущий рейтинг Эло команды в дисциплине (core/ratings.py).
+    Полный пересчёт — команда recompute_ratings.
+    """
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name="ratings")
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name="team_ratings")
+    rating = models.FloatField()
+    matches = models.IntegerField(default=0)
+    last_match_date = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ("team", "game")
+        indexes = [
+            # лидерборд: ORDER BY rating DESC внутри игры
+            models.Index(fields=["game", "-rating"], name="core_rating_game_rating_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.team_id} @ {self.game_id}: {self.rating:.1f}"
+
+
+class TeamRatingHistory(models.Model):
+    """Рейтинг команды до/после каждого учтённого матча."""
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name="rating_history")
+    opponent = models.ForeignKey(Team, on_delete=models.CASCADE, related_name="+")
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name="+")
+    match = models.ForeignKey(Match, on_delete=models.CASCADE, related_name="rating_changes")
+    played_at = models.DateTimeField()
+    rating_before = models.FloatField()
+    rating_after = models.FloatField()
+
+    class Meta:
+        unique_together = ("match", "team")
+        indexes = [
+            models.Index(fields=["team", "game", "played_at"], name="core_rating_hist_team_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.team_id} #{self.match_id}: {self.rating_before:.1f} -> {self.rating_after:.1f}"
+
+
+class HeadToHead(models.Model):
+    """
+    Личные встречи пары команд. Пара нормализована: team_low.id < team_high.id.
+    Обновляется дельтами при сохранении MatchResult (core/h2h.py),
+    полный пересчёт — команда recompute_h2h.
+    """
+    team_low = models.ForeignKey(Team, on_delete=models.CASCADE, related_name="+")
+    team_high = models.ForeignKey(Team, on_delete=models.CASCADE, related_name="+")
+    matches = models.IntegerField(default=0)
+    low_wins = models.IntegerField(default=0)
+    high_wins = models.IntegerField(default=0)
+    draws = models.IntegerField(default=0)
+    low_maps = models.IntegerField(default=0)
+    high_maps = models.IntegerField(default=0)
+    last_match = models.ForeignKey(Match, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    last_match_date = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ("team_low", "team_high")
+
+    def __str__(self):
+        return f"{self.team_low_id} vs {self.team_high_id}: {self.low_wins}-{self.draws}-{self.high_wins}"
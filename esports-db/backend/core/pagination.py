@@ -0,0 +1,186 @@
+"""
+Keyset (cursor) пагинация.
+
+В отличие от OFFSET, курсор хранит значения ключа сортировки последней
+выданной строки, и следующая страница — это WHERE (поле, id) > (значения)
+по составному индексу. Поэтому глубокие страницы стоят столько же, сколько
+первая, а вставка новых строк не сдвигает и не дублирует уже выданные.
+
+Стандартный CursorPagination из DRF позиционируется только по первому полю
+сортировки и добирает одинаковые значения через OFFSET — при множестве
+турниров с одной start_date это тот же OFFSET, поэтому здесь своя реализация.
+"""
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    # последнее поле должно быть уникальным (обычно id)
+    ordering = ("id",)
+    cursor_query_param = "cursor"
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    invalid_cursor_message = "Invalid cursor"
+
+    # --- курсор ---
+
+    def encode_cursor(self, position, reverse):
+        payload = json.dumps({"p": position, "r": int(reverse)}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, request):
+        raw = request.query_params.get(self.cursor_query_param)
+        if not raw:
+            return None, False
+        try:
+            padded = raw + "=" * (-len(raw) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            position, reverse = payload["p"], bool(payload["r"])
+            if len(position) != len(self.ordering):
+                raise ValueError
+            return self._parse_position(position), reverse
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _fields(self):
+        return [(f.lstrip("-"), f.startswith("-")) for f in self.ordering]
+
+    def _parse_position(self, position):
+        opts = self.model._meta
+        return [opts.get_field(name).to_python(value) for (name, _), value in zip(self._fields(), position)]
+
+    def _position_of(self, obj):
+        opts = self.model._meta
+        values = []
+        for name, _ in self._fields():
+            # для FK курсор хранит id, а не объект
+            value = getattr(obj, opts.get_field(name).attname)
+            values.append(value.isoformat() if hasattr(value, "isoformat") else value)
+        return values
+
+    # --- запрос ---
+
+    def _keyset_q(self, position, reverse):
+        """
+        (a, b, c) > (x, y, z) в виде, который планировщик умеет гнать по индексу:
+        a >= x AND (a > x OR (a = x AND (b > y OR ...)))
+        """
+        fields = self._fields()
+        q = None
+        for (name, desc), value in reversed(list(zip(fields, position))):
+            op = "lt" if desc != reverse else "gt"
+            strict = Q(**{f"{name}__{op}": value})
+            q = strict if q is None else strict | (Q(**{name: value}) & q)
+        first_name, first_desc = fields[0]
+        first_op = "lte" if first_desc != reverse else "gte"
+        return Q(**{f"{first_name}__{first_op}": position[0]}) & q
+
+    def _order_by(self, reverse):
+        if not reverse:
+            return list(self.ordering)
+        return [f[1:] if f.startswith("-") else f"-{f}" for f in self.ordering]
+
+    def get_page_size(self, request):
+        raw = request.query_params.get(self.page_size_query_param)
+        if raw:
+            try:
+                value = int(raw)
+                if value > 0:
+                    return min(value, self.max_page_size)
+            except ValueError:
+                pass
+        return self.page_size
+
+    def _page_queryset(self, queryset, request):
+        self.request = request
+        self.model = queryset.model
+        self.page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        qs = queryset.order_by(*self._order_by(reverse))
+        if position is not None:
+            qs = qs.filter(self._keyset_q(position, reverse))
+        # +1 строка, чтобы понять, есть ли ещё страница, без COUNT(*)
+        return qs[: self.page_size + 1], position, reverse
+
+    def paginate_queryset(self, queryset, request, view=None):
+        qs, position, reverse = self._page_queryset(queryset, request)
+        return self._finish_page(list(qs), position, reverse)
+
+    async def apaginate_queryset(self, queryset, request):
+        """То же для async views (views_async.py): строки через async ORM."""
+        qs, position, reverse = self._page_queryset(queryset, request)
+        return self._finish_page([obj async for obj in qs], position, reverse)
+
+    def _finish_page(self, rows, position, reverse):
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if reverse:
+            rows.reverse()
+
+        if reverse:
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_previous, self.has_next = position is not None, has_more
+
+        self.first_position = self._position_of(rows[0]) if rows else None
+        self.last_position = self._position_of(rows[-1]) if rows else None
+        # пустая страница при движении назад/вперёд: оставляем курсор как был
+        if not rows and position is not None:
+            self.first_position = self.last_position = [
+                v.isoformat() if hasattr(v, "isoformat") else v for v in position
+            ]
+        return rows
+
+    # --- ответ ---
+
+    def _link(self, position, reverse):
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(position, reverse))
+
+    def get_next_link(self):
+        if not self.has_next or self.last_position is None:
+            return None
+        return self._link(self.last_position, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first_position is None:
+            return None
+        return self._link(self.first_position, reverse=True)
+
+    def get_paginated_data(self, data):
+        return {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class MatchCursorPagination(KeysetPagination):
+    ordering = ("match_date", "id")
+
+
+class TournamentCursorPagination(KeysetPagination):
+    ordering = ("-start_date", "-id")
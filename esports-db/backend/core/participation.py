@@ -0,0 +1,92 @@
+"""
+Поддержка TeamParticipation — индекса "команда участвовала в турнире".
+
+Источники участия: TournamentTeam и обе команды Match. Сигналы (signals.py)
+вызывают add/sync при записи источников, rebuild_participation() собирает
+индекс с нуля (команда rebuild_participation).
+"""
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Match, Team, Tournament, TournamentTeam, TeamParticipation
+from .response_cache import bump_models
+
+
+def add_participation(team_id, tournament_id, game_id=None):
+    if team_id is None or tournament_id is None:
+        return
+    if game_id is None:
+        game_id = Tournament.objects.filter(pk=tournament_id).values_list("game_id", flat=True).first()
+        if game_id is None:
+            return
+    TeamParticipation.objects.bulk_create(
+        [TeamParticipation(team_id=team_id, tournament_id=tournament_id, game_id=game_id)],
+        ignore_conflicts=True,
+    )
+
+
+def has_participation_source(team_id, tournament_id):
+    return (
+        TournamentTeam.objects.filter(team_id=team_id, tournament_id=tournament_id).exists()
+        or Match.objects.filter(tournament_id=tournament_id)
+        .filter(Q(team1_id=team_id) | Q(team2_id=team_id))
+        .exists()
+    )
+
+
+def sync_participation(team_id, tournament_id):
+    """
+    После удаления/смены источника: запись остаётся, только если участие
+    подтверждается чем-то ещё. Только удаляет — при каскадном удалении
+    турнира нельзя заново вставлять строки, ссылающиеся на него.
+    """
+    if team_id is None or tournament_id is None:
+        return
+    if not has_participation_source(team_id, tournament_id):
+        TeamParticipation.objects.filter(team_id=team_id, tournament_id=tournament_id).delete()
+
+
+def _source_pairs(tournament_ids=None):
+    tt = TournamentTeam.objects.all()
+    matches = Match.objects.all()
+    if tournament_ids is not None:
+        tt = tt.filter(tournament_id__in=tournament_ids)
+        matches = matches.filter(tournament_id__in=tournament_ids)
+
+    sources = [
+        tt.values_list("team_id", "tournament_id", "tournament__game_id"),
+        matches.values_list("team1_id", "tournament_id", "tournament__game_id"),
+        matches.values_list("team2_id", "tournament_id", "tournament__game_id"),
+    ]
+    for qs in sources:
+        yield from qs.iterator(chunk_size=5000)
+
+
+def rebuild_participation(tournament_ids=None, batch_size=5000):
+    """
+    Полная (или по списку турниров) пересборка индекса. Возвращает число записей.
+    """
+    seen = set()
+    batch = []
+    created = 0
+    with transaction.atomic():
+        old = TeamParticipation.objects.all()
+        if tournament_ids is not None:
+            old = old.filter(tournament_id__in=tournament_ids)
+        old.delete()
+
+        for team_id, tournament_id, game_id in _source_pairs(tournament_ids):
+            if team_id is None or (team_id, tournament_id) in seen:
+                continue
+            seen.add((team_id, tournament_id))
+            batch.append(TeamParticipation(team_id=team_id, tournament_id=tournament_id, game_id=game_id))
+            if len(batch) >= batch_size:
+                TeamParticipation.objects.bulk_create(batch, ignore_conflicts=True)
+                created += len(batch)
+                batch = []
+        if batch:
+            TeamParticipation.objects.bulk_create(batch, ignore_conflicts=True)
+            created += len(batch)
+
+    bump_models(Team)
+    return created
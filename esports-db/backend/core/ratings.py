@@ -0,0 +1,308 @@
+"""
+Рейтинг Эло команд, отдельно по каждой игре.
+
+Полный пересчёт (recompute_ratings, команда recompute_ratings) грузит
+историю результатов одним запросом в массивы NumPy и идёт по ней
+"волнами": в одну волну попадают матчи без общих команд, причём каждый
+матч стоит строго позже предыдущих матчей обеих своих команд. Внутри
+волны обновление векторное, а результат совпадает с последовательным
+проходом по времени.
+
+Новый результат, который для обеих команд позже всех уже учтённых,
+применяется за O(1): две строки TeamRating и две строки истории.
+Исправление или удаление результата, а также результат "из прошлого"
+пересчитывают рейтинг этой игры целиком — один раз на транзакцию
+(on_commit), чтобы каскадное удаление турнира не пересчитывало игру на
+каждый матч. Набор игр живёт в колбэке своей транзакции: откат уносит
+его вместе с колбэком.
+
+Импорт турнира (importing.py) пересчитывает игру не целиком, а с даты
+первого матча турнира (recompute_ratings_since): рейтинги на эту дату
+берутся из истории, заново проходятся только более поздние матчи.
+"""
+import numpy as np
+from django.db import transaction
+from django.db.models import Max, Q
+
+from .models import Match, MatchResult, TeamRating, TeamRatingHistory
+from .response_cache import bump_models
+
+INITIAL_RATING = 1500.0
+K_FACTOR = 32.0
+
+
+def expected(rating, opponent):
+    return 1.0 / (1.0 + 10.0 ** ((opponent - rating) / 400.0))
+
+
+def outcome(team1_id, team2_id, winner_id, score1, score2):
+    """Очки первой команды: 1 / 0.5 / 0. Без winner — по счёту."""
+    if winner_id is None and score1 != score2:
+        winner_id = team1_id if score1 > score2 else team2_id
+    if winner_id is None:
+        return 0.5
+    return 1.0 if winner_id == team1_id else 0.0
+
+
+def waves(idx1, idx2):
+    """
+    Номер волны для каждого матча (матчи уже по времени): на одну больше
+    последней волны любой из двух команд.
+    """
+    last = {}
+    result = np.empty(len(idx1), dtype=np.int64)
+    for i, (a, b) in enumerate(zip(idx1.tolist(), idx2.tolist())):
+        w = max(last.get(a, -1), last.get(b, -1)) + 1
+        result[i] = last[a] = last[b] = w
+    return result
+
+
+def elo_pass(idx1, idx2, score, n_keys, initial=INITIAL_RATING, k=K_FACTOR, start=None):
+    """
+    Векторный проход Эло. Возвращает (итоговые рейтинги по ключам,
+    рейтинг первой/второй команды до каждого матча, изменение для первой).
+    start — рейтинги по ключам до первого матча (по умолчанию initial).
+    """
+    if start is None:
+        ratings = np.full(n_keys, initial, dtype=np.float64)
+    else:
+        ratings = np.array(start, dtype=np.float64)
+    before1 = np.empty(len(idx1), dtype=np.float64)
+    before2 = np.empty(len(idx1), dtype=np.float64)
+    delta = np.empty(len(idx1), dtype=np.float64)
+    if not len(idx1):
+        return ratings, before1, before2, delta
+
+    wave = waves(idx1, idx2)
+    order = np.argsort(wave, kind="stable")
+    bounds = np.flatnonzero(np.diff(wave[order])) + 1
+    for chunk in np.split(order, bounds):
+        a, b = idx1[chunk], idx2[chunk]
+        ra, rb = ratings[a], ratings[b]
+        d = k * (score[chunk] - expected(ra, rb))
+        before1[chunk], before2[chunk], delta[chunk] = ra, rb, d
+        # в волне ключи не повторяются — fancy-индексация безопасна
+        ratings[a] = ra + d
+        ratings[b] = rb - d
+    return ratings, before1, before2, delta
+
+
+def _history(game_ids):
+    qs = MatchResult.objects.filter(match__team1__isnull=False, match__team2__isnull=False)
+    if game_ids is not None:
+        qs = qs.filter(match__tournament__game_id__in=game_ids)
+    return qs.order_by("match__match_date", "match_id").values_list(
+        "match_id", "match__tournament__game_id", "match__team1_id", "match__team2_id",
+        "match__match_date", "winner_id", "score_team1", "score_team2",
+    )
+
+
+def recompute_ratings(game_ids=None):
+    """Полный пересчёт (всех игр или только game_ids). Возвращает число матчей."""
+    rows = list(_history(game_ids).iterator(chunk_size=5000))
+
+    keys = {}  # (game_id, team_id) -> индекс в массиве рейтингов
+    idx1 = np.empty(len(rows), dtype=np.int64)
+    idx2 = np.empty(len(rows), dtype=np.int64)
+    score = np.empty(len(rows), dtype=np.float64)
+    for i, (_, game_id, t1, t2, _, winner_id, s1, s2) in enumerate(rows):
+        idx1[i] = keys.setdefault((game_id, t1), len(keys))
+        idx2[i] = keys.setdefault((game_id, t2), len(keys))
+        score[i] = outcome(t1, t2, winner_id, s1, s2)
+
+    ratings, before1, before2, delta = elo_pass(idx1, idx2, score, len(keys))
+    played = np.bincount(np.concatenate([idx1, idx2]), minlength=len(keys))
+
+    last_date = {}
+    history = []
+    for i, (match_id, game_id, t1, t2, played_at, *_) in enumerate(rows):
+        last_date[int(idx1[i])] = last_date[int(idx2[i])] = played_at
+        d = float(delta[i])
+        history += [
+            TeamRatingHistory(team_id=t1, opponent_id=t2, game_id=game_id, match_id=match_id, played_at=played_at,
+                              rating_before=float(before1[i]), rating_after=float(before1[i]) + d),
+            TeamRatingHistory(team_id=t2, opponent_id=t1, game_id=game_id, match_id=match_id, played_at=played_at,
+                              rating_before=float(before2[i]), rating_after=float(before2[i]) - d),
+        ]
+    current = [
+        TeamRating(team_id=team_id, game_id=game_id, rating=float(ratings[i]),
+                   matches=int(played[i]), last_match_date=last_date.get(i))
+        for (game_id, team_id), i in keys.items()
+    ]
+
+    with transaction.atomic():
+        for model in (TeamRating, TeamRatingHistory):
+            qs = model.objects.all()
+            if game_ids is not None:
+                qs = qs.filter(game_id__in=game_ids)
+            qs.delete()
+        TeamRating.objects.bulk_create(current, batch_size=2000)
+        TeamRatingHistory.objects.bulk_create(history, batch_size=2000)
+
+    bump_models(TeamRating)
+    return len(rows)
+
+
+def recompute_ratings_since(game_id, since):
+    """
+    Пересчёт игры начиная с матчей не раньше since: рейтинг команды на
+    since — rating_before её первой удаляемой строки истории (или текущий
+    рейтинг, если после since она не играла). Результат совпадает с полным
+    пересчётом, но цена зависит от числа матчей после since, а не от всей
+    истории игры. Возвращает число пересчитанных матчей.
+    """
+    old = (
+        TeamRatingHistory.objects.filter(game_id=game_id, played_at__gte=since)
+        .order_by("played_at", "match_id")
+        .values_list("team_id", "rating_before")
+    )
+    start, removed = {}, {}
+    for team_id, rating_before in old.iterator(chunk_size=5000):
+        start.setdefault(team_id, rating_before)
+        removed[team_id] = removed.get(team_id, 0) + 1
+
+    rows = list(_history([game_id]).filter(match__match_date__gte=since).iterator(chunk_size=5000))
+    teams = set(start)
+    for row in rows:
+        teams.update(row[2:4])
+    current = {
+        r.team_id: r for r in TeamRating.objects.filter(game_id=game_id, team_id__in=teams)
+    }
+    # последний матч до since нужен только тем, у кого удаляется история
+    last_before = dict(
+        TeamRatingHistory.objects.filter(game_id=game_id, team_id__in=list(removed), played_at__lt=since)
+        .values("team_id").annotate(last=Max("played_at")).values_list("team_id", "last")
+    )
+
+    keys = {team_id: i for i, team_id in enumerate(sorted(teams))}
+    initial = np.array([
+        start[t] if t in start else current[t].rating if t in current else INITIAL_RATING
+        for t in keys
+    ], dtype=np.float64)
+    idx1 = np.array([keys[r[2]] for r in rows], dtype=np.int64)
+    idx2 = np.array([keys[r[3]] for r in rows], dtype=np.int64)
+    score = np.array([outcome(r[2], r[3], *r[5:]) for r in rows], dtype=np.float64)
+    ratings, before1, before2, delta = elo_pass(idx1, idx2, score, len(keys), start=initial)
+    played = np.bincount(np.concatenate([idx1, idx2]), minlength=len(keys))
+
+    last_date = {}
+    history = []
+    for i, (match_id, _, t1, t2, played_at, *_) in enumerate(rows):
+        last_date[t1] = last_date[t2] = played_at
+        d = float(delta[i])
+        history += [
+            TeamRatingHistory(team_id=t1, opponent_id=t2, game_id=game_id, match_id=match_id, played_at=played_at,
+                              rating_before=float(before1[i]), rating_after=float(before1[i]) + d),
+            TeamRatingHistory(team_id=t2, opponent_id=t1, game_id=game_id, match_id=match_id, played_at=played_at,
+                              rating_before=float(before2[i]), rating_after=float(before2[i]) - d),
+        ]
+
+    updated, emptied = [], []
+    for team_id, i in keys.items():
+        row = current.get(team_id)
+        matches = (row.matches if row else 0) - removed.get(team_id, 0) + int(played[i])
+        if not matches:
+            emptied.append(team_id)
+            continue
+        if team_id in last_date:
+            last = last_date[team_id]
+        elif team_id in removed:
+            last = last_before.get(team_id)
+        else:
+            last = row.last_match_date
+        updated.append(TeamRating(team_id=team_id, game_id=game_id, rating=float(ratings[i]),
+                                  matches=matches, last_match_date=last))
+
+    with transaction.atomic():
+        TeamRatingHistory.objects.filter(game_id=game_id, played_at__gte=since).delete()
+        TeamRatingHistory.objects.bulk_create(history, batch_size=2000)
+        TeamRating.objects.filter(game_id=game_id, team_id__in=emptied).delete()
+        TeamRating.objects.bulk_create(
+            updated, batch_size=2000, update_conflicts=True,
+            unique_fields=["team", "game"], update_fields=["rating", "matches", "last_match_date"],
+        )
+
+    bump_models(TeamRating)
+    return len(rows)
+
+
+def _is_latest(game_id, team_ids, played_at, match_id):
+    later = TeamRatingHistory.objects.filter(game_id=game_id, team_id__in=team_ids).filter(
+        Q(played_at__gt=played_at) | Q(played_at=played_at, match_id__gt=match_id)
+    )
+    return not later.exists()
+
+
+def apply_result(match_id, result):
+    """O(1)-обновление для нового результата. False — нужен пересчёт игры."""
+    info = (
+        Match.objects.filter(pk=match_id)
+        .values_list("tournament__game_id", "team1_id", "team2_id", "match_date")
+        .first()
+    )
+    if info is None or info[1] is None or info[2] is None:
+        return True
+    game_id, t1, t2, played_at = info
+    if not _is_latest(game_id, (t1, t2), played_at, match_id):
+        return False
+
+    s = outcome(t1, t2, result["winner_id"], result["score_team1"], result["score_team2"])
+    with transaction.atomic():
+        r1, _ = TeamRating.objects.select_for_update().get_or_create(
+            team_id=t1, game_id=game_id, defaults={"rating": INITIAL_RATING}
+        )
+        r2, _ = TeamRating.objects.select_for_update().get_or_create(
+            team_id=t2, game_id=game_id, defaults={"rating": INITIAL_RATING}
+        )
+        d = K_FACTOR * (s - expected(r1.rating, r2.rating))
+        TeamRatingHistory.objects.bulk_create([
+            TeamRatingHistory(team_id=t1, opponent_id=t2, game_id=game_id, match_id=match_id, played_at=played_at,
+                              rating_before=r1.rating, rating_after=r1.rating + d),
+            TeamRatingHistory(team_id=t2, opponent_id=t1, game_id=game_id, match_id=match_id, played_at=played_at,
+                              rating_before=r2.rating, rating_after=r2.rating - d),
+        ])
+        for row, change in ((r1, d), (r2, -d)):
+            row.rating += change
+            row.matches += 1
+            row.last_match_date = played_at
+            row.save(update_fields=["rating", "matches", "last_match_date"])
+    return True
+
+
+class _PendingRecompute:
+    """Колбэк on_commit одной транзакции со своим набором игр."""
+
+    def __init__(self):
+        self.games = set()
+
+    def __call__(self):
+        recompute_ratings(sorted(self.games))
+
+
+def schedule_recompute(game_id):
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        recompute_ratings([game_id])
+        return
+    pending = getattr(connection, "_ratings_pending", None)
+    # после коммита или отката (в т.ч. savepoint'а) колбэка в очереди уже нет
+    if pending is None or not any(func is pending for _, func, _ in connection.run_on_commit):
+        pending = connection._ratings_pending = _PendingRecompute()
+        transaction.on_commit(pending)
+    pending.games.add(game_id)
+
+
+def on_result_change(match_id, before, after):
+    """before/after — dict(winner_id, score_team1, score_team2) или None."""
+    if before == after:
+        return
+    if after is None:
+        # история удалённого результата уходит сразу: новый результат того же
+        # матча до пересчёта (в этой же транзакции) упёрся бы в unique (match, team)
+        TeamRatingHistory.objects.filter(match_id=match_id).delete()
+    if before is None and apply_result(match_id, after):
+        bump_models(TeamRating)
+        return
+    game_id = Match.objects.filter(pk=match_id).values_list("tournament__game_id", flat=True).first()
+    if game_id is not None:
+        schedule_recompute(game_id)
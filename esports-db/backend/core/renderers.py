@@ -0,0 +1,45 @@
+"""
+Быстрый JSON-рендерер для DRF на orjson.
+
+Выдача совпадает с rest_framework.renderers.JSONRenderer байт в байт:
+datetime через тот же encoder (UTC -> "Z"), Decimal -> число, ленивые
+строки, \\u2028/\\u2029 экранируются. orjson нет, запрошен отступ
+(?format=api, "application/json; indent=4") или данные ему не по силам
+(целые больше 64 бит) — рендерит стандартный JSONRenderer.
+
+Сравнение по эндпоинтам: manage.py bench_responses.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # необязательная зависимость
+    orjson = None
+
+# datetime отдаём encoder'у DRF: orjson пишет UTC как "+00:00", DRF — "Z"
+_OPTIONS = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson else 0
+_default = JSONEncoder().default
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_default, option=_OPTIONS)
+        except TypeError:  # orjson.JSONEncodeError
+            return super().render(data, accepted_media_type, renderer_context)
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+
+_renderer = FastJSONRenderer()
+
+
+def render_json(data):
+    """bytes для HttpResponse вне DRF-view (views_async.py)."""
+    return _renderer.render(data)
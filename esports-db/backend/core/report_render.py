@@ -0,0 +1,41 @@
+"""
+Отрисовка PNG для generate_reports. Выполняется в процессах пула, поэтому
+модуль не трогает Django и БД: на входе CSV, на выходе картинка.
+"""
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import pandas as pd  # noqa: E402
+
+
+def render_chart(csv_path, png_path, chart):
+    """
+    chart: {"kind": "bar" | "line" | "pivot_bar", "x", "y", "series", "top", "title"}
+    """
+    df = pd.read_csv(csv_path)
+    top = chart.get("top")
+    x, y = chart["x"], chart["y"]
+
+    fig, ax = plt.subplots(figsize=(10, 5))
+    if chart["kind"] == "pivot_bar":
+        table = df.pivot_table(index=x, columns=chart["series"], values=y, aggfunc="sum", fill_value=0)
+        if top:
+            table = table.loc[table.sum(axis=1).nlargest(top).index]
+        table.plot(kind="bar", ax=ax)
+    else:
+        if top:
+            df = df.nlargest(top, y)
+        if chart["kind"] == "line":
+            ax.plot(df[x].astype(str), df[y], marker="o")
+        else:
+            ax.bar(df[x].astype(str), df[y])
+
+    ax.set_title(chart.get("title", ""))
+    ax.set_ylabel(y)
+    plt.setp(ax.get_xticklabels(), rotation=30, ha="right")
+    fig.tight_layout()
+    fig.savefig(png_path, dpi=150)
+    plt.close(fig)
+    return str(png_path)
@@ -0,0 +1,237 @@
+"""
+Реестр аналитических отчётов для команды generate_reports.
+
+Каждый отчёт — запрос (values_list), таблицы-источники и описание
+графика. Запуск:
+1) по каждой таблице-источнику — один агрегат (count + max pk); если он
+   совпал с манифестом прошлого запуска и файлы на месте, отчёт
+   пропускается без выгрузки;
+2) иначе строки читаются через .iterator() — на PostgreSQL это серверный
+   курсор, в память процесса попадает не больше chunk_size строк — и сразу
+   пишутся во временный CSV, попутно считается sha256 данных; совпал
+   sha256 — PNG не перерисовывается;
+3) PNG рисуются в пуле процессов (core/report_render.py, без Django).
+
+Правку строки на месте (без вставки/удаления) count + max pk не видит —
+такие отчёты перестраиваются с --force.
+"""
+import csv
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from django.db.models import Count, Max, Sum
+from django.db.models.functions import ExtractYear, TruncMonth
+from django.utils import timezone
+
+from .models import Game, Match, Team, TeamParticipation, Tournament
+from .report_render import render_chart
+
+MANIFEST_NAME = ".manifest.json"
+CHUNK_SIZE = 2000
+
+
+@dataclass
+class Report:
+    name: str
+    columns: list
+    query: object  # callable -> QuerySet.values_list(...)
+    sources: tuple = ()  # модели, из которых читает query
+    chart: dict = field(default_factory=dict)
+    # меняется вместе с запросом/графиком — старый отпечаток становится недействительным
+    version: int = 1
+
+
+REPORTS = {}
+
+
+def register(report):
+    REPORTS[report.name] = report
+    return report
+
+
+register(Report(
+    name="tournaments_by_game",
+    columns=["game", "tournaments_count"],
+    query=lambda: (
+        Tournament.objects.values("game__title")
+        .annotate(n=Count("id"))
+        .order_by("-n", "game__title")
+        .values_list("game__title", "n")
+    ),
+    sources=(Tournament, Game),
+    chart={"kind": "bar", "x": "game", "y": "tournaments_count", "title": "Турниры по играм"},
+))
+
+register(Report(
+    name="teams_by_country",
+    columns=["country", "teams_count"],
+    query=lambda: (
+        Team.objects.values("country")
+        .annotate(n=Count("id"))
+        .order_by("-n", "country")
+        .values_list("country", "n")
+    ),
+    sources=(Team,),
+    chart={"kind": "bar", "x": "country", "y": "teams_count", "top": 25, "title": "Команды по странам"},
+))
+
+register(Report(
+    name="prize_pool_by_game_year",
+    columns=["year", "game", "prize_pool"],
+    query=lambda: (
+        Tournament.objects.annotate(year=ExtractYear("start_date"))
+        .values("year", "game__title")
+        .annotate(total=Sum("prize_pool"))
+        .order_by("year", "game__title")
+        .values_list("year", "game__title", "total")
+    ),
+    sources=(Tournament, Game),
+    chart={"kind": "pivot_bar", "x": "year", "series": "game", "y": "prize_pool",
+           "title": "Призовой фонд по играм и годам"},
+))
+
+register(Report(
+    name="matches_per_month",
+    columns=["month", "matches_count"],
+    query=lambda: (
+        Match.objects.annotate(month=TruncMonth("match_date"))
+        .values("month")
+        .annotate(n=Count("id"))
+        .order_by("month")
+        .values_list("month", "n")
+    ),
+    sources=(Match,),
+    chart={"kind": "line", "x": "month", "y": "matches_count", "title": "Матчи по месяцам"},
+))
+
+register(Report(
+    name="participation",
+    columns=["team", "country", "tournaments_count", "games_count"],
+    query=lambda: (
+        TeamParticipation.objects.values("team_id")
+        .annotate(tournaments=Count("tournament_id"), games=Count("game_id", distinct=True))
+        .order_by("-tournaments", "team__name")
+        .values_list("team__name", "team__country", "tournaments", "games")
+    ),
+    sources=(TeamParticipation, Team),
+    chart={"kind": "bar", "x": "team", "y": "tournaments_count", "top": 30,
+           "title": "Участие команд в турнирах (топ-30)"},
+))
+
+
+def _cell(value):
+    # даты/месяцы — ISO; Decimal csv сам запишет без потери точности
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def source_state(report):
+    """Дешёвый отпечаток источников: [label, count, max pk] по каждой таблице."""
+    state = []
+    for model in report.sources:
+        agg = model.objects.aggregate(n=Count("pk"), last=Max("pk"))
+        state.append([model._meta.label, agg["n"], agg["last"]])
+    return state
+
+
+def export_rows(report, csv_path):
+    """Пишет CSV потоково, возвращает (sha256, число строк)."""
+    digest = hashlib.sha256(f"{report.name}:{report.version}".encode())
+    rows = 0
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(report.columns)
+        for row in report.query().iterator(chunk_size=CHUNK_SIZE):
+            row = [_cell(v) for v in row]
+            writer.writerow(row)
+            digest.update(repr(row).encode())
+            rows += 1
+    return digest.hexdigest(), rows
+
+
+def load_manifest(out_dir):
+    try:
+        return json.loads((out_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_manifest(out_dir, manifest):
+    tmp = out_dir / f"{MANIFEST_NAME}.tmp"
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, out_dir / MANIFEST_NAME)
+
+
+def generate_reports(out_dir, names=None, force=False, workers=None, log=print):
+    """
+    Возвращает {"rendered": [...], "skipped": [...]}.
+    workers=0 — рисовать в текущем процессе (тесты, отладка).
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    names = names or list(REPORTS)
+    unknown = [n for n in names if n not in REPORTS]
+    if unknown:
+        raise KeyError(f"unknown reports: {', '.join(unknown)}")
+
+    manifest = load_manifest(out_dir)
+    jobs = []
+    fresh = {}
+    skipped = []
+    for name in names:
+        report = REPORTS[name]
+        csv_path, png_path = out_dir / f"{name}.csv", out_dir / f"{name}.png"
+        tmp_path = out_dir / f".{name}.csv.tmp"
+
+        previous = manifest.get(name, {})
+        sources = source_state(report)
+        on_disk = csv_path.exists() and png_path.exists()
+        if not force and on_disk and previous.get("version") == report.version and previous.get("sources") == sources:
+            skipped.append(name)
+            log(f"{name}: sources unchanged, skipped")
+            continue
+
+        fingerprint, rows = export_rows(report, tmp_path)
+        if not force and on_disk and previous.get("fingerprint") == fingerprint:
+            # источники менялись, но не в этом срезе — запоминаем новое состояние
+            tmp_path.unlink()
+            manifest[name] = {**previous, "sources": sources, "version": report.version}
+            skipped.append(name)
+            log(f"{name}: unchanged, skipped")
+            continue
+
+        os.replace(tmp_path, csv_path)
+        fresh[name] = {
+            "fingerprint": fingerprint,
+            "sources": sources,
+            "version": report.version,
+            "rows": rows,
+            "generated_at": timezone.now().isoformat(),
+        }
+        jobs.append((name, str(csv_path), str(png_path), report.chart))
+
+    rendered = []
+    try:
+        if workers == 0 or not jobs:
+            for name, csv_path, png_path, chart in jobs:
+                render_chart(csv_path, png_path, chart)
+                rendered.append(name)
+                log(f"{name}: rendered")
+        else:
+            with ProcessPoolExecutor(max_workers=workers or min(len(jobs), os.cpu_count() or 1)) as pool:
+                futures = [(name, pool.submit(render_chart, *args)) for name, *args in jobs]
+                for name, future in futures:
+                    future.result()
+                    rendered.append(name)
+                    log(f"{name}: rendered")
+    finally:
+        # в манифест — только отрисованные: упавший отчёт перерисуется в следующий раз
+        for name in rendered:
+            manifest[name] = fresh[name]
+        save_manifest(out_dir, manifest)
+    return {"rendered": rendered, "skipped": skipped}
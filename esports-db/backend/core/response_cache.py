@@ -0,0 +1,446 @@
+"""
+Кэш готовых ответов для read-only эндпоинтов.
+
+Ключ = эндпоинт + query-параметры + Accept + "поколения" моделей, от которых
+зависит выдача. Поколение модели увеличивается сигналами post_save/post_delete
+(см. signals.py), поэтому после записи старые ключи просто перестают
+совпадать — ручной инвалидации нет, а TTL есть только у locmem и только
+если его включить (см. ниже).
+
+Те же поколения дают ETag/Last-Modified (условные GET): ETag — это ключ кэша,
+Last-Modified — время последнего изменения меток. Если клиент прислал
+совпадающий If-None-Match, отвечаем 304, не трогая ни БД, ни сериализаторы.
+
+Кроме меток моделей есть метки отдельного турнира (tournament_scope): их
+двигают записи в сам турнир, его участников, матчи, результаты и таблицу —
+страница одного турнира не сбрасывается из-за матча в другом.
+
+Бэкенды:
+- locmem — OrderedDict в памяти процесса (LRU). Поколения тоже в памяти:
+  запись двигает их только в воркере, который её обработал, поэтому
+  locmem — для одного воркера (runserver, один процесс uvicorn). С TTL
+  (по умолчанию выключен) чужая запись видна не позже чем через TTL
+  секунд, ценой смены ключей и ETag раз в TTL;
+- file   — файлы в каталоге, LRU по mtime; поколения — тоже файлы, общие
+  для всех воркеров. Для нескольких воркеров нужен он.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from itertools import count
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+
+
+class CacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.evictions = 0
+
+    def incr(self, name, n=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + n)
+
+    def as_dict(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "sets": self.sets,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class LocMemBackend:
+    name = "locmem"
+    blocking_io = False
+
+    def __init__(self, max_entries=2000, ttl=None, **kwargs):
+        self.max_entries = max_entries
+        # поколение старше ttl секунд считается сдвинутым: так запись из
+        # другого воркера видна не позже чем через ttl (None — без TTL)
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+        # метка процесса: поколения разных воркеров не должны совпадать,
+        # иначе ETag одного процесса "подойдёт" к данным другого
+        self._boot = f"{os.getpid():x}{time.time_ns():x}"
+        self._boot_time = time.time()
+        self._stamps = {}
+        self._counter = count(1)
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+        self.stats.incr("hits" if value is not None else "misses")
+        return value
+
+    def set(self, key, value):
+        evicted = 0
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                evicted += 1
+        self.stats.incr("sets")
+        if evicted:
+            self.stats.incr("evictions", evicted)
+
+    def get_stamp(self, label):
+        """
+        (поколение, время изменения). Для меток без записей с момента старта
+        считаем временем изменения старт процесса.
+        """
+        stamp = self._stamps.get(label) or (f"{self._boot}.0", self._boot_time)
+        if self.ttl is not None and time.time() - stamp[1] >= self.ttl:
+            self.bump_generation(label)
+            stamp = self._stamps[label]
+        return stamp
+
+    def bump_generation(self, label):
+        # глобальный счётчик: после bump поколение гарантированно новое,
+        # даже если тот же label уже встречался с тем же значением
+        self._stamps[label] = (f"{self._boot}.{next(self._counter)}", time.time())
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class FileBackend:
+    """
+    Ответы — отдельные файлы в LOCATION/entries, поколения — LOCATION/generations.
+    Запись атомарная (tmp + os.replace), поэтому бэкенд можно делить между
+    процессами. LRU: чтение обновляет mtime, при переполнении удаляются самые
+    старые файлы. Скан каталога — O(числа файлов), поэтому переполнение
+    проверяется раз в cull_every записей процесса (по умолчанию — сколько
+    удаляет одна чистка): каталог может ненадолго превысить max_entries.
+    """
+    name = "file"
+    # чтение/запись файлов: из async-кода — в потоке (cached_async)
+    blocking_io = True
+
+    def __init__(self, location, max_entries=2000, cull_fraction=0.1, cull_every=None, **kwargs):
+        self.location = Path(location)
+        self.entries_dir = self.location / "entries"
+        self.generations_dir = self.location / "generations"
+        self.entries_dir.mkdir(parents=True, exist_ok=True)
+        self.generations_dir.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.cull_fraction = cull_fraction
+        self.cull_every = cull_every or max(int(max_entries * cull_fraction), 1)
+        self._sets = count(1)
+        self.stats = CacheStats()
+
+    def _entry_path(self, key):
+        return self.entries_dir / f"{key}.cache"
+
+    @staticmethod
+    def _atomic_write(path, data: bytes):
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def get(self, key):
+        path = self._entry_path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            os.utime(path)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            value = None
+        self.stats.incr("hits" if value is not None else "misses")
+        return value
+
+    def set(self, key, value):
+        self._atomic_write(self._entry_path(key), pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        self.stats.incr("sets")
+        if next(self._sets) % self.cull_every == 0:
+            self._cull()
+
+    def _cull(self):
+        entries = list(os.scandir(self.entries_dir))
+        if len(entries) <= self.max_entries:
+            return
+
+        def mtime(entry):
+            try:
+                return entry.stat().st_mtime
+            except FileNotFoundError:
+                return 0
+
+        entries.sort(key=mtime)
+        target = int(self.max_entries * (1 - self.cull_fraction))
+        evicted = 0
+        for entry in entries[: len(entries) - target]:
+            try:
+                os.remove(entry.path)
+                evicted += 1
+            except FileNotFoundError:
+                pass
+        self.stats.incr("evictions", evicted)
+
+    def get_stamp(self, label):
+        path = self.generations_dir / label
+        try:
+            generation = path.read_text()
+        except FileNotFoundError:
+            # метка ещё не создавалась: заводим её сейчас, чтобы Last-Modified
+            # не оказался раньше изменений, сделанных до появления кэша
+            self.bump_generation(label)
+            generation = path.read_text()
+        return generation, int(generation.split("-", 1)[0], 16) / 1e9
+
+    def bump_generation(self, label):
+        # вместо read-modify-write пишем уникальное значение (время + pid):
+        # атомарно, без блокировок между процессами, и из него же читается время
+        self._atomic_write(self.generations_dir / label, f"{time.time_ns():x}-{os.getpid()}".encode())
+
+    def clear(self):
+        for entry in os.scandir(self.entries_dir):
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+
+BACKENDS = {
+    LocMemBackend.name: LocMemBackend,
+    FileBackend.name: FileBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_response_cache():
+    """
+    Текущий бэкенд по settings.RESPONSE_CACHE или None, если кэш выключен.
+    """
+    global _backend
+    conf = getattr(settings, "RESPONSE_CACHE", {})
+    if not conf.get("ENABLED", True):
+        return None
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                backend_cls = BACKENDS[conf.get("BACKEND", "locmem")]
+                _backend = backend_cls(
+                    location=conf.get("LOCATION", Path(settings.BASE_DIR) / "cache" / "responses"),
+                    max_entries=conf.get("MAX_ENTRIES", 2000),
+                    ttl=conf.get("TTL"),
+                )
+    return _backend
+
+
+@receiver(setting_changed)
+def _reset_backend(setting, **kwargs):
+    global _backend
+    if setting == "RESPONSE_CACHE":
+        _backend = None
+
+
+def model_label(model):
+    return model._meta.label_lower
+
+
+def bump_generation(*labels):
+    """
+    Инвалидирует все ответы, зависящие от перечисленных меток (label модели
+    или произвольная метка). Увеличиваем сразу и ещё раз после коммита:
+    иначе параллельный GET между записью и коммитом закэширует старые данные
+    под новым поколением.
+    """
+    backend = get_response_cache()
+    if backend is None:
+        return
+
+    def _bump():
+        for label in labels:
+            backend.bump_generation(label)
+
+    _bump()
+    transaction.on_commit(_bump)
+
+
+def bump_models(*models):
+    bump_generation(*(model_label(m) for m in models))
+
+
+def tournament_scope(tournament_id):
+    return f"core.tournament-{tournament_id}"
+
+
+def tournament_scopes(tournament_id, *models):
+    """
+    Метка турнира + метки models или None, если id — не целое число.
+
+    id из URL/query приводим к int: ?tournament=01 должен попадать в ту же
+    метку, что двигает запись в турнир 1, а мусор не должен плодить метки.
+    """
+    try:
+        tournament_id = int(tournament_id)
+    except (TypeError, ValueError):
+        return None
+    return [tournament_scope(tournament_id), *(model_label(m) for m in models)]
+
+
+def cache_key(request, stamps):
+    query = sorted(request.GET.lists())
+    generations = [f"{label}={generation}" for label, (generation, _) in sorted(stamps.items())]
+    raw = "|".join([
+        request.path,
+        repr(query),
+        request.META.get("HTTP_ACCEPT", ""),
+        ",".join(generations),
+    ])
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _not_modified(request, etag, last_modified):
+    if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+    if if_none_match:
+        # для If-None-Match сравнение слабое: W/"x" == "x"
+        tags = [t.removeprefix("W/") for t in parse_etags(if_none_match)]
+        return "*" in tags or etag in tags
+    since = parse_http_date_safe(request.META.get("HTTP_IF_MODIFIED_SINCE", ""))
+    return since is not None and int(last_modified) <= since
+
+
+def _lookup(backend, request, scopes, key_func=cache_key):
+    """
+    (key, etag, last_modified, готовый ответ или None). Ключ считаем ДО
+    выполнения запроса: если запись случится во время обработки, ответ
+    ляжет под старое поколение и больше не прочитается.
+    """
+    stamps = {label: backend.get_stamp(label) for label in scopes}
+    key = key_func(request, stamps)
+    etag = quote_etag(key)
+    last_modified = max((modified for _, modified in stamps.values()), default=time.time())
+
+    if _not_modified(request, etag, last_modified):
+        response = HttpResponseNotModified()
+        response["X-Cache"] = "NOT-MODIFIED"
+        return key, etag, last_modified, response
+    cached = backend.get(key)
+    if cached is None:
+        return key, etag, last_modified, None
+    status_code, headers, content = cached
+    response = HttpResponse(content, status=status_code)
+    for name, value in headers:
+        response[name] = value
+    response["X-Cache"] = "HIT"
+    return key, etag, last_modified, response
+
+
+def _store(backend, key, response, cached_headers=()):
+    headers = [("Content-Type", response["Content-Type"])]
+    headers += [(h, response[h]) for h in cached_headers if response.has_header(h)]
+    backend.set(key, (response.status_code, headers, response.content))
+    response["X-Cache"] = "MISS"
+
+
+def _finalize(response, etag, last_modified):
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    # браузер обязан перепроверять, но может слать условный запрос
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+class CachedReadMixin:
+    """
+    Mixin для ViewSet: кэширует успешные JSON-ответы на GET и отвечает 304
+    на If-None-Match / If-Modified-Since.
+
+    cache_models — модели, изменение которых должно сбрасывать выдачу
+    (включая связанные: имена команд в матчах, игру в турнире и т.п.).
+    Более узкие метки для конкретного запроса — через get_cache_scopes().
+    """
+    cache_models = ()
+    cached_media_type = "application/json"
+    # заголовки, которые сохраняем вместе с телом
+    cached_headers = ("Allow", "Vary")
+
+    def get_cache_action(self, request):
+        # self.action DRF выставит позже, в initialize_request()
+        return getattr(self, "action_map", {}).get(request.method.lower())
+
+    def get_cache_scopes(self, request):
+        return [model_label(m) for m in self.cache_models]
+
+    def get_related_cache_scopes(self, request):
+        """Метки моделей, которые в выдачу добавили параметры запроса (?expand=)."""
+        return []
+
+    def get_cache_key(self, request, stamps):
+        return cache_key(request, stamps)
+
+    def dispatch(self, request, *args, **kwargs):
+        backend = get_response_cache()
+        if backend is None or request.method != "GET":
+            return super().dispatch(request, *args, **kwargs)
+
+        scopes = [*self.get_cache_scopes(request), *self.get_related_cache_scopes(request)]
+        key, etag, last_modified, response = _lookup(backend, request, scopes, self.get_cache_key)
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)
+            if (
+                response.status_code != 200
+                or getattr(response, "accepted_media_type", None) != self.cached_media_type
+            ):
+                return response
+            response.render()
+            _store(backend, key, response, self.cached_headers)
+        return _finalize(response, etag, last_modified)
+
+
+async def cached_async(request, scopes, build):
+    """
+    То же, что CachedReadMixin, для async views (views_async.py): build() —
+    корутина, возвращающая HttpResponse с JSON. locmem — словарь в памяти,
+    его вызываем прямо в event loop; file читает и пишет диск, поэтому его
+    вызовы уходят в поток, чтобы не блокировать остальные соединения.
+    """
+    backend = get_response_cache()
+    if backend is None:
+        return await build()
+    key, etag, last_modified, response = await _backend_call(backend, _lookup, backend, request, scopes)
+    if response is None:
+        response = await build()
+        if response.status_code != 200:
+            return response
+        await _backend_call(backend, _store, backend, key, response)
+    return _finalize(response, etag, last_modified)
+
+
+async def _backend_call(backend, func, *args):
+    if backend.blocking_io:
+        return await sync_to_async(func, thread_sensitive=False)(*args)
+    return func(*args)
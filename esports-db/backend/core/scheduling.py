@@ -0,0 +1,237 @@
+"""
+Генерация расписания турнира из заявленных команд (TournamentTeam).
+
+single_elimination — полная сетка на выбывание: размер дополняется до
+степени двойки, свободные места (bye) достаются сильнейшим посевам, и они
+сразу стоят во втором раунде. Матчи следующих раундов создаются с пустыми
+командами и ссылкой next_match/next_match_slot; победитель подставляется
+туда автоматически при сохранении результата (advance_winner, signals.py).
+
+round_robin — круговая система методом "карусели": каждый с каждым,
+n-1 тур (n при нечётном числе команд), в туре у каждой команды один матч.
+
+Всё создаётся в одной транзакции через bulk_create (по одному INSERT на
+раунд сетки / один на весь круг), поэтому сигналы не срабатывают —
+кэш ответов сбрасываем явно.
+"""
+import random
+from datetime import datetime, time as dt_time, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Match, MatchResult, TournamentTeam
+from .response_cache import bump_generation, bump_models, tournament_scope
+
+FORMATS = ("single_elimination", "round_robin")
+
+
+class ScheduleError(ValueError):
+    pass
+
+
+def seed_order(size):
+    """
+    Номера посевов по позициям сетки: 1 и 2 встречаются только в финале.
+    size=8 -> [1, 8, 4, 5, 2, 7, 3, 6]
+    """
+    order = [1]
+    while len(order) < size:
+        total = len(order) * 2 + 1
+        order = [s for seed in order for s in (seed, total - seed)]
+    return order
+
+
+def round_name(matches_in_round):
+    if matches_in_round == 1:
+        return "Финал"
+    return f"1/{matches_in_round}"
+
+
+def entrants(tournament, seeding=None, rng_seed=None):
+    """
+    Список team_id по посевам.
+    seeding: None — порядок заявки, "random" — жребий, список id — явный
+    посев (незаявленные команды — ошибка, неуказанные идут следом по заявке).
+    """
+    registered = list(
+        TournamentTeam.objects.filter(tournament=tournament).order_by("id").values_list("team_id", flat=True)
+    )
+    if seeding is None:
+        return registered
+    if seeding == "random":
+        shuffled = registered[:]
+        random.Random(rng_seed).shuffle(shuffled)
+        return shuffled
+    if isinstance(seeding, (list, tuple)):
+        seeded = []
+        for team_id in seeding:
+            if team_id not in registered:
+                raise ScheduleError(f"team {team_id} is not registered in the tournament")
+            if team_id in seeded:
+                raise ScheduleError(f"team {team_id} is seeded twice")
+            seeded.append(team_id)
+        return seeded + [t for t in registered if t not in seeded]
+    raise ScheduleError("seeding must be a list of team ids or 'random'")
+
+
+def default_start(tournament):
+    return timezone.make_aware(datetime.combine(tournament.start_date, dt_time(12, 0)))
+
+
+def _clear_generated(tournament, replace):
+    generated = Match.objects.filter(tournament=tournament, bracket_round__isnull=False)
+    if not generated.exists():
+        return
+    if not replace:
+        raise ScheduleError("schedule already generated (pass replace to regenerate)")
+    if MatchResult.objects.filter(match__in=generated).exists():
+        raise ScheduleError("generated matches already have results")
+    generated.delete()
+
+
+def generate_single_elimination(tournament, teams, start, round_interval, match_interval=timedelta(0), replace=False):
+    if len(teams) < 2:
+        raise ScheduleError("need at least 2 teams")
+
+    size = 1
+    while size < len(teams):
+        size *= 2
+    rounds = size.bit_length() - 1
+
+    slots = [teams[seed - 1] if seed <= len(teams) else None for seed in seed_order(size)]
+    first = [(slots[2 * i], slots[2 * i + 1]) for i in range(size // 2)]
+
+    # bye: команда без соперника сразу стоит во втором раунде
+    prefilled = {}
+    for pos, (team1_id, team2_id) in enumerate(first):
+        if team1_id is None or team2_id is None:
+            prefilled[(pos // 2, pos % 2 + 1)] = team1_id or team2_id
+
+    created = 0
+    with transaction.atomic():
+        _clear_generated(tournament, replace)
+
+        # от финала к первому раунду: у next_match уже есть pk
+        next_round = []
+        for r in range(rounds, 0, -1):
+            count = size >> r
+            round_start = start + round_interval * (r - 1)
+            matches = []
+            for pos in range(count):
+                if r == 1:
+                    team1_id, team2_id = first[pos]
+                    if team1_id is None or team2_id is None:
+                        continue
+                elif r == 2:
+                    team1_id, team2_id = prefilled.get((pos, 1)), prefilled.get((pos, 2))
+                else:
+                    team1_id = team2_id = None
+                matches.append(Match(
+                    tournament=tournament,
+                    team1_id=team1_id,
+                    team2_id=team2_id,
+                    match_date=round_start + match_interval * len(matches),
+                    round=round_name(count),
+                    status="scheduled",
+                    bracket_round=r,
+                    bracket_position=pos + 1,
+                    next_match=next_round[pos // 2] if next_round else None,
+                    next_match_slot=pos % 2 + 1 if next_round else None,
+                ))
+            Match.objects.bulk_create(matches)
+            created += len(matches)
+            next_round = matches
+
+    _schedule_changed(tournament)
+    return {"format": "single_elimination", "teams": len(teams), "rounds": rounds, "matches": created}
+
+
+def generate_round_robin(tournament, teams, start, round_interval, match_interval=timedelta(0), replace=False):
+    if len(teams) < 2:
+        raise ScheduleError("need at least 2 teams")
+
+    ids = list(teams)
+    if len(ids) % 2:
+        ids.append(None)  # в каждом туре одна команда отдыхает
+    n = len(ids)
+
+    matches = []
+    for k in range(n - 1):
+        round_start = start + round_interval * k
+        position = 0
+        for i in range(n // 2):
+            team1_id, team2_id = ids[i], ids[n - 1 - i]
+            if team1_id is None or team2_id is None:
+                continue
+            # чередуем, кто записан первым, чтобы у "неподвижной" команды не было перекоса
+            if (k + i) % 2:
+                team1_id, team2_id = team2_id, team1_id
+            position += 1
+            matches.append(Match(
+                tournament=tournament,
+                team1_id=team1_id,
+                team2_id=team2_id,
+                match_date=round_start + match_interval * (position - 1),
+                round=f"Тур {k + 1}",
+                status="scheduled",
+                bracket_round=k + 1,
+                bracket_position=position,
+            ))
+        ids = [ids[0], ids[-1]] + ids[1:-1]
+
+    with transaction.atomic():
+        _clear_generated(tournament, replace)
+        Match.objects.bulk_create(matches, batch_size=1000)
+
+    _schedule_changed(tournament)
+    return {"format": "round_robin", "teams": len(teams), "rounds": n - 1, "matches": len(matches)}
+
+
+def _schedule_changed(tournament):
+    # bulk_create мимо сигналов; участие не меняется — в матчах только заявленные команды
+    bump_models(Match)
+    bump_generation(tournament_scope(tournament.pk))
+
+
+def generate_schedule(tournament, fmt, seeding=None, start=None, round_interval=timedelta(days=1),
+                      match_interval=timedelta(0), replace=False, rng_seed=None):
+    if fmt not in FORMATS:
+        raise ScheduleError(f"unknown format {fmt!r}, expected one of {', '.join(FORMATS)}")
+    teams = entrants(tournament, seeding, rng_seed=rng_seed)
+    start = start or default_start(tournament)
+    generate = generate_single_elimination if fmt == "single_elimination" else generate_round_robin
+    return generate(tournament, teams, start, round_interval, match_interval, replace=replace)
+
+
+def advance_winner(match_id, result):
+    """
+    Ставит победителя матча в слот следующего матча сетки.
+    result — dict(winner_id, score_team1, score_team2) или None (результат
+    удалён: слот освобождается). Победитель — winner, без него — по счёту;
+    при ничьей слот пустой. Следующий матч с результатом не трогаем.
+    """
+    link = (
+        Match.objects.filter(pk=match_id)
+        .values_list("next_match_id", "next_match_slot", "team1_id", "team2_id")
+        .first()
+    )
+    if link is None or link[0] is None:
+        return
+    next_match_id, slot, team1_id, team2_id = link
+
+    winner_id = None
+    if result is not None:
+        winner_id = result["winner_id"]
+        if winner_id is None and result["score_team1"] != result["score_team2"]:
+            winner_id = team1_id if result["score_team1"] > result["score_team2"] else team2_id
+
+    if MatchResult.objects.filter(match_id=next_match_id).exists():
+        return
+    nxt = Match.objects.get(pk=next_match_id)
+    field = "team1" if slot == 1 else "team2"
+    if getattr(nxt, f"{field}_id") == winner_id:
+        return
+    setattr(nxt, f"{field}_id", winner_id)
+    # обычный save: участие и кэш обновят сигналы
+    nxt.save(update_fields=[field])
@@ -0,0 +1,138 @@
+"""
+Поиск по командам, игрокам и матчам (/api/search/?q=).
+
+PostgreSQL: pg_trgm — фильтр `name % q OR name ILIKE '%q%'` идёт по GIN
+trigram-индексам (миграция 0008), ранжирование по similarity(). Время
+ответа не зависит от размера таблиц: индекс отдаёт только кандидатов.
+Запрос короче трёх символов не даёт ни одной полной триграммы — GIN его
+не обслужит и планировщик уйдёт в seq scan, поэтому такие запросы не ищем.
+
+SQLite (локальный запуск): icontains и простое ранжирование
+"точное совпадение > префикс > подстрока".
+"""
+from django.db import connection
+from django.db.models import BooleanField, Case, F, FloatField, Q, Value, When
+from django.db.models.expressions import Func
+from django.db.models.functions import Greatest
+
+from .models import Match, Player, Team
+
+# меньше трёх символов — нет триграммы для индекса (см. docstring)
+MIN_QUERY_LENGTH = 3
+
+
+class TrigramSimilar(Func):
+    # lhs % rhs: похожесть выше pg_trgm.similarity_threshold
+    arg_joiner = " %% "
+    template = "(%(expressions)s)"
+    output_field = BooleanField()
+
+
+class ILike(Func):
+    arg_joiner = " ILIKE "
+    template = "(%(expressions)s)"
+    output_field = BooleanField()
+
+
+class Similarity(Func):
+    function = "SIMILARITY"
+    output_field = FloatField()
+
+
+def _like_pattern(q):
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def use_trigram():
+    return connection.vendor == "postgresql"
+
+
+def _ranked(qs, fields, q):
+    """
+    Фильтр и поле score по одному или нескольким текстовым полям.
+    """
+    if use_trigram():
+        cond = Q()
+        for name in fields:
+            cond |= Q(TrigramSimilar(F(name), Value(q))) | Q(ILike(F(name), Value(_like_pattern(q))))
+        scores = [Similarity(F(name), Value(q)) for name in fields]
+        score = scores[0] if len(scores) == 1 else Greatest(*scores)
+        return qs.filter(cond).annotate(score=score)
+
+    cond = Q()
+    whens = []
+    for name in fields:
+        cond |= Q(**{f"{name}__icontains": q})
+        whens += [
+            When(**{f"{name}__iexact": q}, then=Value(1.0)),
+            When(**{f"{name}__istartswith": q}, then=Value(0.6)),
+        ]
+    score = Case(*whens, default=Value(0.3), output_field=FloatField())
+    return qs.filter(cond).annotate(score=score)
+
+
+def search_teams(q, limit):
+    qs = _ranked(Team.objects.all(), ["name"], q)
+    return list(qs.order_by("-score", "name")[:limit])
+
+
+def search_players(q, limit):
+    qs = _ranked(Player.objects.select_related("team"), ["nickname", "real_name"], q)
+    return list(qs.order_by("-score", "nickname")[:limit])
+
+
+def search_matches(team_ids, limit):
+    # матчи найденных команд: два индексных условия по FK вместо
+    # team1__name__icontains | team2__name__icontains
+    if not team_ids:
+        return []
+    qs = (
+        Match.objects.select_related("tournament", "team1", "team2")
+        .filter(Q(team1_id__in=team_ids) | Q(team2_id__in=team_ids))
+        .order_by("-match_date", "-id")
+    )
+    return list(qs[:limit])
+
+
+def search(q, limit=10):
+    q = (q or "").strip()
+    if len(q) < MIN_QUERY_LENGTH:
+        return {"query": q, "teams": [], "players": [], "matches": []}
+
+    teams = search_teams(q, limit)
+    players = search_players(q, limit)
+    team_scores = {t.id: t.score for t in teams}
+    matches = search_matches(list(team_scores), limit)
+
+    return {
+        "query": q,
+        "teams": [
+            {"id": t.id, "name": t.name, "country": t.country, "logo_url": t.logo_url, "score": round(t.score, 4)}
+            for t in teams
+        ],
+        "players": [
+            {
+                "id": p.id,
+                "nickname": p.nickname,
+                "real_name": p.real_name,
+                "team_id": p.team_id,
+                "team_name": p.team.name if p.team else None,
+                "score": round(p.score, 4),
+            }
+            for p in players
+        ],
+        "matches": [
+            {
+                "id": m.id,
+                "tournament_id": m.tournament_id,
+                "tournament_name": m.tournament.name if m.tournament else None,
+                "team1_name": m.team1.name if m.team1 else None,
+                "team2_name": m.team2.name if m.team2 else None,
+                "match_date": m.match_date,
+                "status": m.status,
+                "score": round(max(team_scores.get(m.team1_id, 0), team_scores.get(m.team2_id, 0)), 4),
+            }
+            for m in matches
+        ],
+    }
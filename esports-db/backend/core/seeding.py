@@ -0,0 +1,316 @@
+"""
+Синтетические данные в объёме "как на проде" для команды seed_bulk.
+
+Всё определяется зерном: одинаковые --seed и пресет на той же (пустой)
+базе в тот же день дают одинаковые данные. Даты турниров отсчитываются
+от сегодняшнего дня, чтобы были и прошедшие, и текущие, и будущие турниры.
+
+Первичные ключи назначаем сами (от текущего MAX(id) + 1): внешние ключи
+известны сразу, ничего не нужно перечитывать. Строки пишутся пачками:
+на PostgreSQL через COPY, иначе через bulk_create. Сигналы при этом не
+срабатывают, поэтому производные таблицы (участие, групповые таблицы,
+рейтинги, личные встречи) пересобираются в конце, а кэш ответов
+сбрасывается явно.
+
+Турнир на 16 команд: плей-офф — 15 матчей, группы — 2 x 28, смешанный —
+группы + плей-офф на 8. Пресет large (~27 тыс. турниров) даёт около
+миллиона матчей.
+"""
+import random
+import time
+from datetime import datetime, time as dt_time, timedelta
+from decimal import Decimal
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Game, Match, MatchResult, Player, Standing, Team, Tournament, TournamentTeam
+from .response_cache import bump_models
+
+PRESETS = {
+    "tiny": {"teams": 60, "tournaments": 8, "teams_per_tournament": 8},
+    "small": {"teams": 500, "tournaments": 270, "teams_per_tournament": 16},
+    "medium": {"teams": 5_000, "tournaments": 2_700, "teams_per_tournament": 16},
+    "large": {"teams": 50_000, "tournaments": 27_000, "teams_per_tournament": 16},
+}
+PLAYERS_PER_TEAM = 5
+BATCH_SIZE = 20_000
+HISTORY_DAYS = 6 * 365
+FUTURE_DAYS = 90
+
+GAMES = [
+    ("Dota 2", "MOBA"), ("League of Legends", "MOBA"), ("Counter-Strike 2", "FPS"),
+    ("Valorant", "FPS"), ("Rainbow Six Siege", "FPS"), ("StarCraft II", "RTS"),
+    ("Rocket League", "Sports"), ("PUBG", "Battle Royale"), ("Apex Legends", "Battle Royale"),
+    ("Overwatch 2", "FPS"),
+]
+COUNTRIES = ["RU", "UA", "KZ", "BY", "DE", "SE", "DK", "FI", "PL", "FR", "US", "BR", "CN", "KR", "GB", "ES"]
+ROLES = ["carry", "mid", "offlane", "support", "captain"]
+WORDS_A = ["Red", "Dark", "Iron", "Swift", "Silent", "Golden", "Wild", "Frozen", "Crimson", "Shadow",
+           "Neon", "Storm", "Lucky", "Royal", "Ancient", "Rapid"]
+WORDS_B = ["Wolves", "Falcons", "Titans", "Dragons", "Ravens", "Knights", "Vipers", "Phoenix", "Sharks",
+           "Rhinos", "Owls", "Spartans", "Comets", "Bears", "Lynx", "Hawks"]
+FORMAT_WEIGHTS = [("playoff", 5), ("groups", 2), ("mixed", 3)]
+
+
+class _Writer:
+    """Копит строки одной таблицы и пишет пачками (COPY или bulk_create)."""
+
+    def __init__(self, model, fields, batch_size=BATCH_SIZE):
+        self.model = model
+        self.fields = fields
+        self.batch_size = batch_size
+        self.rows = []
+        self.count = 0
+
+    def add(self, *row):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        rows, self.rows = self.rows, []
+        self.count += len(rows)
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                raw = cursor.cursor
+                if hasattr(raw, "copy"):  # psycopg 3
+                    meta = self.model._meta
+                    columns = ", ".join(connection.ops.quote_name(meta.get_field(f).column) for f in self.fields)
+                    with raw.copy(f"COPY {connection.ops.quote_name(meta.db_table)} ({columns}) FROM STDIN") as copy:
+                        for row in rows:
+                            copy.write_row(row)
+                    return
+        self.model.objects.bulk_create(
+            [self.model(**dict(zip(self.fields, row))) for row in rows], batch_size=2000
+        )
+
+
+def _next_id(model):
+    return (model.objects.aggregate(m=Max("id"))["m"] or 0) + 1
+
+
+def _win_probability(a, b):
+    return 1.0 / (1.0 + 10.0 ** ((b - a) / 400.0))
+
+
+class BulkSeeder:
+    def __init__(self, seed=42, teams=500, tournaments=270, teams_per_tournament=16, today=None, log=print):
+        if teams_per_tournament < 4 or teams_per_tournament & (teams_per_tournament - 1):
+            raise ValueError("teams_per_tournament must be a power of two >= 4")
+        if teams < teams_per_tournament:
+            raise ValueError("need at least teams_per_tournament teams")
+        self.rng = random.Random(seed)
+        self.n_teams = teams
+        self.n_tournaments = tournaments
+        self.per_tournament = teams_per_tournament
+        self.today = today or timezone.localdate()
+        self.log = log
+        self.strength = {}
+
+        self.tournaments = _Writer(Tournament, ["id", "name", "game_id", "start_date", "end_date",
+                                                "prize_pool", "format", "status"])
+        self.entries = _Writer(TournamentTeam, ["tournament_id", "team_id"])
+        self.matches = _Writer(Match, ["id", "tournament_id", "team1_id", "team2_id", "match_date", "round",
+                                       "status", "bracket_round", "bracket_position"])
+        self.results = _Writer(MatchResult, ["match_id", "winner_id", "score_team1", "score_team2"])
+        self.standings = _Writer(Standing, ["tournament_id", "team_id", "place"])
+
+    # --- справочники ---
+    def seed_games(self):
+        ids = []
+        for title, genre in GAMES:
+            game, _ = Game.objects.get_or_create(title=title, defaults={"genre": genre})
+            ids.append(game.id)
+        return ids
+
+    def seed_teams(self):
+        teams = _Writer(Team, ["id", "name", "country", "is_approved"])
+        players = _Writer(Player, ["id", "nickname", "real_name", "team_id", "role"])
+        team_id, player_id = _next_id(Team), _next_id(Player)
+        for _ in range(self.n_teams):
+            name = f"{self.rng.choice(WORDS_A)} {self.rng.choice(WORDS_B)} {team_id}"
+            teams.add(team_id, name, self.rng.choice(COUNTRIES), True)
+            self.strength[team_id] = self.rng.gauss(1500, 200)
+            for i in range(PLAYERS_PER_TEAM):
+                players.add(player_id, f"p{player_id}", None, team_id, ROLES[i % len(ROLES)])
+                player_id += 1
+            team_id += 1
+        teams.flush()
+        players.flush()
+        return teams.count, players.count
+
+    # --- матчи ---
+    def play(self, t1, t2, allow_draw=False):
+        """(winner_id | None, score1, score2) с учётом силы команд."""
+        p = _win_probability(self.strength[t1], self.strength[t2])
+        if allow_draw:
+            # bo2: 2:0, 1:1, 0:2
+            r = self.rng.random()
+            if r < p * p:
+                return t1, 2, 0
+            if r > 1 - (1 - p) * (1 - p):
+                return t2, 0, 2
+            return None, 1, 1
+        if self.rng.random() < p:
+            return t1, 2, self.rng.randint(0, 1)
+        return t2, self.rng.randint(0, 1), 2
+
+    def add_match(self, tournament_id, t1, t2, when, round_name, finished, bracket_round, position, allow_draw=False):
+        match_id = self.match_id
+        self.match_id += 1
+        self.matches.add(match_id, tournament_id, t1, t2, when, round_name,
+                         "finished" if finished else "scheduled", bracket_round, position)
+        if not finished or t1 is None or t2 is None:
+            return None
+        winner, s1, s2 = self.play(t1, t2, allow_draw=allow_draw)
+        self.results.add(match_id, winner, s1, s2)
+        return winner, s1, s2
+
+    def playoff(self, tournament_id, teams, start, finished, first_round=1):
+        """Сетка на выбывание; возвращает {team_id: достигнутый раунд}."""
+        reached = {t: first_round for t in teams}
+        alive = list(teams)
+        r = first_round
+        while len(alive) > 1:
+            count = len(alive) // 2
+            name = "Финал" if count == 1 else f"1/{count}"
+            when = start + timedelta(days=r - first_round)
+            winners = []
+            for pos in range(count):
+                t1, t2 = alive[2 * pos], alive[2 * pos + 1]
+                outcome = self.add_match(tournament_id, t1, t2, when + timedelta(hours=pos), name, finished, r, pos + 1)
+                if outcome is not None:
+                    winners.append(outcome[0])
+            if not finished:
+                return reached  # будущий турнир: известен только первый раунд
+            for t in winners:
+                reached[t] = r + 1
+            alive = winners
+            r += 1
+        return reached
+
+    def groups(self, tournament_id, teams, start, finished):
+        """Две группы по кругу; возвращает {team_id: (очки, разница)}."""
+        table = {t: [0, 0] for t in teams}
+        half = len(teams) // 2
+        for g, group in enumerate((teams[:half], teams[half:])):
+            ids = list(group)
+            n = len(ids)
+            for k in range(n - 1):
+                when = start + timedelta(days=k)
+                for i in range(n // 2):
+                    t1, t2 = ids[i], ids[n - 1 - i]
+                    outcome = self.add_match(tournament_id, t1, t2, when + timedelta(hours=i + g * half),
+                                             f"Группа {'AB'[g]}, тур {k + 1}", finished, k + 1, i + 1,
+                                             allow_draw=True)
+                    if outcome is None:
+                        continue
+                    winner, s1, s2 = outcome
+                    for team, own, other in ((t1, s1, s2), (t2, s2, s1)):
+                        table[team][0] += 3 if winner == team else 1 if winner is None else 0
+                        table[team][1] += own - other
+                ids = [ids[0], ids[-1]] + ids[1:-1]
+        return table
+
+    def seed_tournament(self, tournament_id, game_ids, team_pool):
+        rng = self.rng
+        start_date = self.today - timedelta(days=rng.randint(-FUTURE_DAYS, HISTORY_DAYS))
+        end_date = start_date + timedelta(days=rng.randint(3, 14))
+        if end_date < self.today:
+            status = "finished"
+        elif start_date <= self.today:
+            status = "running"
+        else:
+            status = "registration"
+        finished = status == "finished"
+        fmt = rng.choices([f for f, _ in FORMAT_WEIGHTS], weights=[w for _, w in FORMAT_WEIGHTS])[0]
+        prize = Decimal(rng.choice([5, 10, 25, 50, 100, 250, 500, 1000]) * 1000)
+        game_id = rng.choice(game_ids)
+        self.tournaments.add(tournament_id, f"{rng.choice(WORDS_A)} Cup {tournament_id}", game_id,
+                             start_date, end_date, prize, fmt, status)
+
+        teams = rng.sample(team_pool, self.per_tournament)
+        for team_id in teams:
+            self.entries.add(tournament_id, team_id)
+
+        start = timezone.make_aware(datetime.combine(start_date, dt_time(12, 0)))
+        if fmt == "playoff":
+            reached = self.playoff(tournament_id, teams, start, finished)
+            order = sorted(teams, key=lambda t: (-reached[t], -self.strength[t]))
+        else:
+            table = self.groups(tournament_id, teams, start, finished)
+            by_table = sorted(teams, key=lambda t: (-table[t][0], -table[t][1], -self.strength[t]))
+            order = by_table
+            if fmt == "mixed" and finished:
+                half = self.per_tournament // 2
+                groups = (set(teams[:half]), set(teams[half:]))
+                # лучшие четверти каждой группы — в плей-офф
+                seeds = [t for g in groups for t in [x for x in by_table if x in g][: half // 2]]
+                reached = self.playoff(tournament_id, seeds, start + timedelta(days=half), finished,
+                                       first_round=half)
+                top = sorted(seeds, key=lambda t: (-reached[t], -self.strength[t]))
+                order = top + [t for t in by_table if t not in reached]
+
+        if finished:
+            for place, team_id in enumerate(order, start=1):
+                self.standings.add(tournament_id, team_id, place)
+
+    def run(self):
+        started = time.monotonic()
+        counts = {}
+        with transaction.atomic():
+            game_ids = self.seed_games()
+            counts["teams"], counts["players"] = self.seed_teams()
+            self.log(f"teams/players: {time.monotonic() - started:.1f}s")
+
+            team_pool = list(self.strength)
+            self.match_id = _next_id(Match)
+            tournament_id = _next_id(Tournament)
+            for i in range(self.n_tournaments):
+                self.seed_tournament(tournament_id + i, game_ids, team_pool)
+                if (i + 1) % 5000 == 0:
+                    self.log(f"tournaments: {i + 1}/{self.n_tournaments} ({time.monotonic() - started:.1f}s)")
+            # порядок пачек не важен: FK в PostgreSQL/SQLite отложенные, проверяются при коммите
+            for writer in (self.tournaments, self.entries, self.matches, self.results, self.standings):
+                writer.flush()
+
+            # после явных id последовательности должны смотреть за MAX(id)
+            sequence_sql = connection.ops.sequence_reset_sql(no_style(), [Team, Player, Tournament, Match])
+            if sequence_sql:
+                with connection.cursor() as cursor:
+                    for sql in sequence_sql:
+                        cursor.execute(sql)
+
+        counts.update(
+            tournaments=self.tournaments.count,
+            entries=self.entries.count,
+            matches=self.matches.count,
+            results=self.results.count,
+            standings=self.standings.count,
+        )
+        self.log(f"rows written: {time.monotonic() - started:.1f}s")
+        return counts
+
+
+def rebuild_derived(log=print):
+    """Производные таблицы после записи мимо сигналов + сброс кэша ответов."""
+    from .h2h import recompute_h2h
+    from .participation import rebuild_participation
+    from .ratings import recompute_ratings
+    from .standings import recompute_standings
+
+    for name, fn in (
+        ("participation", rebuild_participation),
+        ("group standings", recompute_standings),
+        ("ratings", recompute_ratings),
+        ("head-to-head", recompute_h2h),
+    ):
+        started = time.monotonic()
+        fn()
+        log(f"{name}: {time.monotonic() - started:.1f}s")
+    bump_models(Game, Tournament, Team, Player, TournamentTeam, Match, MatchResult, Standing)
@@ -1,15 +1,21 @@
 from rest_framework import serializers
-from .models import Game, Tournament, Team, Player, Match, MatchResult, Standing, TournamentTeam
 
+from .fieldsets import SparseFieldsetsMixin
+from .models import (
+    Game, Tournament, Team, Player, Match, MatchResult, Standing, TournamentTeam, GroupStanding,
+    TeamRating, TeamRatingHistory,
+)
 
-class GameSerializer(serializers.ModelSerializer):
+
+class GameSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     class Meta:
         model = Game
         fields = ["id", "title", "genre"]
 
 
-class TournamentSerializer(serializers.ModelSerializer):
+class TournamentSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     game_title = serializers.CharField(source="game.title", read_only=True)
+    expandable_fields = {"game": "GameSerializer"}
 
     class Meta:
         model = Tournament
@@ -19,14 +25,17 @@ class TournamentSerializer(serializers.ModelSerializer):
         ]
 
 
-class TeamSerializer(serializers.ModelSerializer):
+class TeamSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
+    expandable_fields = {"players": ("PlayerSerializer", {"many": True})}
+
     class Meta:
         model = Team
         fields = ["id", "name", "logo_url", "country"]
 
 
-class PlayerSerializer(serializers.ModelSerializer):
+class PlayerSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     team_name = serializers.CharField(source="team.name", read_only=True)
+    expandable_fields = {"team": "TeamSerializer"}
 
     class Meta:
         model = Player
@@ -35,17 +44,24 @@ class PlayerSerializer(serializers.ModelSerializer):
 
 class MatchResultSerializer(serializers.ModelSerializer):
     winner_name = serializers.CharField(source="winner.name", read_only=True)
+    expandable_fields = {"winner": "TeamSerializer"}
 
     class Meta:
         model = MatchResult
         fields = ["match", "winner", "winner_name", "score_team1", "score_team2", "details"]
 
 
-class MatchSerializer(serializers.ModelSerializer):
+class MatchSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     tournament_name = serializers.CharField(source="tournament.name", read_only=True)
-    team1_name = serializers.CharField(source="team1.name", read_only=True)
-    team2_name = serializers.CharField(source="team2.name", read_only=True)
+    # команды матчей следующих раундов сетки ещё не известны
+    team1_name = serializers.CharField(source="team1.name", read_only=True, allow_null=True)
+    team2_name = serializers.CharField(source="team2.name", read_only=True, allow_null=True)
     result = MatchResultSerializer(read_only=True)
+    expandable_fields = {
+        "tournament": "TournamentSerializer",
+        "team1": "TeamSerializer",
+        "team2": "TeamSerializer",
+    }
 
     class Meta:
         model = Match
@@ -54,21 +70,55 @@ class MatchSerializer(serializers.ModelSerializer):
             "team1", "team1_name",
             "team2", "team2_name",
             "match_date", "round", "status",
+            "bracket_round", "next_match", "next_match_slot", "external_id",
             "result",
         ]
 
 
-class StandingSerializer(serializers.ModelSerializer):
+class StandingSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     team_name = serializers.CharField(source="team.name", read_only=True)
+    expandable_fields = {"tournament": "TournamentSerializer", "team": "TeamSerializer"}
 
     class Meta:
         model = Standing
         fields = ["id", "tournament", "team", "team_name", "place"]
 
 
-class TournamentTeamSerializer(serializers.ModelSerializer):
+class GroupStandingSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
+    team_name = serializers.CharField(source="team.name", read_only=True)
+    place = serializers.IntegerField(source="rank", read_only=True)
+    score_diff = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = GroupStanding
+        fields = [
+            "tournament", "team", "team_name", "place",
+            "played", "wins", "draws", "losses",
+            "score_for", "score_against", "score_diff", "points",
+        ]
+
+
+class TeamRatingSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
+    team_name = serializers.CharField(source="team.name", read_only=True)
+    game_title = serializers.CharField(source="game.title", read_only=True)
+
+    class Meta:
+        model = TeamRating
+        fields = ["team", "team_name", "game", "game_title", "rating", "matches", "last_match_date"]
+
+
+class TeamRatingHistorySerializer(serializers.ModelSerializer):
+    opponent_name = serializers.CharField(source="opponent.name", read_only=True)
+
+    class Meta:
+        model = TeamRatingHistory
+        fields = ["match", "game", "played_at", "opponent", "opponent_name", "rating_before", "rating_after"]
+
+
+class TournamentTeamSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     team_name = serializers.CharField(source="team.name", read_only=True)
     tournament_name = serializers.CharField(source="tournament.name", read_only=True)
+    expandable_fields = {"tournament": "TournamentSerializer", "team": "TeamSerializer"}
 
     class Meta:
         model = TournamentTeam
@@ -80,6 +130,30 @@ class TeamMiniSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "logo_url", "country"]
 
 
+def tournament_participants(tournament_id):
+    # через TournamentTeam: related_name у Team -> team_tournaments
+    # (старый lookup "tournamentteam__tournament" не существует)
+    return Team.objects.filter(team_tournaments__tournament_id=tournament_id).order_by("name")
+
+
+def tournament_matches(tournament_id):
+    # один запрос с JOIN: турнир, обе команды, результат и победитель,
+    # иначе MatchSerializer делает по запросу на каждое имя/результат
+    return (
+        Match.objects.select_related("tournament", "team1", "team2", "result", "result__winner")
+        .filter(tournament_id=tournament_id)
+        .order_by("match_date", "id")
+    )
+
+
+def tournament_standings(tournament_id):
+    return (
+        Standing.objects.select_related("team")
+        .filter(tournament_id=tournament_id)
+        .order_by("place", "id")
+    )
+
+
 class TournamentDetailSerializer(serializers.ModelSerializer):
     """
     Детальная выдача турнира для страницы турнира:
@@ -103,17 +177,10 @@ class TournamentDetailSerializer(serializers.ModelSerializer):
         ]
 
     def get_participants(self, obj):
-        # через TournamentTeam (many-to-many)
-        teams_qs = Team.objects.filter(
-            tournamentteam__tournament=obj
-        ).distinct().order_by("name")
-        return TeamMiniSerializer(teams_qs, many=True).data
+        return TeamMiniSerializer(tournament_participants(obj.pk), many=True).data
 
     def get_matches(self, obj):
-        # матчи + вложенный result уже есть в MatchSerializer
-        qs = Match.objects.filter(tournament=obj).order_by("match_date", "id")
-        return MatchSerializer(qs, many=True).data
+        return MatchSerializer(tournament_matches(obj.pk), many=True).data
 
     def get_standings(self, obj):
-        qs = Standing.objects.filter(tournament=obj).order_by("place", "id")
-        return StandingSerializer(qs, many=True).data
+        return StandingSerializer(tournament_standings(obj.pk), many=True).data
@@ -1,8 +1,19 @@
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
 
-from .models import UserProfile
+from .models import (
+    UserProfile, Game, Tournament, Team, Player,
+    TournamentTeam, Match, MatchResult, Standing, TeamParticipation,
+)
+from .participation import add_participation, sync_participation
+from . import h2h, ratings
+from .scheduling import advance_winner
+from .standings import on_result_change
+from .authentication import token_cache
+from .live import publish_match, publish_match_deleted
+from .response_cache import bump_generation, bump_models, tournament_scope
 
 User = get_user_model()
 
@@ -11,3 +22,173 @@ User = get_user_model()
 def create_profile(sender, instance, created, **kwargs):
     if created:
         UserProfile.objects.create(user=instance)
+
+
+# --- кэш токенов: снимок пользователя не должен пережить его изменение ---
+@receiver([post_save, post_delete], sender=User)
+def evict_user_tokens(sender, instance, **kwargs):
+    # деактивация, смена is_staff/пароля и т.п.
+    token_cache.evict_user(instance.pk)
+
+
+@receiver(post_delete, sender=Token)
+def evict_token(sender, instance, **kwargs):
+    token_cache.evict(instance.key)
+
+
+# --- кэш ответов: любая запись в модель делает новое "поколение" ---
+CACHED_MODELS = (Game, Tournament, Team, Player, TournamentTeam, Match, MatchResult, Standing)
+
+
+def bump_response_cache(sender, **kwargs):
+    bump_models(sender)
+
+
+def bump_tournament_scope(sender, instance, **kwargs):
+    # метка конкретного турнира: страница турнира, его матчи и таблица
+    if sender is Tournament:
+        tournament_id = instance.pk
+    elif sender is MatchResult:
+        tournament_id = (
+            Match.objects.filter(pk=instance.match_id).values_list("tournament_id", flat=True).first()
+        )
+    else:
+        tournament_id = instance.tournament_id
+    # матч перенесли в другой турнир — меняются страницы обоих
+    tournament_ids = {tournament_id, getattr(instance, "_tournament_before", None)} - {None}
+    if tournament_ids:
+        bump_generation(*(tournament_scope(tid) for tid in tournament_ids))
+
+
+for _model in CACHED_MODELS:
+    post_save.connect(bump_response_cache, sender=_model, dispatch_uid=f"response_cache_save_{_model.__name__}")
+    post_delete.connect(bump_response_cache, sender=_model, dispatch_uid=f"response_cache_delete_{_model.__name__}")
+
+for _model in (Tournament, TournamentTeam, Match, MatchResult, Standing):
+    post_save.connect(bump_tournament_scope, sender=_model, dispatch_uid=f"tournament_scope_save_{_model.__name__}")
+    post_delete.connect(bump_tournament_scope, sender=_model, dispatch_uid=f"tournament_scope_delete_{_model.__name__}")
+
+
+# --- индекс участия команд (TeamParticipation) ---
+@receiver(post_save, sender=TournamentTeam)
+def participation_from_entry(sender, instance, **kwargs):
+    add_participation(instance.team_id, instance.tournament_id)
+
+
+@receiver(post_delete, sender=TournamentTeam)
+def participation_entry_removed(sender, instance, **kwargs):
+    sync_participation(instance.team_id, instance.tournament_id)
+
+
+@receiver(pre_save, sender=Match)
+def remember_match_teams(sender, instance, **kwargs):
+    # старые пары (команда, турнир) — чтобы убрать участие после замены команды
+    instance._participation_before = set()
+    instance._status_before = None
+    instance._tournament_before = None
+    if instance.pk:
+        old = (
+            Match.objects.filter(pk=instance.pk)
+            .values_list("team1_id", "team2_id", "tournament_id", "status")
+            .first()
+        )
+        if old:
+            instance._participation_before = {(old[0], old[2]), (old[1], old[2])}
+            instance._status_before = old[3]
+            instance._tournament_before = old[2]
+
+
+@receiver(post_save, sender=Match)
+def participation_from_match(sender, instance, **kwargs):
+    current = {(instance.team1_id, instance.tournament_id), (instance.team2_id, instance.tournament_id)}
+    for team_id, tournament_id in current:
+        add_participation(team_id, tournament_id)
+    for team_id, tournament_id in getattr(instance, "_participation_before", set()) - current:
+        sync_participation(team_id, tournament_id)
+
+
+@receiver(post_delete, sender=Match)
+def participation_match_removed(sender, instance, **kwargs):
+    sync_participation(instance.team1_id, instance.tournament_id)
+    sync_participation(instance.team2_id, instance.tournament_id)
+
+
+@receiver(post_save, sender=Tournament)
+def participation_game_changed(sender, instance, created, **kwargs):
+    if not created:
+        TeamParticipation.objects.filter(tournament=instance).exclude(game_id=instance.game_id).update(
+            game_id=instance.game_id
+        )
+
+
+# --- результаты матчей: состояние "до" для инкрементальных агрегатов ---
+RESULT_FIELDS = ("winner_id", "score_team1", "score_team2")
+
+
+def result_state(instance):
+    return {f: getattr(instance, f) for f in RESULT_FIELDS}
+
+
+@receiver(pre_save, sender=MatchResult)
+def remember_result(sender, instance, **kwargs):
+    instance._before_save = None
+    if instance.pk:
+        instance._before_save = MatchResult.objects.filter(pk=instance.pk).values(*RESULT_FIELDS).first()
+
+
+@receiver(post_save, sender=MatchResult)
+def standings_on_result_saved(sender, instance, **kwargs):
+    on_result_change(instance.match_id, getattr(instance, "_before_save", None), result_state(instance))
+
+
+@receiver(post_delete, sender=MatchResult)
+def standings_on_result_deleted(sender, instance, **kwargs):
+    on_result_change(instance.match_id, result_state(instance), None)
+
+
+@receiver(post_save, sender=MatchResult)
+def h2h_on_result_saved(sender, instance, **kwargs):
+    h2h.on_result_change(instance.match_id, getattr(instance, "_before_save", None), result_state(instance))
+
+
+@receiver(post_delete, sender=MatchResult)
+def h2h_on_result_deleted(sender, instance, **kwargs):
+    h2h.on_result_change(instance.match_id, result_state(instance), None)
+
+
+@receiver(post_save, sender=MatchResult)
+def ratings_on_result_saved(sender, instance, **kwargs):
+    ratings.on_result_change(instance.match_id, getattr(instance, "_before_save", None), result_state(instance))
+
+
+@receiver(post_delete, sender=MatchResult)
+def ratings_on_result_deleted(sender, instance, **kwargs):
+    ratings.on_result_change(instance.match_id, result_state(instance), None)
+
+
+# --- сетка на выбывание: победитель проходит в следующий матч ---
+@receiver(post_save, sender=MatchResult)
+def bracket_on_result_saved(sender, instance, **kwargs):
+    advance_winner(instance.match_id, result_state(instance))
+
+
+@receiver(post_delete, sender=MatchResult)
+def bracket_on_result_deleted(sender, instance, **kwargs):
+    advance_winner(instance.match_id, None)
+
+
+# --- живая лента (/api/live/matches/): новый матч, смена статуса, результат ---
+@receiver(post_save, sender=Match)
+def live_match_saved(sender, instance, created, **kwargs):
+    if created or instance.status != getattr(instance, "_status_before", None):
+        publish_match(instance.pk)
+
+
+@receiver(post_delete, sender=Match)
+def live_match_deleted(sender, instance, **kwargs):
+    publish_match_deleted(instance)
+
+
+@receiver([post_save, post_delete], sender=MatchResult)
+def live_result_changed(sender, instance, **kwargs):
+    publish_match(instance.match_id)
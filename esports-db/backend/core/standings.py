@@ -0,0 +1,158 @@
+"""
+Движок групповых таблиц (Tournament.format = groups / mixed).
+
+На каждое сохранение/удаление MatchResult считаем вклад результата в
+таблицу (было -> стало) и применяем только разницу к двум строкам
+GroupStanding через F()-выражения, затем пересчитываем места внутри
+одного турнира. Полный проход по матчам — только в recompute_standings()
+(команда recompute_standings) для починки.
+
+Очки: победа 3, ничья 1, поражение 0. Места: очки, разница счёта,
+забитые, победы, имя команды.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import GroupStanding, Match, MatchResult, Tournament, TournamentTeam
+from .response_cache import bump_generation, tournament_scope
+
+GROUP_FORMATS = ("groups", "mixed")
+POINTS_WIN = 3
+POINTS_DRAW = 1
+
+STAT_FIELDS = ("played", "wins", "draws", "losses", "score_for", "score_against", "points")
+
+
+def contribution(team1_id, team2_id, winner_id, score1, score2):
+    """
+    {team_id: Counter(полей GroupStanding)} для одного результата.
+    Победитель берётся из winner, без него — по счёту (равный счёт = ничья).
+    """
+    if team1_id is None or team2_id is None:
+        return {}
+    if winner_id is None and score1 != score2:
+        winner_id = team1_id if score1 > score2 else team2_id
+
+    result = {}
+    for team_id, own, other in ((team1_id, score1, score2), (team2_id, score2, score1)):
+        c = Counter(played=1, score_for=own, score_against=other)
+        if winner_id is None:
+            c.update(draws=1, points=POINTS_DRAW)
+        elif winner_id == team_id:
+            c.update(wins=1, points=POINTS_WIN)
+        else:
+            c.update(losses=1)
+        result[team_id] = c
+    return result
+
+
+def _diff(new, old):
+    teams = set(new) | set(old)
+    delta = {}
+    for team_id in teams:
+        d = Counter(new.get(team_id, {}))
+        d.subtract(old.get(team_id, {}))
+        d = {k: v for k, v in d.items() if v}
+        if d:
+            delta[team_id] = d
+    return delta
+
+
+def apply_delta(tournament_id, delta, create=True):
+    """
+    create=False — только обновить существующие строки: при удалении
+    результата (в т.ч. каскадом от турнира/команды) нельзя вставлять
+    строки, ссылающиеся на удаляемые записи.
+    """
+    if not delta:
+        return
+    for team_id, d in delta.items():
+        if create:
+            GroupStanding.objects.get_or_create(tournament_id=tournament_id, team_id=team_id)
+        GroupStanding.objects.filter(tournament_id=tournament_id, team_id=team_id).update(
+            **{field: F(field) + value for field, value in d.items()}
+        )
+    rerank(tournament_id)
+
+
+def rerank(tournament_id):
+    rows = list(
+        GroupStanding.objects.select_related("team").filter(tournament_id=tournament_id)
+    )
+    rows.sort(key=lambda r: (-r.points, -r.score_diff, -r.score_for, -r.wins, r.team.name))
+    changed = []
+    for rank, row in enumerate(rows, start=1):
+        if row.rank != rank:
+            row.rank = rank
+            changed.append(row)
+    if changed:
+        GroupStanding.objects.bulk_update(changed, ["rank"])
+
+
+def match_info(match_id):
+    """(tournament_id, format, team1_id, team2_id) или None."""
+    return (
+        Match.objects.filter(pk=match_id)
+        .values_list("tournament_id", "tournament__format", "team1_id", "team2_id")
+        .first()
+    )
+
+
+def on_result_change(match_id, before, after):
+    """
+    before/after — dict(winner_id, score_team1, score_team2) или None
+    (результата не было / результат удалён).
+    """
+    info = match_info(match_id)
+    if info is None:
+        return
+    tournament_id, fmt, team1_id, team2_id = info
+    if fmt not in GROUP_FORMATS:
+        return
+
+    def contrib(r):
+        if r is None:
+            return {}
+        return contribution(team1_id, team2_id, r["winner_id"], r["score_team1"], r["score_team2"])
+
+    apply_delta(tournament_id, _diff(contrib(after), contrib(before)), create=after is not None)
+
+
+def recompute_standings(tournament_ids=None):
+    """
+    Полный пересчёт таблиц по всем результатам. Возвращает число турниров.
+    """
+    tournaments = Tournament.objects.filter(format__in=GROUP_FORMATS)
+    if tournament_ids is not None:
+        tournaments = tournaments.filter(id__in=tournament_ids)
+    ids = list(tournaments.values_list("id", flat=True))
+
+    totals = {tid: {} for tid in ids}
+    for tid, team_id in TournamentTeam.objects.filter(tournament_id__in=ids).values_list("tournament_id", "team_id"):
+        totals[tid].setdefault(team_id, Counter())
+
+    results = MatchResult.objects.filter(match__tournament_id__in=ids).values_list(
+        "match__tournament_id", "match__team1_id", "match__team2_id",
+        "winner_id", "score_team1", "score_team2",
+    )
+    for tid, team1_id, team2_id, winner_id, s1, s2 in results.iterator(chunk_size=5000):
+        for team_id, c in contribution(team1_id, team2_id, winner_id, s1, s2).items():
+            totals[tid].setdefault(team_id, Counter()).update(c)
+
+    with transaction.atomic():
+        GroupStanding.objects.filter(tournament_id__in=ids).delete()
+        GroupStanding.objects.bulk_create(
+            [
+                GroupStanding(tournament_id=tid, team_id=team_id, **{f: c.get(f, 0) for f in STAT_FIELDS})
+                for tid, teams in totals.items()
+                for team_id, c in teams.items()
+            ],
+            batch_size=2000,
+        )
+        for tid in ids:
+            rerank(tid)
+
+    bump_generation(*(tournament_scope(tid) for tid in ids))
+    return len(ids)
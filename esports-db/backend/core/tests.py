@@ -1,3 +1,1459 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import time
+import unittest
+from datetime import date, timedelta
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory
+
+from .models import (
+    Game, Tournament, Team, Player, TournamentTeam, Match, MatchResult, Standing,
+    GroupStanding, HeadToHead, TeamParticipation, TeamRating, TeamRatingHistory, ViewHistory, ViewHistoryDaily,
+)
+from .authentication import token_cache
+from .h2h import recompute_h2h
+from .participation import rebuild_participation
+from .reports import REPORTS, generate_reports
+from .ratings import K_FACTOR, INITIAL_RATING, expected, recompute_ratings
+from .response_cache import FileBackend, LocMemBackend
+from .standings import recompute_standings
+from .view_history import compact_view_history
+from .views_tournaments import TournamentDetailView
+
+
+def make_tournament(teams_count=8, name="Cup", game=None):
+    """
+    Турнир с участниками, сыгранными матчами (с результатами) и итоговой таблицей.
+    """
+    game = game or Game.objects.create(title=f"Game {name}", genre="MOBA")
+    t = Tournament.objects.create(
+        name=name, game=game,
+        start_date=date(2026, 1, 1), end_date=date(2026, 1, 10),
+        format="playoff", status="finished",
+    )
+    teams = [Team.objects.create(name=f"{name} team {i}", country="RU") for i in range(teams_count)]
+    for team in teams:
+        TournamentTeam.objects.create(tournament=t, team=team)
+        Player.objects.create(nickname=f"{team.name} p1", team=team, role="carry")
+
+    start = timezone.now() - timedelta(days=5)
+    for i in range(0, teams_count, 2):
+        m = Match.objects.create(
+            tournament=t, team1=teams[i], team2=teams[i + 1],
+            match_date=start + timedelta(hours=i), round="1/8", status="finished",
+        )
+        MatchResult.objects.create(match=m, winner=teams[i], score_team1=2, score_team2=1)
+
+    for place, team in enumerate(teams, start=1):
+        Standing.objects.create(tournament=t, team=team, place=place)
+    return t
+
+
+class TournamentPageQueryBudgetTests(TestCase):
+    # турнир + участники + матчи (с JOIN результатов) + таблица
+    PAGE_QUERIES = 4
+
+    def test_page_has_fixed_query_count(self):
+        small = make_tournament(teams_count=4, name="Small")
+        big = make_tournament(teams_count=64, name="Big")
+        client = APIClient()
+
+        for t in (small, big):
+            with self.assertNumQueries(self.PAGE_QUERIES):
+                res = client.get(f"/api/tournaments/{t.id}/page/")
+            self.assertEqual(res.status_code, 200)
+
+        data = res.json()
+        self.assertEqual(len(data["participants"]), 64)
+        self.assertEqual(len(data["matches"]), 32)
+        self.assertEqual(len(data["standings"]), 64)
+        first = data["matches"][0]
+        self.assertEqual(first["team1_name"], "Big team 0")
+        self.assertEqual(first["result"]["winner_name"], "Big team 0")
+
+    def test_detail_view_has_fixed_query_count(self):
+        t = make_tournament(teams_count=16, name="Detail")
+        request = APIRequestFactory().get(f"/tournaments/{t.id}/")
+
+        with self.assertNumQueries(self.PAGE_QUERIES):
+            res = TournamentDetailView.as_view()(request, tournament_id=t.id)
+            res.render()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(res.data["participants"]), 16)
+
+
+class ResponseCacheTests(TestCase):
+    def test_hit_then_invalidated_by_write(self):
+        client = APIClient()
+        Game.objects.create(title="Dota 2", genre="MOBA")
+
+        first = client.get("/api/games/")
+        self.assertEqual(first["X-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            second = client.get("/api/games/")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.json(), first.json())
+
+        Game.objects.create(title="CS2", genre="FPS")
+        third = client.get("/api/games/")
+        self.assertEqual(third["X-Cache"], "MISS")
+        self.assertEqual(len(third.json()), 2)
+
+    def test_query_params_are_part_of_key(self):
+        make_tournament(teams_count=2, name="Keys")
+        client = APIClient()
+        client.get("/api/matches/?status=finished")
+        self.assertEqual(client.get("/api/matches/?status=scheduled")["X-Cache"], "MISS")
+
+    def test_tournament_scope_uses_canonical_id(self):
+        t = make_tournament(teams_count=2, name="Canon")
+        other = make_tournament(teams_count=2, name="Moved")
+        client = APIClient()
+        urls = [f"/api/matches/?tournament={t.id}", f"/api/matches/?tournament=0{other.id}"]
+        before = [len(client.get(url).json()["results"]) for url in urls]
+        self.assertEqual(before, [1, 1])
+
+        # перенос матча сбрасывает и старый турнир, и запрос с "0<id>"
+        match = Match.objects.get(tournament=t)
+        match.tournament = other
+        match.save()
+        after = [len(client.get(url).json()["results"]) for url in urls]
+        self.assertEqual(after, [0, 2])
+
+    def test_junk_tournament_id_uses_model_scopes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with override_settings(RESPONSE_CACHE={"BACKEND": "file", "LOCATION": tmp}):
+                response = APIClient().get("/api/standings/by_tournament/?tournament_id=a/b")
+                self.assertEqual(response.status_code, 400)
+                labels = os.listdir(os.path.join(tmp, "generations"))
+            self.assertFalse([label for label in labels if label.startswith("core.tournament-")])
+
+    def test_locmem_generations_expire_after_ttl(self):
+        # без TTL поколение живёт до записи
+        backend = LocMemBackend()
+        generation, _ = backend.get_stamp("core.game")
+        backend._stamps["core.game"] = (generation, time.time() - 3600)
+        self.assertEqual(backend.get_stamp("core.game")[0], generation)
+
+        backend = LocMemBackend(ttl=60)
+        generation, _ = backend.get_stamp("core.game")
+        self.assertEqual(backend.get_stamp("core.game")[0], generation)
+        # запись в другом воркере сюда не доходит: поколение сдвигается по TTL
+        backend._stamps["core.game"] = (generation, time.time() - 61)
+        self.assertNotEqual(backend.get_stamp("core.game")[0], generation)
+
+    def test_file_backend_culls_every_n_sets(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            backend = FileBackend(tmp, max_entries=4, cull_fraction=0.5)
+            scans = []
+            backend._cull = lambda: scans.append(1)
+            for i in range(6):
+                backend.set(str(i), i)
+            self.assertEqual(len(scans), 3)
+
+    def test_file_backend_evicts_least_recently_used(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            backend = FileBackend(tmp, max_entries=3, cull_fraction=0)
+            for i, key in enumerate("abc"):
+                backend.set(key, i)
+                os.utime(backend._entry_path(key), (i, i))
+            backend.get("a")  # "a" становится самым свежим
+            backend.set("d", 3)
+
+            self.assertIsNone(backend.get("b"))
+            self.assertEqual(backend.get("a"), 0)
+            self.assertEqual(backend.get("d"), 3)
+            self.assertEqual(backend.stats.evictions, 1)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.t = make_tournament(teams_count=2, name="Pages")
+        self.team1, self.team2 = Team.objects.filter(name__startswith="Pages")[:2]
+        # много матчей с одинаковой датой: порядок держится на id
+        same_date = timezone.now()
+        for i in range(7):
+            Match.objects.create(
+                tournament=self.t, team1=self.team1, team2=self.team2,
+                match_date=same_date, round=f"R{i}",
+            )
+
+    def collect(self, url):
+        ids, pages = [], 0
+        while url:
+            data = self.client.get(url).json()
+            ids += [m["id"] for m in data["results"]]
+            url = data["next"]
+            pages += 1
+        return ids, pages
+
+    def test_walks_all_matches_in_order(self):
+        ids, pages = self.collect("/api/matches/?page_size=3")
+        expected = list(Match.objects.order_by("match_date", "id").values_list("id", flat=True))
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 3)
+
+    def test_cursor_stable_under_inserts(self):
+        first = self.client.get("/api/matches/?page_size=3").json()
+        seen = [m["id"] for m in first["results"]]
+        # новая строка в начале сортировки не сдвигает следующую страницу
+        Match.objects.create(
+            tournament=self.t, team1=self.team1, team2=self.team2,
+            match_date=timezone.now() - timedelta(days=365), round="early",
+        )
+        second = self.client.get(first["next"]).json()
+        self.assertFalse(set(seen) & {m["id"] for m in second["results"]})
+
+        back = self.client.get(second["previous"]).json()
+        self.assertEqual([m["id"] for m in back["results"]], seen)
+
+    def test_tournaments_descending(self):
+        for i in range(4):
+            Tournament.objects.create(
+                name=f"T{i}", game=self.t.game,
+                start_date=date(2025, 1, 1), end_date=date(2025, 1, 2),
+            )
+        ids, _ = self.collect("/api/tournaments/?page_size=2")
+        expected = list(Tournament.objects.order_by("-start_date", "-id").values_list("id", flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get("/api/matches/?cursor=garbage").status_code, 404)
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        make_tournament(teams_count=4, name="Sparse")
+
+    def match_queries(self, url):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get(url).json()
+        sql = [q["sql"] for q in ctx.captured_queries if 'FROM "core_match"' in q["sql"]]
+        return data["results"], sql
+
+    def test_full_list_joins_result_in_one_query(self):
+        rows, sql = self.match_queries("/api/matches/")
+        self.assertEqual(len(sql), 1)
+        self.assertIn("core_matchresult", sql[0])
+        self.assertEqual(rows[0]["result"]["winner_name"], "Sparse team 0")
+
+    def test_fields_drop_payload_and_joins(self):
+        rows, sql = self.match_queries("/api/matches/?fields=id,team1_name,result.winner_name")
+        self.assertEqual(set(rows[0]), {"id", "team1_name", "result"})
+        self.assertEqual(rows[0]["result"], {"winner_name": "Sparse team 0"})
+        self.assertNotIn("core_tournament", sql[0])
+
+        rows, sql = self.match_queries("/api/matches/?fields=id,match_date")
+        self.assertEqual(set(rows[0]), {"id", "match_date"})
+        self.assertNotIn("JOIN", sql[0])
+
+    def test_omit(self):
+        rows, sql = self.match_queries("/api/matches/?omit=result,tournament_name")
+        self.assertNotIn("result", rows[0])
+        self.assertIn("team2_name", rows[0])
+        self.assertNotIn("core_matchresult", sql[0])
+
+
+class ExpandTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        make_tournament(teams_count=6, name="Expand")
+
+    def test_match_graph_in_bounded_queries(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        url = "/api/matches/?expand=tournament,team1.players,result.winner"
+        with CaptureQueriesContext(connection) as ctx:
+            rows = self.client.get(url).json()["results"]
+        # матчи с JOIN'ами + один prefetch игроков, сколько бы ни было матчей
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertEqual(len(rows), 3)
+        first = rows[0]
+        self.assertEqual(first["tournament"]["name"], "Expand")
+        self.assertEqual([p["nickname"] for p in first["team1"]["players"]], ["Expand team 0 p1"])
+        self.assertEqual(first["result"]["winner"]["name"], "Expand team 0")
+        # не раскрытое остаётся id
+        self.assertIsInstance(first["team2"], int)
+
+    def test_expand_with_fields_and_cache_scope(self):
+        url = "/api/matches/?expand=team1.players&fields=id,team1.players.nickname"
+        row = self.client.get(url).json()["results"][0]
+        self.assertEqual(row, {"id": row["id"], "team1": {"players": [{"nickname": "Expand team 0 p1"}]}})
+
+        # ответ зависит от Player: переименование игрока сбрасывает кэш
+        Player.objects.filter(nickname="Expand team 0 p1").update(nickname="renamed")
+        from .response_cache import bump_models
+        bump_models(Player)
+        row = self.client.get(url).json()["results"][0]
+        self.assertEqual(row["team1"]["players"][0]["nickname"], "renamed")
+
+
+class ConditionalGetTests(TestCase):
+    def test_etag_roundtrip_without_queries(self):
+        t = make_tournament(teams_count=4, name="Etag")
+        client = APIClient()
+        url = f"/api/tournaments/{t.id}/page/"
+
+        first = client.get(url)
+        self.assertTrue(first.has_header("Last-Modified"))
+        etag = first["ETag"]
+
+        with self.assertNumQueries(0):
+            res = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res["ETag"], etag)
+
+    def test_change_in_other_tournament_keeps_etag(self):
+        t = make_tournament(teams_count=2, name="Mine")
+        other = make_tournament(teams_count=2, name="Other")
+        client = APIClient()
+        url = f"/api/tournaments/{t.id}/page/"
+        etag = client.get(url)["ETag"]
+
+        Standing.objects.filter(tournament=other).update(place=5)
+        other.status = "running"
+        other.save()
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        match = Match.objects.filter(tournament=t).first()
+        match.status = "canceled"
+        match.save()
+        res = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_if_modified_since(self):
+        Game.objects.create(title="Quake", genre="FPS")
+        client = APIClient()
+        last_modified = client.get("/api/games/")["Last-Modified"]
+        self.assertEqual(client.get("/api/games/", HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+        from rest_framework.authtoken.models import Token
+
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(username="viewer", password="pass12345")
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_second_request_skips_token_lookup(self):
+        self.assertEqual(self.client.get("/api/auth/me/").status_code, 200)
+        # только профиль, без Token+User
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get("/api/auth/me/").status_code, 200)
+
+    def test_logout_evicts(self):
+        self.client.get("/api/auth/me/")
+        self.assertEqual(self.client.post("/api/auth/logout/").status_code, 200)
+        self.assertEqual(len(token_cache), 0)
+        self.assertEqual(self.client.get("/api/auth/me/").status_code, 401)
+
+    def test_deactivation_evicts(self):
+        self.client.get("/api/auth/me/")
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get("/api/auth/me/").status_code, 401)
+
+
+class ViewHistoryTests(TestCase):
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+
+        self.user = get_user_model().objects.create_user(username="reader", password="pass12345")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    @override_settings(VIEW_HISTORY_BUFFER={"ENABLED": True, "MAX_SIZE": 3, "MAX_AGE": 60})
+    def test_buffer_collapses_repeats_and_flushes_by_size(self):
+        for item_id in (1, 1, 1, 2):
+            res = self.client.post("/api/me/history/", {"item_type": "team", "item_id": item_id})
+            self.assertEqual(res.status_code, 202)
+        self.assertEqual(ViewHistory.objects.count(), 0)
+
+        self.client.post("/api/me/history/", {"item_type": "match", "item_id": 7})
+        self.assertEqual(ViewHistory.objects.count(), 3)
+
+    @override_settings(VIEW_HISTORY_BUFFER={"ENABLED": True, "MAX_SIZE": 100, "MAX_AGE": 60})
+    def test_list_sees_buffered_views(self):
+        self.client.post("/api/me/history/", {"item_type": "game", "item_id": 3})
+        data = self.client.get("/api/me/history/").json()
+        self.assertEqual([(r["item_type"], r["item_id"]) for r in data], [("game", 3)])
+
+    def test_compaction_keeps_last_n_and_rolls_up(self):
+        now = timezone.now()
+        ViewHistory.objects.bulk_create([
+            ViewHistory(user=self.user, item_type="team", item_id=1, viewed_at=now - timedelta(days=5, minutes=i))
+            for i in range(10)
+        ] + [ViewHistory(user=self.user, item_type="team", item_id=1, viewed_at=now)])
+
+        stats = compact_view_history(keep=4)
+
+        self.assertEqual(stats["deleted"], 7)
+        self.assertEqual(ViewHistory.objects.count(), 4)
+        daily = ViewHistoryDaily.objects.get()
+        self.assertEqual(daily.views, 10)
+        # повторный запуск не задваивает счётчики
+        compact_view_history(keep=4)
+        self.assertEqual(ViewHistoryDaily.objects.get().views, 10)
+
+    def test_late_flush_is_counted_by_next_rollup(self):
+        yesterday = timezone.now() - timedelta(days=1)
+        ViewHistory.objects.create(user=self.user, item_type="team", item_id=1, viewed_at=yesterday)
+        compact_view_history(keep=50)
+        # буфер другого воркера дописал вчерашний просмотр после свёртки
+        ViewHistory.objects.create(user=self.user, item_type="team", item_id=1, viewed_at=yesterday)
+        compact_view_history(keep=50)
+        self.assertEqual(ViewHistoryDaily.objects.get(item_id=1).views, 2)
+
+
+class TeamParticipationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.t = make_tournament(teams_count=4, name="Part")
+        self.outsider = Team.objects.create(name="Outsider", country="KZ")
+
+    def team_ids_for_game(self, game_id):
+        return {t["id"] for t in self.client.get(f"/api/teams/?game={game_id}").json()}
+
+    def test_game_filter_uses_entries_and_matches(self):
+        entrants = set(TournamentTeam.objects.filter(tournament=self.t).values_list("team_id", flat=True))
+        self.assertEqual(self.team_ids_for_game(self.t.game_id), entrants)
+
+        # команда, сыгравшая матч без заявки, тоже участник
+        match = Match.objects.create(
+            tournament=self.t, team1=self.outsider, team2_id=min(entrants),
+            match_date=timezone.now(), round="show",
+        )
+        self.assertIn(self.outsider.id, self.team_ids_for_game(self.t.game_id))
+
+        match.delete()
+        self.assertNotIn(self.outsider.id, self.team_ids_for_game(self.t.game_id))
+
+    def test_match_team_swap_and_entry_removal(self):
+        match = Match.objects.filter(tournament=self.t).first()
+        old_team = match.team1
+        TournamentTeam.objects.filter(tournament=self.t, team=old_team).delete()
+        # ещё играет матч — участие остаётся
+        self.assertTrue(TeamParticipation.objects.filter(team=old_team, tournament=self.t).exists())
+
+        match.team1 = self.outsider
+        match.save()
+        self.assertFalse(TeamParticipation.objects.filter(team=old_team, tournament=self.t).exists())
+        self.assertTrue(TeamParticipation.objects.filter(team=self.outsider, tournament=self.t).exists())
+
+    def test_rebuild_matches_incremental_state(self):
+        before = set(TeamParticipation.objects.values_list("team_id", "tournament_id", "game_id"))
+        self.assertEqual(rebuild_participation(), len(before))
+        self.assertEqual(set(TeamParticipation.objects.values_list("team_id", "tournament_id", "game_id")), before)
+
+    def test_current_tournaments(self):
+        self.t.end_date = timezone.localdate() + timedelta(days=3)
+        self.t.save()
+        team = Team.objects.filter(name__startswith="Part").first()
+        data = self.client.get(f"/api/teams/{team.id}/current_tournaments/").json()
+        self.assertEqual([t["id"] for t in data], [self.t.id])
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.t = make_tournament(teams_count=2, name="Navi")
+        Team.objects.create(name="Natus Vincere Academy", country="UA")
+        Player.objects.create(nickname="s1mple", real_name="Oleksandr", role="awp")
+
+    def test_grouped_and_ranked(self):
+        exact = Team.objects.create(name="navi", country="UA")
+        data = self.client.get("/api/search/?q=navi").json()
+
+        self.assertEqual(data["teams"][0]["id"], exact.id)
+        self.assertEqual({t["name"] for t in data["teams"]}, {"navi", "Navi team 0", "Navi team 1"})
+        self.assertEqual(len(data["matches"]), 1)
+        self.assertEqual(len(data["players"]), 2)
+
+    def test_players_by_nickname_or_real_name(self):
+        data = self.client.get("/api/search/?q=oleks").json()
+        self.assertEqual([p["nickname"] for p in data["players"]], ["s1mple"])
+
+    def test_short_query_returns_empty(self):
+        for q in ("n", "na"):
+            data = self.client.get(f"/api/search/?q={q}").json()
+            self.assertEqual(data["teams"], [])
+
+    @unittest.skipUnless(connection.vendor == "postgresql", "pg_trgm есть только в PostgreSQL")
+    def test_trigram_index_is_used(self):
+        from .search import MIN_QUERY_LENGTH, _ranked
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            self.assertIsNotNone(cursor.fetchone())
+            # на трёх строках seq scan всегда дешевле — запрещаем его,
+            # чтобы проверить, что индекс вообще применим к условию
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        qs = _ranked(Team.objects.all(), ["name"], "n" * MIN_QUERY_LENGTH)
+        self.assertIn("core_team_name_trgm", qs.explain())
+
+
+class RosterByTournamentTests(TestCase):
+    def test_single_tournament_fixed_queries(self):
+        t = make_tournament(teams_count=12, name="Roster")
+        with self.assertNumQueries(2):
+            res = APIClient().get(f"/api/tournament-teams/roster_by_tournament/?tournament_id={t.id}")
+        data = res.json()
+        self.assertEqual(len(data), 12)
+        self.assertEqual(data[0]["players"][0]["nickname"], f"{data[0]['team_name']} p1")
+
+    def test_batch_mode(self):
+        a = make_tournament(teams_count=2, name="A")
+        b = make_tournament(teams_count=4, name="B")
+        with self.assertNumQueries(2):
+            res = APIClient().get(f"/api/tournament-teams/roster_by_tournament/?tournament_ids={a.id},{b.id},999")
+        data = res.json()
+        self.assertEqual([len(data[str(a.id)]), len(data[str(b.id)]), len(data["999"])], [2, 4, 0])
+
+    def test_batch_is_capped(self):
+        from .views import MAX_ROSTER_TOURNAMENTS
+
+        ids = ",".join(str(i) for i in range(1, MAX_ROSTER_TOURNAMENTS + 2))
+        res = APIClient().get(f"/api/tournament-teams/roster_by_tournament/?tournament_ids={ids}")
+        self.assertEqual(res.status_code, 400)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.t = make_tournament(teams_count=4, name="Export")
+        make_tournament(teams_count=2, name="Other")
+        self.client = APIClient()
+
+    def test_matches_csv_streams_with_filters(self):
+        res = self.client.get(f"/api/export/matches.csv?tournament={self.t.id}")
+        self.assertTrue(res.streaming)
+        lines = b"".join(res.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(",")[:3], ["id", "tournament_id", "tournament_name"])
+        self.assertEqual(len(lines), 1 + 2)
+        self.assertIn("Export team 0", lines[1])
+
+    def test_standings_ndjson(self):
+        res = self.client.get(f"/api/export/standings.ndjson?tournament={self.t.id}")
+        rows = [json.loads(line) for line in b"".join(res.streaming_content).decode().splitlines()]
+        self.assertEqual([r["place"] for r in rows], [1, 2, 3, 4])
+
+    def test_unknown_export(self):
+        self.assertEqual(self.client.get("/api/export/users.csv").status_code, 404)
+
+    async def test_asgi_streams_chunk_by_chunk(self):
+        # синхронный итератор под ASGI Django собрал бы целиком (sync_to_async(list))
+        from unittest import mock
+
+        from django.test import AsyncClient
+
+        with mock.patch("core.views_export.CHUNK_SIZE", 1):
+            res = await AsyncClient().get(f"/api/export/matches.ndjson?tournament={self.t.id}")
+            self.assertTrue(res.is_async)
+            chunks = [chunk async for chunk in res.streaming_content]
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual([json.loads(c)["tournament_id"] for c in chunks], [self.t.id, self.t.id])
+
+
+class GroupStandingsEngineTests(TestCase):
+    def setUp(self):
+        self.game = Game.objects.create(title="Groups game", genre="RTS")
+        self.t = Tournament.objects.create(
+            name="League", game=self.game, format="groups",
+            start_date=date(2026, 2, 1), end_date=date(2026, 2, 20),
+        )
+        self.a, self.b, self.c = [Team.objects.create(name=n, country="EU") for n in ("Alpha", "Bravo", "Charlie")]
+        for team in (self.a, self.b, self.c):
+            TournamentTeam.objects.create(tournament=self.t, team=team)
+
+    def play(self, team1, team2, s1, s2):
+        m = Match.objects.create(
+            tournament=self.t, team1=team1, team2=team2, match_date=timezone.now(), round="group", status="finished",
+        )
+        winner = team1 if s1 > s2 else team2 if s2 > s1 else None
+        return MatchResult.objects.create(match=m, winner=winner, score_team1=s1, score_team2=s2)
+
+    def table(self):
+        data = APIClient().get(f"/api/standings/by_tournament/?tournament_id={self.t.id}").json()
+        return [(r["team_name"], r["place"], r["points"]) for r in data]
+
+    def test_incremental_updates_and_ranks(self):
+        self.play(self.a, self.b, 2, 0)
+        self.play(self.b, self.c, 1, 1)
+        self.assertEqual(self.table(), [("Alpha", 1, 3), ("Charlie", 2, 1), ("Bravo", 3, 1)])
+
+        # исправление результата применяет только разницу
+        r = self.play(self.c, self.a, 0, 1)
+        r.winner, r.score_team1, r.score_team2 = self.c, 3, 0
+        r.save()
+        self.assertEqual(self.table(), [("Charlie", 1, 4), ("Alpha", 2, 3), ("Bravo", 3, 1)])
+
+        r.delete()
+        self.assertEqual(self.table()[0], ("Alpha", 1, 3))
+
+    def test_cascade_delete_does_not_recreate_rows(self):
+        from django.db import connection
+
+        self.play(self.a, self.b, 2, 0)
+        self.play(self.b, self.c, 1, 1)
+        # удаление результатов каскадом: таблицу только уменьшаем, строк не вставляем
+        self.a.delete()
+        self.assertFalse(GroupStanding.objects.filter(team_id=self.a.pk).exists())
+        self.t.delete()
+        self.assertFalse(GroupStanding.objects.filter(tournament_id=self.t.pk).exists())
+        connection.check_constraints()
+
+    def test_recompute_matches_incremental(self):
+        self.play(self.a, self.b, 2, 1)
+        self.play(self.c, self.a, 2, 0)
+        fields = ("team_id", "played", "wins", "draws", "losses", "score_for", "score_against", "points", "rank")
+        incremental = sorted(GroupStanding.objects.values_list(*fields))
+
+        recompute_standings([self.t.id])
+        self.assertEqual(sorted(GroupStanding.objects.values_list(*fields)), incremental)
+
+    def test_playoff_tournament_uses_manual_places(self):
+        t = make_tournament(teams_count=2, name="Cup")
+        data = APIClient().get(f"/api/standings/by_tournament/?tournament_id={t.id}").json()
+        self.assertEqual([r["place"] for r in data], [1, 2])
+        self.assertFalse(GroupStanding.objects.filter(tournament=t).exists())
+
+
+class ScheduleGeneratorTests(TestCase):
+    def setUp(self):
+        self.game = Game.objects.create(title="Bracket game", genre="MOBA")
+        self.t = Tournament.objects.create(
+            name="Bracket", game=self.game, format="playoff",
+            start_date=date(2026, 3, 1), end_date=date(2026, 3, 10),
+        )
+        self.teams = [Team.objects.create(name=f"Seed {i}", country="EU") for i in range(1, 6)]
+        for team in self.teams:
+            TournamentTeam.objects.create(tournament=self.t, team=team)
+
+    def test_single_elimination_with_byes_and_advancement(self):
+        from .scheduling import generate_schedule
+
+        summary = generate_schedule(self.t, "single_elimination")
+        # 5 команд -> сетка на 8: 1 матч первого раунда, 2 полуфинала, финал
+        self.assertEqual((summary["rounds"], summary["matches"]), (3, 4))
+
+        first = Match.objects.get(tournament=self.t, bracket_round=1)
+        self.assertEqual({first.team1_id, first.team2_id}, {self.teams[3].id, self.teams[4].id})
+        semi = first.next_match
+        self.assertEqual(semi.round, "1/2")
+        self.assertEqual(semi.team1_id, self.teams[0].id)  # посев 1 прошёл без игры
+        self.assertIsNone(semi.team2_id)
+
+        MatchResult.objects.create(match=first, winner=self.teams[4], score_team1=0, score_team2=2)
+        semi.refresh_from_db()
+        self.assertEqual(semi.team2_id, self.teams[4].id)
+        self.assertTrue(TeamParticipation.objects.filter(tournament=self.t, team=self.teams[4]).exists())
+
+        MatchResult.objects.filter(match=first).delete()
+        semi.refresh_from_db()
+        self.assertIsNone(semi.team2_id)
+
+        data = APIClient().get(f"/api/matches/{semi.id}/").json()
+        self.assertIsNone(data["team2_name"])
+
+    def test_round_robin_every_pair_once(self):
+        from .scheduling import generate_schedule
+
+        summary = generate_schedule(self.t, "round_robin")
+        self.assertEqual((summary["rounds"], summary["matches"]), (5, 10))
+
+        pairs = [frozenset(p) for p in Match.objects.filter(tournament=self.t).values_list("team1_id", "team2_id")]
+        self.assertEqual(len(set(pairs)), 10)
+        for rnd in range(1, 6):
+            ids = list(Match.objects.filter(tournament=self.t, bracket_round=rnd).values_list("team1_id", "team2_id"))
+            flat = [x for p in ids for x in p]
+            self.assertEqual(len(flat), len(set(flat)))
+
+    def test_endpoint_is_staff_only_and_refuses_regeneration(self):
+        from django.contrib.auth import get_user_model
+
+        client = APIClient()
+        url = f"/api/tournaments/{self.t.id}/generate_schedule/"
+        self.assertIn(client.post(url, {"format": "round_robin"}, format="json").status_code, (401, 403))
+
+        admin = get_user_model().objects.create_user("boss", password="x", is_staff=True)
+        client.force_authenticate(admin)
+        seeding = [self.teams[4].id, self.teams[0].id]
+        response = client.post(url, {"format": "single_elimination", "seeding": seeding}, format="json")
+        self.assertEqual(response.status_code, 201)
+        final = Match.objects.get(tournament=self.t, round="Финал")
+        self.assertIsNone(final.next_match_id)
+
+        self.assertEqual(client.post(url, {"format": "round_robin"}, format="json").status_code, 400)
+        response = client.post(url, {"format": "round_robin", "replace": True}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Match.objects.filter(tournament=self.t).count(), 10)
+
+
+class RatingEngineTests(TestCase):
+    def setUp(self):
+        self.game = Game.objects.create(title="Rated game", genre="FPS")
+        self.t = Tournament.objects.create(
+            name="Rated", game=self.game, format="playoff",
+            start_date=date(2026, 4, 1), end_date=date(2026, 4, 10),
+        )
+        self.teams = [Team.objects.create(name=f"Rated {i}", country="EU") for i in range(4)]
+        self.start = timezone.now() - timedelta(days=30)
+        self.hour = 0
+
+    def play(self, team1, team2, s1, s2):
+        self.hour += 1
+        m = Match.objects.create(
+            tournament=self.t, team1=team1, team2=team2,
+            match_date=self.start + timedelta(hours=self.hour), round="R", status="finished",
+        )
+        winner = team1 if s1 > s2 else team2 if s2 > s1 else None
+        return MatchResult.objects.create(match=m, winner=winner, score_team1=s1, score_team2=s2)
+
+    def snapshot(self):
+        return {
+            team_id: round(rating, 6)
+            for team_id, rating in TeamRating.objects.values_list("team_id", "rating")
+        }
+
+    def test_incremental_matches_sequential_elo_and_full_recompute(self):
+        a, b, c, d = self.teams
+        games = [(a, b, 2, 0), (c, d, 1, 1), (a, c, 0, 2), (b, d, 2, 1), (a, d, 2, 1), (b, c, 0, 2)]
+        for g in games:
+            self.play(*g)
+
+        # обычный последовательный Эло как эталон
+        ratings = {t.id: INITIAL_RATING for t in self.teams}
+        for t1, t2, s1, s2 in games:
+            s = 1.0 if s1 > s2 else 0.0 if s2 > s1 else 0.5
+            delta = K_FACTOR * (s - expected(ratings[t1.id], ratings[t2.id]))
+            ratings[t1.id] += delta
+            ratings[t2.id] -= delta
+        expected_ratings = {k: round(v, 6) for k, v in ratings.items()}
+
+        self.assertEqual(self.snapshot(), expected_ratings)
+        self.assertEqual(TeamRatingHistory.objects.count(), 2 * len(games))
+
+        recompute_ratings([self.game.id])
+        self.assertEqual(self.snapshot(), expected_ratings)
+
+    def test_corrected_result_recomputes_game(self):
+        a, b, c, _ = self.teams
+        r = self.play(a, b, 2, 0)
+        self.play(a, c, 2, 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            r.winner, r.score_team1, r.score_team2 = b, 0, 2
+            r.save()
+        incremental = self.snapshot()
+
+        recompute_ratings()
+        self.assertEqual(self.snapshot(), incremental)
+        self.assertGreater(incremental[b.id], INITIAL_RATING)
+
+    def test_rolled_back_recompute_does_not_leak(self):
+        from unittest import mock
+
+        from django.db import transaction
+
+        from .ratings import schedule_recompute
+
+        with mock.patch("core.ratings.recompute_ratings") as recompute:
+            with self.captureOnCommitCallbacks(execute=True):
+                try:
+                    with transaction.atomic():
+                        schedule_recompute(-1)
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+                schedule_recompute(self.game.id)
+                schedule_recompute(self.game.id)
+        recompute.assert_called_once_with([self.game.id])
+
+    def test_result_deleted_and_recreated_in_one_transaction(self):
+        from django.db import transaction
+
+        a, b, _, _ = self.teams
+        r = self.play(a, b, 2, 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                match = r.match
+                r.delete()
+                MatchResult.objects.create(match=match, winner=b, score_team1=0, score_team2=2)
+        self.assertEqual(TeamRatingHistory.objects.filter(match=match).count(), 2)
+        incremental = self.snapshot()
+        recompute_ratings([self.game.id])
+        self.assertEqual(self.snapshot(), incremental)
+        self.assertGreater(incremental[b.id], INITIAL_RATING)
+
+    def test_rating_and_leaderboard_endpoints(self):
+        a, b, _, _ = self.teams
+        self.play(a, b, 2, 1)
+        client = APIClient()
+
+        data = client.get(f"/api/teams/{a.id}/rating/").json()
+        self.assertEqual(len(data["ratings"]), 1)
+        self.assertGreater(data["ratings"][0]["rating"], INITIAL_RATING)
+        self.assertEqual(data["history"][0]["opponent_name"], b.name)
+
+        board = client.get(f"/api/ratings/leaderboard/?game={self.game.id}").json()
+        self.assertEqual([row["team"] for row in board], [a.id, b.id])
+
+        self.play(b, a, 3, 0)
+        board = client.get(f"/api/ratings/leaderboard/?game={self.game.id}").json()
+        self.assertEqual(board[0]["team"], b.id)
+
+
+class HeadToHeadTests(TestCase):
+    def setUp(self):
+        game = Game.objects.create(title="H2H game", genre="MOBA")
+        self.t = Tournament.objects.create(
+            name="H2H", game=game, format="playoff",
+            start_date=date(2026, 5, 1), end_date=date(2026, 5, 10),
+        )
+        # id второй команды больше — проверяем обе стороны нормализованной пары
+        self.a = Team.objects.create(name="Aces", country="EU")
+        self.b = Team.objects.create(name="Bees", country="EU")
+        self.start = timezone.now() - timedelta(days=10)
+
+    def play(self, team1, team2, s1, s2, hours):
+        m = Match.objects.create(
+            tournament=self.t, team1=team1, team2=team2,
+            match_date=self.start + timedelta(hours=hours), round="R", status="finished",
+        )
+        winner = team1 if s1 > s2 else team2 if s2 > s1 else None
+        return MatchResult.objects.create(match=m, winner=winner, score_team1=s1, score_team2=s2)
+
+    def get(self, team, other):
+        return APIClient().get(f"/api/teams/{team.id}/h2h/{other.id}/").json()
+
+    def test_incremental_pair_aggregate(self):
+        self.play(self.a, self.b, 2, 1, hours=1)
+        last = self.play(self.b, self.a, 2, 0, hours=2)
+        self.play(self.a, self.b, 1, 1, hours=0)
+
+        with self.assertNumQueries(3):
+            data = self.get(self.a, self.b)
+        self.assertEqual(
+            (data["matches"], data["wins"], data["losses"], data["draws"], data["maps_won"], data["maps_lost"]),
+            (3, 1, 1, 1, 3, 4),
+        )
+        self.assertEqual(data["last_match"]["id"], last.match_id)
+        other_side = self.get(self.b, self.a)
+        self.assertEqual((other_side["wins"], other_side["maps_won"]), (1, 4))
+
+        # исправление и удаление применяют только разницу
+        last.winner, last.score_team1, last.score_team2 = self.a, 0, 2
+        last.save()
+        last.delete()
+        data = self.get(self.a, self.b)
+        self.assertEqual((data["matches"], data["wins"], data["losses"]), (2, 1, 0))
+        self.assertNotEqual(data["last_match"]["id"], last.match_id)
+
+        fields = ("team_low_id", "team_high_id", "matches", "low_wins", "high_wins", "draws",
+                  "low_maps", "high_maps", "last_match_id")
+        incremental = list(HeadToHead.objects.values_list(*fields))
+        recompute_h2h()
+        self.assertEqual(list(HeadToHead.objects.values_list(*fields)), incremental)
+
+    def test_team_delete_does_not_recreate_pair(self):
+        from django.db import connection
+
+        self.play(self.a, self.b, 2, 1, hours=1)
+        self.play(self.a, self.b, 0, 2, hours=2)
+        self.b.delete()
+        self.assertFalse(HeadToHead.objects.exists())
+        connection.check_constraints()
+
+        # последняя встреча пары удалена — строка пары тоже
+        c = Team.objects.create(name="Cats", country="EU")
+        self.play(self.a, c, 1, 0, hours=3).delete()
+        self.assertFalse(HeadToHead.objects.exists())
+
+    def test_never_met(self):
+        data = self.get(self.a, self.b)
+        self.assertEqual((data["matches"], data["last_match"]), (0, None))
+        self.assertEqual(APIClient().get(f"/api/teams/{self.a.id}/h2h/999999/").status_code, 404)
+
+
+class GenerateReportsTests(TestCase):
+    def test_unchanged_reports_are_skipped(self):
+        make_tournament(teams_count=4, name="Reports")
+        with tempfile.TemporaryDirectory() as out:
+            first = generate_reports(out, workers=2, log=lambda msg: None)
+            self.assertEqual(sorted(first["rendered"]), sorted(REPORTS))
+            for name in REPORTS:
+                self.assertTrue(os.path.exists(os.path.join(out, f"{name}.png")))
+
+            second = generate_reports(out, workers=0, log=lambda msg: None)
+            self.assertEqual((second["rendered"], sorted(second["skipped"])), ([], sorted(REPORTS)))
+
+            Team.objects.create(name="Newcomer", country="BR")
+            third = generate_reports(out, workers=0, log=lambda msg: None)
+            self.assertEqual(third["rendered"], ["teams_by_country"])
+            with open(os.path.join(out, "teams_by_country.csv"), encoding="utf-8") as f:
+                self.assertIn("BR,1", f.read())
+
+    def test_unchanged_sources_are_not_exported(self):
+        from unittest import mock
+
+        from . import reports
+
+        make_tournament(teams_count=4, name="Reports")
+        with tempfile.TemporaryDirectory() as out:
+            generate_reports(out, workers=0, log=lambda msg: None)
+            with mock.patch.object(reports, "export_rows", wraps=reports.export_rows) as export:
+                generate_reports(out, workers=0, log=lambda msg: None)
+                self.assertEqual(export.call_count, 0)
+
+                Team.objects.create(name="Newcomer", country="BR")
+                result = generate_reports(out, workers=0, log=lambda msg: None)
+            exported = sorted(call.args[0].name for call in export.call_args_list)
+            self.assertEqual(exported, ["participation", "teams_by_country"])
+            self.assertEqual(result["rendered"], ["teams_by_country"])
+
+
+FAKE_PG_DUMP = """
+import os, sys
+args = sys.argv[1:]
+payload = b"PGDMP" + os.urandom(1024) * 64
+if "-f" in args:
+    target = args[args.index("-f") + 1]
+    os.makedirs(target)
+    with open(os.path.join(target, "toc.dat"), "wb") as f:
+        f.write(payload)
+else:
+    sys.stdout.buffer.write(payload)
+"""
+
+FAKE_PG_RESTORE = """
+import os, sys
+args = sys.argv[1:]
+if args[-1] != "--list":
+    data = open(os.path.join(args[-1], "toc.dat"), "rb").read()
+else:
+    data = sys.stdin.buffer.read()
+if not data.startswith(b"PGDMP"):
+    sys.stderr.write("input file does not appear to be a valid archive")
+    sys.exit(1)
+print("; Archive created by fake pg_dump")
+print("1; 0 0 TABLE public core_team admin")
+print("2; 0 0 TABLE DATA public core_team admin")
+"""
+
+
+class BackupTests(TestCase):
+    def runner(self, dump=FAKE_PG_DUMP):
+        import sys
+        from .backup import LocalRunner
+
+        return LocalRunner(programs={
+            "pg_dump": [sys.executable, "-c", dump],
+            "pg_restore": [sys.executable, "-c", FAKE_PG_RESTORE],
+        })
+
+    def test_stream_gzip_and_verify(self):
+        from .backup import stream_dump, verify_stream
+
+        with tempfile.TemporaryDirectory() as out:
+            result = stream_dump(self.runner(), "esports", "admin", os.path.join(out, "db.backup.gz"))
+            self.assertEqual(result.dump_bytes, 5 + 1024 * 64)
+            self.assertEqual(verify_stream(self.runner(), result.path), 2)
+
+    def test_directory_mode(self):
+        from .backup import directory_dump
+
+        with tempfile.TemporaryDirectory() as out:
+            result = directory_dump(self.runner(), "esports", "admin", os.path.join(out, "db.dir"), jobs=2)
+            self.assertEqual(result.entries, 2)
+            self.assertTrue(os.path.exists(os.path.join(out, "db.dir", "toc.dat")))
+
+    def test_failed_dump_leaves_no_file(self):
+        from .backup import BackupError, stream_dump
+
+        with tempfile.TemporaryDirectory() as out:
+            path = os.path.join(out, "db.backup")
+            with self.assertRaises(BackupError):
+                stream_dump(self.runner(dump="import sys; sys.exit(3)"), "esports", "admin", path, compress="none")
+            self.assertFalse(os.path.exists(path))
+
+
+class SeedBulkTests(TestCase):
+    def test_tiny_preset_is_consistent(self):
+        from .seeding import PRESETS, BulkSeeder, rebuild_derived
+
+        counts = BulkSeeder(seed=7, log=lambda msg: None, **PRESETS["tiny"]).run()
+        rebuild_derived(log=lambda msg: None)
+
+        self.assertEqual(Team.objects.count(), 60)
+        self.assertEqual(Match.objects.count(), counts["matches"])
+        finished = Tournament.objects.filter(status="finished")
+        # у завершённых турниров: все матчи сыграны, места у всех участников
+        self.assertFalse(Match.objects.filter(tournament__in=finished, result__isnull=True).exists())
+        self.assertEqual(
+            Standing.objects.filter(tournament__in=finished).count(),
+            TournamentTeam.objects.filter(tournament__in=finished).count(),
+        )
+        self.assertEqual(TeamParticipation.objects.count(), TournamentTeam.objects.count())
+        if counts["results"]:
+            self.assertTrue(TeamRating.objects.exists())
+
+        # новые строки после явных id получают следующий свободный id
+        team = Team.objects.create(name="After seed", country="RU")
+        self.assertGreater(team.id, 60)
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        from .metrics import reset_metrics
+
+        reset_metrics()
+        self.team = make_tournament(teams_count=2).tournament_teams.first().team
+        self.client = APIClient()
+
+    def test_server_timing_and_prometheus_series(self):
+        from django.contrib.auth import get_user_model
+
+        response = self.client.get(f"/api/teams/{self.team.id}/recent_matches/")
+        self.assertEqual(response.status_code, 200)
+        timing = response["Server-Timing"]
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn("serialize;dur=", timing)
+        self.assertIn("total;dur=", timing)
+
+        admin = get_user_model().objects.create_user("metrics", password="x", is_staff=True)
+        self.client.force_authenticate(admin)
+        body = self.client.get("/api/admin/metrics/").content.decode()
+        self.assertIn('http_requests_total{view="TeamViewSet.recent_matches",method="GET",status="200"} 1', body)
+        self.assertIn('http_request_sql_queries_count{view="TeamViewSet.recent_matches",method="GET"} 1', body)
+
+    def test_labels_are_bounded_and_uniform(self):
+        from .metrics import render_prometheus
+
+        self.client.generic("FOO", f"/api/teams/{self.team.id}/recent_matches/")
+        self.client.get(f"/api/async/teams/{self.team.id}/history/")
+        body = render_prometheus()
+        self.assertNotIn("FOO", body)
+        self.assertNotIn(".foo", body)
+        self.assertIn('view="TeamViewSet.other",method="other"', body)
+        self.assertIn('view="views_async.team_history_view",method="GET"', body)
+
+    async def test_server_timing_counts_queries_under_asgi(self):
+        # ORM под ASGI работает в других потоках, на их соединениях
+        from django.test import AsyncClient
+
+        client = AsyncClient()
+        for url in (f"/api/async/teams/{self.team.id}/recent_matches/", f"/api/teams/{self.team.id}/history/"):
+            response = await client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertRegex(response["Server-Timing"], r'desc="[1-9]\d* queries"')
+
+    def test_metrics_endpoint_is_staff_only(self):
+        from django.contrib.auth import get_user_model
+
+        user = get_user_model().objects.create_user("plain", password="x")
+        self.client.force_authenticate(user)
+        self.assertEqual(self.client.get("/api/admin/metrics/").status_code, 403)
+
+
+class BulkImportTests(TestCase):
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+
+        game = Game.objects.create(title="Import game", genre="FPS")
+        self.t = Tournament.objects.create(
+            name="Imported", game=game, start_date=date(2026, 2, 1), end_date=date(2026, 2, 3),
+            format="playoff", status="finished",
+        )
+        Team.objects.create(name="Alpha", country="SE")
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user("loader", password="x", is_staff=True))
+        self.bundle = {
+            "entrants": [{"name": "Alpha"}, {"name": "Bravo", "country": "DK"}, {"name": "Charlie"}, {"name": "Delta"}],
+            "matches": [
+                {"key": "sf1", "team1": "Alpha", "team2": "Delta", "match_date": "2026-02-01T12:00",
+                 "round": "1/2", "next_match": "final", "next_match_slot": 1},
+                {"key": "sf2", "team1": "Bravo", "team2": "Charlie", "match_date": "2026-02-01T15:00",
+                 "round": "1/2", "next_match": "final", "next_match_slot": 2},
+                {"key": "final", "team1": "Alpha", "team2": "Bravo", "match_date": "2026-02-03", "round": "Финал"},
+            ],
+            "results": [
+                {"match": "sf1", "score_team1": 2, "score_team2": 0},
+                {"match": "sf2", "winner": "Bravo", "score_team1": 2, "score_team2": 1},
+                {"match": "final", "score_team1": 1, "score_team2": 3},
+            ],
+            "standings": [{"team": "Bravo", "place": 1}, {"team": "Alpha", "place": 2}],
+        }
+
+    def test_import_and_reimport_upserts(self):
+        url = f"/api/tournaments/{self.t.id}/import/"
+        summary = self.client.post(url, self.bundle, format="json").json()
+        self.assertEqual((summary["teams_created"], summary["matches_created"], summary["results"]), (3, 3, 3))
+
+        final = Match.objects.get(tournament=self.t, external_id="final")
+        self.assertEqual(final.status, "finished")
+        self.assertEqual(final.result.winner.name, "Bravo")  # по счёту
+        self.assertEqual(Match.objects.get(external_id="sf2").next_match_id, final.id)
+        self.assertEqual(Team.objects.get(name="Alpha").country, "SE")  # существующая не тронута
+        self.assertEqual(TeamParticipation.objects.filter(tournament=self.t).count(), 4)
+        self.assertEqual(TeamRating.objects.filter(game=self.t.game).count(), 4)
+        self.assertTrue(HeadToHead.objects.exists())
+
+        self.bundle["results"][2] = {"match": "final", "score_team1": 3, "score_team2": 2}
+        self.bundle["standings"] = [{"team": "Alpha", "place": 1}, {"team": "Bravo", "place": 2}]
+        summary = self.client.post(url, self.bundle, format="json").json()
+        self.assertEqual((summary["matches_created"], summary["matches_updated"]), (0, 3))
+        self.assertEqual(Match.objects.filter(tournament=self.t).count(), 3)
+        self.assertEqual(MatchResult.objects.get(match__external_id="final").winner.name, "Alpha")
+        self.assertEqual(Standing.objects.get(tournament=self.t, place=1).team.name, "Alpha")
+
+    def test_row_errors_reject_whole_bundle(self):
+        self.bundle["matches"][1]["team2"] = "Nobody"
+        self.bundle["results"][0]["winner"] = "Charlie"
+        self.bundle["standings"][1]["place"] = "first"
+        response = self.client.post(f"/api/tournaments/{self.t.id}/import/", self.bundle, format="json")
+        self.assertEqual(response.status_code, 400)
+        errors = {(e["section"], e["row"]): e["errors"] for e in response.json()["errors"]}
+        self.assertIn("team2", errors[("matches", 2)])
+        self.assertIn("winner", errors[("results", 1)])
+        self.assertIn("place", errors[("standings", 2)])
+        self.assertFalse(Match.objects.filter(tournament=self.t).exists())
+        self.assertFalse(Team.objects.filter(name="Bravo").exists())
+
+        anonymous = APIClient().post(f"/api/tournaments/{self.t.id}/import/", self.bundle, format="json")
+        self.assertIn(anonymous.status_code, (401, 403))
+
+    def test_command_imports_csv_sections(self):
+        from django.core.management import call_command
+
+        files = {
+            "entrants": "name,country\nAlpha,\nBravo,DK\n",
+            "matches": "key,team1,team2,match_date,round\nm1,Alpha,Bravo,2026-02-01T12:00,Финал\n",
+            "results": "match,winner,score_team1,score_team2\nm1,Alpha,2,1\n",
+        }
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = {}
+            for section, text in files.items():
+                paths[section] = os.path.join(tmp, f"{section}.csv")
+                with open(paths[section], "w", encoding="utf-8") as f:
+                    f.write(text)
+            call_command("import_tournament", self.t.id, stdout=open(os.devnull, "w"), **paths)
+        self.assertEqual(MatchResult.objects.get(match__external_id="m1").winner.name, "Alpha")
+
+    def derived(self):
+        return (
+            sorted(TeamRating.objects.values_list("team_id", "rating", "matches", "last_match_date")),
+            sorted(TeamRatingHistory.objects.values_list("match_id", "team_id", "rating_before", "rating_after")),
+            sorted(HeadToHead.objects.values_list(
+                "team_low_id", "team_high_id", "matches", "low_wins", "high_wins", "draws",
+                "low_maps", "high_maps", "last_match_id",
+            )),
+        )
+
+    def test_rebuild_limited_to_tournament_matches_full_recompute(self):
+        # матчи игры до и после турнира: рейтинги пересчитываются с даты
+        # турнира, h2h — разницей, итог как у полного пересчёта
+        alpha = Team.objects.get(name="Alpha")
+        echo = Team.objects.create(name="Echo", country="FI")
+        around = Tournament.objects.create(
+            name="Around", game=self.t.game, start_date=date(2026, 1, 1), end_date=date(2026, 3, 1),
+            format="playoff", status="finished",
+        )
+        for day, winner in ((10, alpha), (40, echo)):
+            m = Match.objects.create(
+                tournament=around, team1=alpha, team2=echo, round="bo3", status="finished",
+                match_date=timezone.make_aware(timezone.datetime(2026, 1, 1)) + timedelta(days=day),
+            )
+            MatchResult.objects.create(match=m, winner=winner, score_team1=2, score_team2=1)
+
+        url = f"/api/tournaments/{self.t.id}/import/"
+        for final in ({"score_team1": 1, "score_team2": 3}, {"score_team1": 3, "score_team2": 2}):
+            self.bundle["results"][2] = {"match": "final", **final}
+            self.assertEqual(self.client.post(url, self.bundle, format="json").status_code, 200)
+            incremental = self.derived()
+            recompute_ratings([self.t.game_id])
+            recompute_h2h()
+            self.assertEqual(incremental, self.derived())
+
+
+class AsyncReadViewTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.t = make_tournament(teams_count=6, name="Async")
+        self.team = Team.objects.get(name="Async team 0")
+        Match.objects.create(
+            tournament=self.t, team1=self.team, team2=Team.objects.get(name="Async team 1"),
+            match_date=timezone.now() + timedelta(days=1), round="Финал", status="scheduled",
+        )
+        rebuild_participation()
+        recompute_ratings()
+        recompute_h2h()
+
+    def assertSameBody(self, path):
+        sync = self.client.get(f"/api{path}")
+        async_ = self.client.get(f"/api/async{path}")
+        self.assertEqual(sync.status_code, async_.status_code, path)
+        # ссылки пагинации ведут каждая на свой префикс
+        self.assertEqual(sync.content, async_.content.replace(b"/api/async/", b"/api/"), path)
+
+    def test_same_output_as_sync_views(self):
+        other = Team.objects.get(name="Async team 1")
+        for path in (
+            f"/tournaments/{self.t.id}/page/",
+            "/tournaments/current/",
+            "/tournaments/upcoming/",
+            "/matches/upcoming/?expand=team1&fields=id,team1.name",
+            f"/teams/{self.team.id}/roster/",
+            f"/teams/{self.team.id}/current_tournaments/",
+            f"/teams/{self.team.id}/history/",
+            f"/teams/{self.team.id}/recent_matches/?limit=5",
+            f"/teams/{self.team.id}/rating/",
+            f"/teams/{self.team.id}/h2h/{other.id}/",
+            "/teams/999999/roster/",
+            "/tournaments/999999/page/",
+        ):
+            self.assertSameBody(path)
+
+    def test_tournament_list_pages_and_cache(self):
+        for i in range(3):
+            Tournament.objects.create(
+                name=f"Extra {i}", game=self.t.game, start_date=date(2026, 2, 1 + i),
+                end_date=date(2026, 2, 5 + i), format="playoff", status="upcoming",
+            )
+        url = "/tournaments/?page_size=2&fields=id,name"
+        sync = self.client.get(f"/api{url}").json()
+        first = self.client.get(f"/api/async{url}")
+        self.assertEqual(first.json()["results"], sync["results"])
+        self.assertEqual(first.json()["next"], sync["next"].replace("/api/", "/api/async/"))
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertIn("db;dur=", first["Server-Timing"])
+
+        # следующая страница по курсору — как у синхронного списка
+        cursor = sync["next"].split("?", 1)[1]
+        self.assertSameBody(f"/tournaments/?{cursor}")
+
+        with self.assertNumQueries(0):
+            second = self.client.get(f"/api/async{url}", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 304)
+
+        self.assertEqual(self.client.get("/api/async/tournaments/?cursor=broken").status_code, 404)
+        self.assertEqual(self.client.post("/api/async/tournaments/").status_code, 405)
+
+    async def test_asgi_handler_without_sync_fallbacks(self):
+        # через ASGIHandler: ленивый запрос из сериализатора упал бы с SynchronousOnlyOperation
+        from django.test import AsyncClient
+
+        client = AsyncClient()
+        page = await client.get(f"/api/async/tournaments/{self.t.id}/page/")
+        self.assertEqual(page.status_code, 200)
+        self.assertEqual(len(page.json()["matches"]), 4)
+        recent = await client.get(f"/api/async/teams/{self.team.id}/recent_matches/")
+        self.assertEqual({m["team2_name"] for m in recent.json()["matches"]}, {"Async team 1"})
+        self.assertIn("queries", recent["Server-Timing"])
+
+    def test_limit_is_validated_and_capped(self):
+        from unittest import mock
+
+        from .views import RECENT_MATCHES_LIMIT, team_recent_matches
+
+        for prefix in ("/api", "/api/async"):
+            for path in (f"/teams/{self.team.id}/recent_matches/", "/matches/upcoming/"):
+                self.assertEqual(self.client.get(f"{prefix}{path}?limit=abc").status_code, 400)
+                self.assertEqual(self.client.get(f"{prefix}{path}?limit=-1").status_code, 200)
+        for module, prefix in (("views", "/api"), ("views_async", "/api/async")):
+            with mock.patch(f"core.{module}.team_recent_matches", wraps=team_recent_matches) as spy:
+                self.client.get(f"{prefix}/teams/{self.team.id}/recent_matches/?limit=100000")
+            self.assertEqual(spy.call_args.args[1], RECENT_MATCHES_LIMIT)
+
+
+    async def test_file_backend_from_event_loop(self):
+        # файловый кэш читается в потоке, результат тот же, что у locmem
+        from django.test import AsyncClient
+
+        client = AsyncClient()
+        url = f"/api/async/teams/{self.team.id}/recent_matches/"
+        with tempfile.TemporaryDirectory() as tmp:
+            with override_settings(RESPONSE_CACHE={"BACKEND": "file", "LOCATION": tmp}):
+                first = await client.get(url)
+                second = await client.get(url)
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.content, first.content)
+
+
+@override_settings(LIVE_FEED={"MAX_CONNECTIONS": 2, "QUEUE_SIZE": 2, "KEEPALIVE": 1, "MAX_DURATION": 5})
+class LiveFeedTests(TestCase):
+    def setUp(self):
+        from .live import get_broadcaster
+
+        self.t = make_tournament(teams_count=4, name="Live")
+        self.match = Match.objects.filter(tournament=self.t).order_by("id").first()
+        self.broadcaster = get_broadcaster()
+
+    def tearDown(self):
+        for sub in list(self.broadcaster._subscribers):
+            self.broadcaster.unsubscribe(sub)
+
+    def events(self, sub):
+        out = []
+        for chunk in sub.drain():
+            lines = dict(line.split(": ", 1) for line in chunk.decode().strip().split("\n"))
+            out.append((lines["event"], json.loads(lines["data"])))
+        return out
+
+    def test_changes_reach_only_matching_subscribers(self):
+        mine = self.broadcaster.subscribe({"team": {self.match.team1_id}})
+        other = self.broadcaster.subscribe({"tournament": {self.t.id + 1000}})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = self.match.result
+            result.score_team1, result.score_team2 = 2, 0
+            result.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            Match.objects.get(pk=self.match.pk).save()  # статус не менялся — события нет
+
+        events = self.events(mine)
+        self.assertEqual([name for name, _ in events], ["match"])
+        self.assertEqual(events[0][1]["result"]["score_team1"], 2)
+        self.assertEqual(events[0][1]["team1_name"], self.match.team1.name)
+        self.assertEqual(self.events(other), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Match.objects.filter(pk=self.match.pk).get().delete()
+        self.assertEqual([name for name, _ in self.events(mine)], ["match_deleted"])
+
+    def test_no_subscribers_no_work(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.match.status = "live"
+            self.match.save()
+        self.assertFalse([c for c in callbacks if "publish_match" in c.__qualname__])
+
+    def test_stream_backpressure_and_connection_cap(self):
+        client = APIClient()
+        first = client.get("/api/live/matches/?team=%d" % self.match.team1_id)
+        self.assertEqual(first["Content-Type"], "text/event-stream")
+        stream = iter(first.streaming_content)
+        self.assertEqual(next(stream), b"retry: 3000\n\n")
+
+        second = client.get("/api/live/matches/")
+        self.assertEqual(next(iter(second.streaming_content)), b"retry: 3000\n\n")
+        over = client.get("/api/live/matches/")
+        self.assertEqual(over.status_code, 503)
+        self.assertIn("Retry-After", over)
+        self.assertEqual(client.get("/api/live/matches/?team=abc").status_code, 400)
+
+        # медленный клиент: очередь переполнилась — вместо событий resync
+        for status in ("live", "finished", "live"):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.match.status = status
+                self.match.save()
+        self.assertIn(b"event: resync", next(stream))
+        self.assertEqual(next(stream), b": keepalive\n\n")
+
+        first.close()
+        second.close()
+        self.assertEqual(self.broadcaster.subscriber_count(), 0)
+
+    async def test_asgi_stream_wakes_on_publish_from_other_thread(self):
+        import asyncio
+        from django.test import AsyncClient
+
+        response = await AsyncClient().get(f"/api/live/matches/?match={self.match.pk}")
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b"retry: 3000\n\n")
+
+        keys = {"match": {self.match.pk}}
+        await asyncio.to_thread(self.broadcaster.publish, "match", {"id": self.match.pk}, keys)
+        chunk = await asyncio.wait_for(anext(stream), 0.5)
+        self.assertIn(b"event: match", chunk)
+        response.close()
+        self.assertEqual(self.broadcaster.subscriber_count(), 0)
+
+
+class FastJSONRendererTests(TestCase):
+    def test_same_bytes_as_drf_renderer(self):
+        from datetime import datetime, time as dt_time, timezone as dt_timezone
+        from decimal import Decimal
+
+        from django.utils.translation import gettext_lazy
+        from rest_framework.renderers import JSONRenderer
+
+        from .renderers import FastJSONRenderer
+
+        data = {
+            "prize_pool": Decimal("250000.50"),
+            "match_date": datetime(2026, 3, 1, 18, 30, 15, 123456, tzinfo=dt_timezone.utc),
+            "start_date": date(2026, 3, 1),
+            "at": dt_time(18, 30),
+            "name": "Кубок\u2028финал",
+            "label": gettext_lazy("Finished"),
+            "rounds": (1, 2),
+            7: [None, True, 1.5],
+        }
+        drf, fast = JSONRenderer(), FastJSONRenderer()
+        self.assertEqual(fast.render(data), drf.render(data))
+        self.assertEqual(fast.render({"big": 2 ** 70}), drf.render({"big": 2 ** 70}))
+        indented = "application/json; indent=2"
+        self.assertEqual(fast.render(data, indented), drf.render(data, indented))
+
+        t = make_tournament(teams_count=4, name="Render")
+        response = APIClient().get(f"/api/tournaments/{t.id}/page/")
+        self.assertEqual(response.content, drf.render(response.json()))
+
+
+class CompressionTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.t = make_tournament(teams_count=8, name="Compress")
+        self.url = f"/api/tournaments/{self.t.id}/page/"
+
+    def test_negotiates_encoding(self):
+        import brotli
+        import gzip
+
+        plain = self.client.get(self.url)
+        self.assertFalse(plain.has_header("Content-Encoding"))
+        self.assertIn("Accept-Encoding", plain["Vary"])
+        self.assertGreater(len(plain.content), 1024)
+
+        br = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip, deflate, br")
+        self.assertEqual(br["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(br.content), plain.content)
+        self.assertEqual(br["Content-Length"], str(len(br.content)))
+
+        gz = self.client.get(self.url, HTTP_ACCEPT_ENCODING="br;q=0, gzip;q=0.5")
+        self.assertEqual(gz["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(gz.content), plain.content)
+
+        self.assertFalse(self.client.get(self.url, HTTP_ACCEPT_ENCODING="identity").has_header("Content-Encoding"))
+
+    def test_threshold_streaming_and_etag(self):
+        small = self.client.get(f"/api/games/{self.t.game_id}/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(small.has_header("Content-Encoding"))
+        export = self.client.get("/api/export/matches.csv", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertTrue(export.streaming)
+        self.assertFalse(export.has_header("Content-Encoding"))
+
+        first = self.client.get(self.url, HTTP_ACCEPT_ENCODING="br")
+        self.assertTrue(first["ETag"].startswith('W/"'))
+        self.assertIn("compress;dur=", first["Server-Timing"])
+        again = self.client.get(self.url, HTTP_ACCEPT_ENCODING="br", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, 304)
+        # HIT из кэша ответов: сжатое тело из LRU, без повторного сжатия
+        hit = self.client.get(self.url, HTTP_ACCEPT_ENCODING="br")
+        self.assertEqual(hit["X-Cache"], "HIT")
+        self.assertEqual(hit.content, first.content)
+        self.assertNotIn("compress;dur=", hit["Server-Timing"])
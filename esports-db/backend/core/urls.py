@@ -3,8 +3,11 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     GameViewSet, TournamentViewSet, TeamViewSet, PlayerViewSet,
     MatchViewSet, StandingViewSet, TournamentTeamViewSet,
-    PopularTeamsReport, TournamentsByGameReport
+    PopularTeamsReport, TournamentsByGameReport, SearchView, RatingLeaderboardView,
 )
+from .views_export import ExportView
+from . import views_async
+from .live import live_matches
 
 router = DefaultRouter()
 router.register(r"games", GameViewSet)
@@ -16,7 +19,26 @@ router.register(r"standings", StandingViewSet)
 router.register(r"tournament-teams", TournamentTeamViewSet)
 
 urlpatterns = router.urls + [
+    path("search/", SearchView.as_view()),
+    path("ratings/leaderboard/", RatingLeaderboardView.as_view()),
+    path("export/<slug:dataset>.<slug:fmt>", ExportView.as_view()),
+    path("live/matches/", live_matches),
     path("reports/popular-teams/", PopularTeamsReport.as_view()),
     path("reports/tournaments-by-game/", TournamentsByGameReport.as_view()),
 ]
 
+# async-версии горячих GET-эндпоинтов (для ASGI), выдача как у синхронных
+urlpatterns += [
+    path("async/tournaments/", views_async.tournament_list),
+    path("async/tournaments/current/", views_async.tournament_current),
+    path("async/tournaments/upcoming/", views_async.tournament_upcoming),
+    path("async/tournaments/<int:pk>/page/", views_async.tournament_page),
+    path("async/matches/upcoming/", views_async.match_upcoming),
+    path("async/teams/<int:pk>/roster/", views_async.team_roster_view),
+    path("async/teams/<int:pk>/current_tournaments/", views_async.team_current_tournaments_view),
+    path("async/teams/<int:pk>/history/", views_async.team_history_view),
+    path("async/teams/<int:pk>/recent_matches/", views_async.team_recent_matches_view),
+    path("async/teams/<int:pk>/rating/", views_async.team_rating_view),
+    path("async/teams/<int:pk>/h2h/<int:other_id>/", views_async.team_h2h_view),
+]
+
@@ -11,6 +11,7 @@ from .views_auth import (
     FavoriteTeamDeleteView,
     ViewHistoryView,
     AdminDashboardView,
+    MetricsView,
     ApproveTeamView,
 )
 
@@ -30,6 +31,7 @@ urlpatterns = [
 
     # admin cabinet
     path("admin/dashboard/", AdminDashboardView.as_view()),
+    path("admin/metrics/", MetricsView.as_view()),
     path("admin/teams/<int:team_id>/approve/", ApproveTeamView.as_view()),
 ]
 
@@ -0,0 +1,178 @@
+"""
+История просмотров: буфер записи и компактизация.
+
+ViewHistoryBuffer копит просмотры в памяти процесса, схлопывая повторные
+просмотры одного объекта одним пользователем (остаётся последнее время),
+и пишет их одним bulk_create — по размеру буфера или по времени.
+
+compact_view_history() — ретеншн: сворачивает завершённые дни в дневные
+счётчики (ViewHistoryDaily) и оставляет каждому пользователю только
+последние N записей. Последние RECOUNT_DAYS дней пересчитываются при
+каждом запуске и не чистятся: буфер другого воркера может дописать
+вчерашние просмотры уже после свёртки.
+"""
+import atexit
+import threading
+import time
+from datetime import datetime, time as dt_time, timedelta
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connection, transaction
+from django.db.models import Count, F, Max, Window
+from django.db.models.functions import RowNumber, TruncDate
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import ViewHistory, ViewHistoryDaily
+
+RECOUNT_DAYS = 2
+
+
+class ViewHistoryBuffer:
+    def __init__(self, max_size=500, max_age=5.0):
+        self.max_size = max_size
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._pending = {}  # (user_id, item_type, item_id) -> viewed_at
+        self._timer = None
+
+    def add(self, user_id, item_type, item_id, viewed_at=None):
+        viewed_at = viewed_at or timezone.now()
+        with self._lock:
+            self._pending[(user_id, item_type, item_id)] = viewed_at
+            full = len(self._pending) >= self.max_size
+            if not full and self._timer is None:
+                # таймер на случай, если после этого просмотра трафика не будет
+                self._timer = threading.Timer(self.max_age, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def pending_count(self):
+        return len(self._pending)
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not pending:
+            return 0
+
+        rows = [
+            ViewHistory(user_id=user_id, item_type=item_type, item_id=item_id, viewed_at=viewed_at)
+            for (user_id, item_type, item_id), viewed_at in pending.items()
+        ]
+        ViewHistory.objects.bulk_create(rows, batch_size=500)
+        return len(rows)
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        finally:
+            # у потока таймера своё соединение — не оставляем его висеть
+            connection.close()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_history_buffer():
+    """
+    Буфер по settings.VIEW_HISTORY_BUFFER или None (писать сразу).
+    """
+    global _buffer
+    conf = getattr(settings, "VIEW_HISTORY_BUFFER", {})
+    if not conf.get("ENABLED", True):
+        return None
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = ViewHistoryBuffer(
+                    max_size=conf.get("MAX_SIZE", 500),
+                    max_age=conf.get("MAX_AGE", 5.0),
+                )
+                atexit.register(_buffer.flush)
+    return _buffer
+
+
+@receiver(setting_changed)
+def _reset_buffer(setting, **kwargs):
+    global _buffer
+    if setting == "VIEW_HISTORY_BUFFER":
+        if _buffer is not None:
+            _buffer.flush()
+        _buffer = None
+
+
+def rollup_daily(today=None):
+    """
+    Дневные счётчики по завершённым дням: последние RECOUNT_DAYS —
+    заново (upsert перезаписывает счётчик, повтор безопасен), более
+    ранние — только ещё не свёрнутые. Сегодняшний день не трогаем — он
+    ещё дописывается.
+    """
+    today = today or timezone.localdate()
+    last_day = ViewHistoryDaily.objects.aggregate(last=Max("day"))["last"]
+
+    qs = ViewHistory.objects.annotate(day=TruncDate("viewed_at")).filter(day__lt=today)
+    if last_day is not None:
+        qs = qs.filter(day__gt=min(last_day, today - timedelta(days=RECOUNT_DAYS + 1)))
+
+    rows = [
+        ViewHistoryDaily(day=r["day"], item_type=r["item_type"], item_id=r["item_id"], views=r["views"])
+        for r in qs.values("day", "item_type", "item_id").annotate(views=Count("id")).iterator(chunk_size=2000)
+    ]
+    ViewHistoryDaily.objects.bulk_create(
+        rows,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=["day", "item_type", "item_id"],
+        update_fields=["views"],
+    )
+    return len(rows)
+
+
+def prune_history(keep=50, today=None, batch_size=5000):
+    """
+    Оставляет каждому пользователю последние `keep` записей. Удаляем только
+    то, что свёрнуто окончательно: дни до окна пересчёта RECOUNT_DAYS.
+    """
+    today = today or timezone.localdate()
+    day_start = timezone.make_aware(datetime.combine(today - timedelta(days=RECOUNT_DAYS), dt_time.min))
+
+    # ранжируем по всем записям пользователя, включая сегодняшние,
+    # а ограничение по дате накладываем снаружи
+    ranked = (
+        ViewHistory.objects
+        .annotate(rn=Window(RowNumber(), partition_by=[F("user_id")], order_by=F("viewed_at").desc()))
+        .filter(rn__gt=keep)
+        .values("id")
+    )
+    candidates = ViewHistory.objects.filter(id__in=ranked, viewed_at__lt=day_start).values_list("id", flat=True)
+
+    # ранги оставшихся строк удаление не меняет, поэтому просто
+    # берём следующую пачку, пока она не опустеет
+    deleted = 0
+    while True:
+        batch = list(candidates[:batch_size])
+        if not batch:
+            break
+        deleted += ViewHistory.objects.filter(id__in=batch).delete()[0]
+    return deleted
+
+
+def compact_view_history(keep=50, today=None):
+    buffer = get_history_buffer()
+    if buffer is not None:
+        buffer.flush()
+
+    started = time.monotonic()
+    with transaction.atomic():
+        rolled = rollup_daily(today=today)
+        deleted = prune_history(keep=keep, today=today)
+    return {"rolled_up": rolled, "deleted": deleted, "seconds": round(time.monotonic() - started, 3)}
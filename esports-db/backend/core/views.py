@@ -1,12 +1,25 @@
+from datetime import timedelta
+
 from django.utils import timezone
-from django.db.models import Q, Count
+from django.utils.dateparse import parse_datetime
+from django.db.models import Q, Count, Exists, OuterRef
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import SAFE_METHODS, BasePermission
 
-from .models import Game, Tournament, Team, Player, Match, Standing, TournamentTeam
+from .models import (
+    Game, Tournament, Team, Player, Match, MatchResult, Standing, TournamentTeam, TeamParticipation,
+    GroupStanding, TeamRating, TeamRatingHistory, HeadToHead,
+)
+from .importing import BundleError, import_bundle, load_json, read_csv
+from .scheduling import ScheduleError, generate_schedule
+from .pagination import MatchCursorPagination, TournamentCursorPagination
+from .response_cache import CachedReadMixin, tournament_scopes
+from .fieldsets import SparseFieldsetViewMixin
+from .h2h import h2h_for
+from .search import search
 from .serializers import (
     GameSerializer,
     TournamentSerializer,
@@ -16,6 +29,9 @@ from .serializers import (
     StandingSerializer,
     TournamentTeamSerializer,
     TournamentDetailSerializer,
+    GroupStandingSerializer,
+    TeamRatingSerializer,
+    TeamRatingHistorySerializer,
 )
 
 
@@ -37,84 +53,329 @@ def _q_status_iexact(field: str, values):
     return q
 
 
-class GameViewSet(viewsets.ModelViewSet):
+def filter_matches(qs, params):
+    """
+    Фильтры списка матчей (?tournament, team, status, date_from, date_to, q).
+    Общие для MatchViewSet и выгрузок (views_export.py).
+    """
+    tournament_id = params.get("tournament")
+    if tournament_id:
+        qs = qs.filter(tournament_id=tournament_id)
+
+    team_id = params.get("team")
+    if team_id:
+        qs = qs.filter(Q(team1_id=team_id) | Q(team2_id=team_id))
+
+    status = params.get("status")
+    if status:
+        qs = qs.filter(status=status)
+
+    date_from = params.get("date_from")
+    if date_from:
+        qs = qs.filter(match_date__date__gte=date_from)
+
+    date_to = params.get("date_to")
+    if date_to:
+        qs = qs.filter(match_date__date__lte=date_to)
+
+    q = params.get("q")
+    if q:
+        qs = qs.filter(Q(team1__name__icontains=q) | Q(team2__name__icontains=q))
+
+    return qs
+
+
+def filter_tournaments(qs, params):
+    """Фильтры списка турниров (?game_id, status, date_from, date_to); общие с views_async.py."""
+    game_id = params.get("game_id")
+    if game_id:
+        qs = qs.filter(game_id=game_id)
+
+    status_ = params.get("status")
+    if status_:
+        qs = qs.filter(status=status_)
+
+    date_from = params.get("date_from")
+    if date_from:
+        qs = qs.filter(end_date__gte=date_from)
+
+    date_to = params.get("date_to")
+    if date_to:
+        qs = qs.filter(start_date__lte=date_to)
+
+    return qs
+
+
+CURRENT_TOURNAMENT_STATUSES = [
+    "running",
+    "идёт", "идет",
+    "ongoing", "in_progress", "active",
+]
+UPCOMING_TOURNAMENT_STATUSES = [
+    "registration",
+    "регистрация",
+    "upcoming", "soon",
+]
+SCHEDULED_MATCH_STATUSES = [
+    "scheduled",
+    "запланирован", "запланировано", "ожидается",
+    "upcoming", "planned",
+]
+# ?tournament_ids= у roster_by_tournament: больше — 400, а не составы всей базы
+MAX_ROSTER_TOURNAMENTS = 50
+
+
+def current_tournaments():
+    today = timezone.localdate()
+    return (
+        Tournament.objects.select_related("game")
+        .filter(
+            (Q(start_date__lte=today) & Q(end_date__gte=today))
+            | _q_status_iexact("status", CURRENT_TOURNAMENT_STATUSES)
+        )
+        .distinct()
+        .order_by("start_date", "id")
+    )
+
+
+def upcoming_tournaments():
+    today = timezone.localdate()
+    return (
+        Tournament.objects.select_related("game")
+        .filter(Q(start_date__gt=today) | _q_status_iexact("status", UPCOMING_TOURNAMENT_STATUSES))
+        .distinct()
+        .order_by("start_date", "id")
+    )
+
+
+def upcoming_matches():
+    """Без select_related: JOIN'ы подбирает SparseFieldsetViewMixin по полям ответа."""
+    return (
+        Match.objects
+        .filter(match_date__gte=timezone.now())
+        .filter(_q_status_iexact("status", SCHEDULED_MATCH_STATUSES) | Q(status__isnull=True) | Q(status=""))
+        .order_by("match_date")
+    )
+
+
+def team_roster(team_id):
+    # team_name в PlayerSerializer — без JOIN был бы запрос на игрока
+    return Player.objects.select_related("team").filter(team_id=team_id).order_by("nickname")
+
+
+def team_current_tournaments(team_id):
+    # участие (TournamentTeam + матчи) уже собрано в TeamParticipation
+    today = timezone.localdate()
+    return (
+        Tournament.objects.select_related("game")
+        .filter(Exists(TeamParticipation.objects.filter(tournament=OuterRef("pk"), team_id=team_id)))
+        .filter(Q(end_date__gte=today) | Q(start_date__gte=today))
+        .order_by("start_date", "id")
+    )
+
+
+def current_tournament_row(t):
+    return {
+        "id": t.id,
+        "name": t.name,
+        "game": t.game_id,
+        "game_title": t.game.title if t.game else None,
+        "start_date": t.start_date,
+        "end_date": t.end_date,
+        "status": t.status,
+        "prize_pool": t.prize_pool,
+        "format": t.format,
+    }
+
+
+def team_history(team_id):
+    return (
+        Standing.objects.select_related("tournament", "tournament__game")
+        .filter(team_id=team_id)
+        .order_by("-tournament__start_date")
+    )
+
+
+def history_row(s):
+    return {
+        "tournament_id": s.tournament.id,
+        "tournament_name": s.tournament.name,
+        "game_title": s.tournament.game.title if s.tournament.game else None,
+        "start_date": s.tournament.start_date,
+        "end_date": s.tournament.end_date,
+        "place": s.place,
+    }
+
+
+def team_recent_matches(team_id, limit):
+    return (
+        Match.objects.select_related("tournament", "team1", "team2", "result", "result__winner")
+        .filter(Q(team1_id=team_id) | Q(team2_id=team_id))
+        .order_by("-match_date")[:limit]
+    )
+
+
+def recent_match_row(m):
+    res = getattr(m, "result", None)
+    score = None
+    winner = None
+    if res:
+        score = f"{res.score_team1}:{res.score_team2}"
+        winner = res.winner.name if res.winner else None
+
+    return {
+        "id": m.id,
+        "tournament_id": m.tournament_id,
+        "tournament_name": m.tournament.name if m.tournament else None,
+        "match_date": m.match_date,
+        "round": m.round,
+        "status": m.status,
+        "team1_id": m.team1_id,
+        "team1_name": m.team1.name if m.team1 else None,
+        "team2_id": m.team2_id,
+        "team2_name": m.team2.name if m.team2 else None,
+        "score": score,
+        "winner_name": winner,
+    }
+
+
+def team_ratings(team_id, game_id=None):
+    """(рейтинги по играм, история изменений) — история без среза."""
+    ratings = TeamRating.objects.select_related("team", "game").filter(team_id=team_id).order_by("-rating")
+    history = (
+        TeamRatingHistory.objects.select_related("opponent")
+        .filter(team_id=team_id)
+        .order_by("-played_at", "-match_id")
+    )
+    if game_id:
+        ratings = ratings.filter(game_id=game_id)
+        history = history.filter(game_id=game_id)
+    return ratings, history
+
+
+RECENT_MATCHES_LIMIT = 100
+UPCOMING_MATCHES_LIMIT = 100
+
+
+def parse_limit(params, default, maximum):
+    """?limit= в пределах [0, maximum]; ValueError — не целое число (ответ 400)."""
+    return min(max(int(params.get("limit", default)), 0), maximum)
+
+
+def rating_history_limit(params):
+    try:
+        return min(int(params.get("limit", 100)), 1000)
+    except ValueError:
+        return 100
+
+
+class GameViewSet(SparseFieldsetViewMixin, CachedReadMixin, viewsets.ModelViewSet):
+    cache_models = (Game,)
     queryset = Game.objects.all().order_by("title")
     serializer_class = GameSerializer
     permission_classes = [AdminOrReadOnly]
 
 
-class TournamentViewSet(viewsets.ModelViewSet):
+class TournamentViewSet(SparseFieldsetViewMixin, CachedReadMixin, viewsets.ModelViewSet):
+    # page/ отдаёт участников, матчи и таблицу
+    cache_models = (Tournament, Game, Team, TournamentTeam, Match, MatchResult, Standing)
     serializer_class = TournamentSerializer
     queryset = Tournament.objects.select_related("game").all().order_by("-start_date", "-id")
     permission_classes = [AdminOrReadOnly]
+    pagination_class = TournamentCursorPagination
 
-    def get_queryset(self):
-        qs = super().get_queryset()
+    def get_cache_scopes(self, request):
+        # карточка и страница турнира зависят только от "своих" записей
+        # (нечисловой pk — общие метки моделей, ответ всё равно 404)
+        models = {"retrieve": (Game,), "page": (Game, Team)}.get(self.get_cache_action(request))
+        scopes = models and tournament_scopes(self.kwargs.get("pk"), *models)
+        return scopes or super().get_cache_scopes(request)
 
-        game_id = self.request.query_params.get("game_id")
-        if game_id:
-            qs = qs.filter(game_id=game_id)
-
-        status_ = self.request.query_params.get("status")
-        if status_:
-            qs = qs.filter(status=status_)
-
-        date_from = self.request.query_params.get("date_from")
-        if date_from:
-            qs = qs.filter(end_date__gte=date_from)
-
-        date_to = self.request.query_params.get("date_to")
-        if date_to:
-            qs = qs.filter(start_date__lte=date_to)
-
-        return qs
+    def get_queryset(self):
+        return filter_tournaments(super().get_queryset(), self.request.query_params)
 
     @action(detail=False, methods=["get"], url_path="current")
     def current(self, request):
-        today = timezone.localdate()
-
-        current_statuses = [
-            "running",
-            "идёт", "идет",
-            "ongoing", "in_progress", "active",
-        ]
-
-        qs = (
-            Tournament.objects.select_related("game")
-            .filter(
-                (Q(start_date__lte=today) & Q(end_date__gte=today))
-                | _q_status_iexact("status", current_statuses)
-            )
-            .distinct()
-            .order_by("start_date", "id")
-        )
-        return Response(TournamentSerializer(qs, many=True).data)
+        return Response(TournamentSerializer(current_tournaments(), many=True).data)
 
     @action(detail=False, methods=["get"], url_path="upcoming")
     def upcoming(self, request):
-        today = timezone.localdate()
-
-        upcoming_statuses = [
-            "registration",
-            "регистрация",
-            "upcoming", "soon",
-        ]
-
-        qs = (
-            Tournament.objects.select_related("game")
-            .filter(Q(start_date__gt=today) | _q_status_iexact("status", upcoming_statuses))
-            .distinct()
-            .order_by("start_date", "id")
-        )
-        return Response(TournamentSerializer(qs, many=True).data)
+        return Response(TournamentSerializer(upcoming_tournaments(), many=True).data)
 
     @action(detail=True, methods=["get"], url_path="page")
     def page(self, request, pk=None):
         tournament = self.get_object()
         return Response(TournamentDetailSerializer(tournament).data)
 
+    @action(detail=True, methods=["post"], url_path="generate_schedule")
+    def generate_schedule(self, request, pk=None):
+        """
+        Сетка/круг из заявленных команд. Тело:
+        {"format": "single_elimination" | "round_robin",
+         "seeding": [team_id, ...] | "random", "start": ISO-дата-время,
+         "round_interval_hours": 24, "match_interval_minutes": 0, "replace": false}
+        """
+        tournament = self.get_object()
+        data = request.data
+
+        start = None
+        if data.get("start"):
+            start = parse_datetime(str(data["start"]))
+            if start is None:
+                return Response({"error": "start must be an ISO datetime"}, status=400)
+            if timezone.is_naive(start):
+                start = timezone.make_aware(start)
+
+        try:
+            round_interval = timedelta(hours=float(data.get("round_interval_hours", 24)))
+            match_interval = timedelta(minutes=float(data.get("match_interval_minutes", 0)))
+            summary = generate_schedule(
+                tournament,
+                data.get("format", "single_elimination"),
+                seeding=data.get("seeding"),
+                start=start,
+                round_interval=round_interval,
+                match_interval=match_interval,
+                replace=bool(data.get("replace", False)),
+            )
+        except (ScheduleError, TypeError, ValueError) as e:
+            return Response({"error": str(e)}, status=400)
+        return Response(summary, status=201)
 
-class TeamViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=["post"], url_path="import")
+    def bulk_import(self, request, pk=None):
+        """
+        Массовый импорт (core/importing.py). Тело — JSON-пакет
+        {"entrants", "matches", "results", "standings"} или multipart:
+        файл bundle (JSON) либо файлы-секции entrants/matches/results/standings (CSV).
+        Большие пакеты — файлами: на тело запроса действует DATA_UPLOAD_MAX_MEMORY_SIZE.
+        ?dry_run=1 — только проверка. 400 {"errors": [...]} — ничего не записано.
+        """
+        tournament = self.get_object()
+        try:
+            if "bundle" in request.FILES:
+                bundle = load_json(request.FILES["bundle"].read())
+            elif request.FILES:
+                bundle = {name: read_csv(f.read()) for name, f in request.FILES.items()}
+            elif isinstance(request.data, dict):
+                bundle = {name: request.data[name] for name in request.data}
+            else:
+                return Response({"error": "expected a JSON object or CSV files"}, status=400)
+            summary = import_bundle(
+                tournament, bundle, dry_run=request.query_params.get("dry_run") in ("1", "true"),
+            )
+        except BundleError as e:
+            return Response({"error": str(e), "errors": e.errors}, status=400)
+        except UnicodeDecodeError:
+            return Response({"error": "files must be UTF-8"}, status=400)
+        return Response(summary)
+
+
+class TeamViewSet(SparseFieldsetViewMixin, CachedReadMixin, viewsets.ModelViewSet):
+    # roster/, current_tournaments/, history/, recent_matches/, rating/, h2h/
+    cache_models = (
+        Team, Player, Game, Tournament, TournamentTeam, Match, MatchResult, Standing, TeamRating, HeadToHead,
+    )
     queryset = Team.objects.all().order_by("name")
     serializer_class = TeamSerializer
     permission_classes = [AdminOrReadOnly]
@@ -130,245 +391,251 @@ class TeamViewSet(viewsets.ModelViewSet):
         if q:
             qs = qs.filter(name__icontains=q)
 
-        # /api/teams/?game=ID
+        # /api/teams/?game=ID — один semi-join по индексу (game, team)
         game_id = self.request.query_params.get("game")
         if game_id:
-            tt_team_ids = TournamentTeam.objects.filter(
-                tournament__game_id=game_id
-            ).values_list("team_id", flat=True)
-
-            team1_ids = Match.objects.filter(
-                tournament__game_id=game_id
-            ).values_list("team1_id", flat=True)
-
-            team2_ids = Match.objects.filter(
-                tournament__game_id=game_id
-            ).values_list("team2_id", flat=True)
-
-            match_team_ids = team1_ids.union(team2_ids)
-
-            qs = qs.filter(Q(id__in=tt_team_ids) | Q(id__in=match_team_ids)).distinct()
+            qs = qs.filter(
+                Exists(TeamParticipation.objects.filter(team=OuterRef("pk"), game_id=game_id))
+            )
 
         return qs
 
     @action(detail=True, methods=["get"], url_path="roster")
     def roster(self, request, pk=None):
         team = self.get_object()
-        players = Player.objects.filter(team=team).order_by("nickname")
-        return Response(PlayerSerializer(players, many=True).data)
+        return Response(PlayerSerializer(team_roster(team.pk), many=True).data)
 
     @action(detail=True, methods=["get"], url_path="current_tournaments")
     def current_tournaments(self, request, pk=None):
         """
         /api/teams/{id}/current_tournaments/
-        ВАЖНО: УЧАСТИЕ берём:
-        - через TournamentTeam (related_name у Tournament -> tournament_teams)
-        - через матчи (matches__team1/team2)
+        ВАЖНО: УЧАСТИЕ берём из TeamParticipation, куда сигналы складывают:
+        - TournamentTeam (related_name у Tournament -> tournament_teams)
+        - матчи (team1/team2)
         """
         team = self.get_object()
-        today = timezone.localdate()
-
-        # ✅ ВАЖНОЕ ИСПРАВЛЕНИЕ:
-        # было "tournamentteam__team" (не существует),
-        # должно быть "tournament_teams__team" потому что related_name="tournament_teams"
-        tt_ids = Tournament.objects.filter(
-            tournament_teams__team=team
-        ).values_list("id", flat=True)
-
-        match_ids = Tournament.objects.filter(
-            Q(matches__team1=team) | Q(matches__team2=team)
-        ).values_list("id", flat=True)
-
-        tournament_ids = tt_ids.union(match_ids)
-
-        qs = (
-            Tournament.objects.select_related("game")
-            .filter(id__in=tournament_ids)
-            .filter(Q(end_date__gte=today) | Q(start_date__gte=today))
-            .distinct()
-            .order_by("start_date", "id")
-        )
-
-        data = [
-            {
-                "id": t.id,
-                "name": t.name,
-                "game": t.game_id,
-                "game_title": t.game.title if t.game else None,
-                "start_date": t.start_date,
-                "end_date": t.end_date,
-                "status": t.status,
-                "prize_pool": t.prize_pool,
-                "format": t.format,
-            }
-            for t in qs
-        ]
-        return Response(data)
+        return Response([current_tournament_row(t) for t in team_current_tournaments(team.pk)])
 
     @action(detail=True, methods=["get"], url_path="history")
     def history(self, request, pk=None):
         team = self.get_object()
-
-        qs = (
-            Standing.objects.select_related("tournament", "tournament__game")
-            .filter(team=team)
-            .order_by("-tournament__start_date")
-        )
-
-        data = [
-            {
-                "tournament_id": s.tournament.id,
-                "tournament_name": s.tournament.name,
-                "game_title": s.tournament.game.title if s.tournament.game else None,
-                "start_date": s.tournament.start_date,
-                "end_date": s.tournament.end_date,
-                "place": s.place,
-            }
-            for s in qs
-        ]
+        data = [history_row(s) for s in team_history(team.pk)]
         return Response({"team": team.name, "history": data})
 
     @action(detail=True, methods=["get"], url_path="recent_matches")
     def recent_matches(self, request, pk=None):
         team = self.get_object()
-        limit = int(request.query_params.get("limit", 10))
-
-        qs = (
-            Match.objects.select_related("tournament", "team1", "team2")
-            .filter(Q(team1=team) | Q(team2=team))
-            .order_by("-match_date")[:limit]
-        )
-
-        data = []
-        for m in qs:
-            res = getattr(m, "result", None)
-            score = None
-            winner = None
-            if res:
-                score = f"{res.score_team1}:{res.score_team2}"
-                winner = res.winner.name if res.winner else None
+        try:
+            limit = parse_limit(request.query_params, 10, RECENT_MATCHES_LIMIT)
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=400)
+        data = [recent_match_row(m) for m in team_recent_matches(team.pk, limit)]
+        return Response({"team": team.name, "matches": data})
 
-            data.append(
-                {
-                    "id": m.id,
-                    "tournament_id": m.tournament_id,
-                    "tournament_name": m.tournament.name if m.tournament else None,
-                    "match_date": m.match_date,
-                    "round": m.round,
-                    "status": m.status,
-                    "team1_id": m.team1_id,
-                    "team1_name": m.team1.name if m.team1 else None,
-                    "team2_id": m.team2_id,
-                    "team2_name": m.team2.name if m.team2 else None,
-                    "score": score,
-                    "winner_name": winner,
-                }
-            )
+    @action(detail=True, methods=["get"], url_path="rating")
+    def rating(self, request, pk=None):
+        """
+        Текущий рейтинг по играм и история изменений (новые сверху).
+        ?game=<id> — только одна игра, ?limit= — длина истории (по умолчанию 100).
+        """
+        team = self.get_object()
+        limit = rating_history_limit(request.query_params)
+        ratings, history = team_ratings(team.pk, request.query_params.get("game"))
+
+        return Response({
+            "team": team.name,
+            "ratings": TeamRatingSerializer(ratings, many=True).data,
+            "history": TeamRatingHistorySerializer(history[:limit], many=True).data,
+        })
+
+    @action(detail=True, methods=["get"], url_path=r"h2h/(?P<other_id>\d+)")
+    def h2h(self, request, pk=None, other_id=None):
+        """Личные встречи с другой командой: одна строка HeadToHead по паре."""
+        team = self.get_object()
+        other = Team.objects.filter(pk=other_id).only("id", "name").first()
+        if other is None:
+            return Response({"error": "team not found"}, status=404)
+        if other.pk == team.pk:
+            return Response({"error": "other_id must differ from team id"}, status=400)
 
-        return Response({"team": team.name, "matches": data})
+        data = h2h_for(team.pk, other.pk)
+        return Response({
+            "team": team.pk, "team_name": team.name,
+            "opponent": other.pk, "opponent_name": other.name,
+            **data,
+        })
 
 
-class PlayerViewSet(viewsets.ModelViewSet):
+class PlayerViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = Player.objects.select_related("team").all().order_by("nickname")
     serializer_class = PlayerSerializer
     permission_classes = [AdminOrReadOnly]
 
 
-class MatchViewSet(viewsets.ModelViewSet):
+class MatchViewSet(SparseFieldsetViewMixin, CachedReadMixin, viewsets.ModelViewSet):
+    cache_models = (Match, MatchResult, Team, Tournament)
     serializer_class = MatchSerializer
-    queryset = Match.objects.select_related("tournament", "team1", "team2").all().order_by("match_date")
+    queryset = Match.objects.select_related("tournament", "team1", "team2").all().order_by("match_date", "id")
     permission_classes = [AdminOrReadOnly]
+    pagination_class = MatchCursorPagination
 
-    def get_queryset(self):
-        qs = super().get_queryset()
-
-        tournament_id = self.request.query_params.get("tournament")
-        if tournament_id:
-            qs = qs.filter(tournament_id=tournament_id)
-
-        team_id = self.request.query_params.get("team")
-        if team_id:
-            qs = qs.filter(Q(team1_id=team_id) | Q(team2_id=team_id))
+    def get_cache_scopes(self, request):
+        # все остальные фильтры сужают выборку внутри турнира
+        if self.get_cache_action(request) == "list":
+            scopes = tournament_scopes(request.GET.get("tournament"), Team)
+            if scopes:
+                return scopes
+        return super().get_cache_scopes(request)
 
-        status = self.request.query_params.get("status")
-        if status:
-            qs = qs.filter(status=status)
-
-        date_from = self.request.query_params.get("date_from")
-        if date_from:
-            qs = qs.filter(match_date__date__gte=date_from)
-
-        date_to = self.request.query_params.get("date_to")
-        if date_to:
-            qs = qs.filter(match_date__date__lte=date_to)
-
-        q = self.request.query_params.get("q")
-        if q:
-            qs = qs.filter(Q(team1__name__icontains=q) | Q(team2__name__icontains=q))
-
-        return qs
+    def get_queryset(self):
+        return filter_matches(super().get_queryset(), self.request.query_params)
 
     @action(detail=False, methods=["get"], url_path="upcoming")
     def upcoming(self, request):
-        limit = int(request.query_params.get("limit", 20))
-        now = timezone.now()
+        try:
+            limit = parse_limit(request.query_params, 20, UPCOMING_MATCHES_LIMIT)
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=400)
+        qs = self.select_related_for(upcoming_matches())[:limit]
 
-        scheduled_statuses = [
-            "scheduled",
-            "запланирован", "запланировано", "ожидается",
-            "upcoming", "planned",
-        ]
+        return Response(self.get_serializer(qs, many=True).data)
 
-        qs = (
-            Match.objects.select_related("tournament", "team1", "team2")
-            .filter(match_date__gte=now)
-            .filter(_q_status_iexact("status", scheduled_statuses) | Q(status__isnull=True) | Q(status=""))
-            .order_by("match_date")[:limit]
-        )
 
-        return Response(MatchSerializer(qs, many=True).data)
-
-
-class StandingViewSet(viewsets.ModelViewSet):
+class StandingViewSet(SparseFieldsetViewMixin, CachedReadMixin, viewsets.ModelViewSet):
+    cache_models = (Standing, Team, Tournament)
     queryset = Standing.objects.select_related("tournament", "team").all()
     serializer_class = StandingSerializer
     permission_classes = [AdminOrReadOnly]
+    sparse_actions = ("list", "retrieve", "by_tournament")
+
+    def get_cache_scopes(self, request):
+        if self.get_cache_action(request) == "by_tournament":
+            scopes = tournament_scopes(request.GET.get("tournament_id"), Team)
+            if scopes:
+                return scopes
+        return super().get_cache_scopes(request)
 
     @action(detail=False, methods=["get"], url_path="by_tournament")
     def by_tournament(self, request):
         tournament_id = request.query_params.get("tournament_id")
         if not tournament_id:
             return Response({"error": "tournament_id is required"}, status=400)
+        if not tournament_id.isdigit():
+            return Response({"error": "tournament_id must be an integer"}, status=400)
 
+        # groups — всегда расчётная таблица; mixed — итоговые места, если
+        # их уже внесли, иначе таблица групп
+        fmt = Tournament.objects.filter(pk=tournament_id).values_list("format", flat=True).first()
         qs = self.get_queryset().filter(tournament_id=tournament_id).order_by("place")
-        return Response(StandingSerializer(qs, many=True).data)
+        if fmt == "groups" or (fmt == "mixed" and not qs.exists()):
+            group_qs = (
+                GroupStanding.objects.select_related("team")
+                .filter(tournament_id=tournament_id)
+                .order_by("rank")
+            )
+            return Response(GroupStandingSerializer(group_qs, many=True, context=self.get_serializer_context()).data)
+        return Response(self.get_serializer(qs, many=True).data)
 
 
-class TournamentTeamViewSet(viewsets.ModelViewSet):
+class TournamentTeamViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = TournamentTeam.objects.select_related("tournament", "team").all()
     serializer_class = TournamentTeamSerializer
     permission_classes = [AdminOrReadOnly]
 
     @action(detail=False, methods=["get"], url_path="roster_by_tournament")
     def roster_by_tournament(self, request):
+        """
+        ?tournament_id=1        -> [{team_id, team_name, players: [...]}, ...]
+        ?tournament_ids=1,2,3   -> {"1": [...], "2": [...], "3": [...]}
+        Всегда два запроса: участники турниров и все их игроки разом.
+        """
+        raw_ids = request.query_params.get("tournament_ids")
+        if raw_ids:
+            try:
+                tournament_ids = [int(x) for x in raw_ids.split(",") if x.strip()]
+            except ValueError:
+                return Response({"error": "tournament_ids must be comma-separated integers"}, status=400)
+            if len(tournament_ids) > MAX_ROSTER_TOURNAMENTS:
+                return Response(
+                    {"error": f"at most {MAX_ROSTER_TOURNAMENTS} tournament_ids per request"}, status=400,
+                )
+            rosters = self._rosters(tournament_ids)
+            return Response({str(tid): rosters.get(tid, []) for tid in tournament_ids})
+
         tournament_id = request.query_params.get("tournament_id")
         if not tournament_id:
             return Response({"error": "tournament_id is required"}, status=400)
+        if not tournament_id.isdigit():
+            return Response({"error": "tournament_id must be an integer"}, status=400)
+
+        tournament_id = int(tournament_id)
+        return Response(self._rosters([tournament_id]).get(tournament_id, []))
+
+    def _rosters(self, tournament_ids):
+        tteams = list(
+            self.get_queryset()
+            .filter(tournament_id__in=tournament_ids)
+            .order_by("tournament_id", "team__name")
+        )
 
-        tteams = self.get_queryset().filter(tournament_id=tournament_id)
+        players_by_team = {}
+        players = (
+            Player.objects.filter(team_id__in={tt.team_id for tt in tteams})
+            .order_by("nickname")
+            .values("id", "nickname", "real_name", "role", "team_id")
+        )
+        for p in players:
+            team_id = p.pop("team_id")
+            players_by_team.setdefault(team_id, []).append(p)
 
-        result = []
+        result = {}
         for tt in tteams:
-            players = tt.team.players.all().values("id", "nickname", "real_name", "role")
-            result.append(
+            result.setdefault(tt.tournament_id, []).append(
                 {
                     "team_id": tt.team.id,
                     "team_name": tt.team.name,
-                    "players": list(players),
+                    "players": players_by_team.get(tt.team_id, []),
                 }
             )
+        return result
+
+
+class SearchView(CachedReadMixin, APIView):
+    """
+    /api/search/?q=...&limit=10
+    Команды, игроки и матчи найденных команд, сгруппированные по типу
+    и отсортированные по релевантности (score).
+    """
+    cache_models = (Team, Player, Match, Tournament)
+
+    def get(self, request):
+        try:
+            limit = min(int(request.query_params.get("limit", 10)), 50)
+        except ValueError:
+            limit = 10
+        return Response(search(request.query_params.get("q", ""), limit=limit))
 
-        return Response(result)
+
+class RatingLeaderboardView(CachedReadMixin, APIView):
+    """
+    /api/ratings/leaderboard/?game=<id>&limit=50&min_matches=0
+    Без game — все игры вперемешку (одна команда может встретиться несколько раз).
+    """
+    cache_models = (TeamRating, Team, Game)
+
+    def get(self, request):
+        try:
+            limit = min(int(request.query_params.get("limit", 50)), 500)
+            min_matches = int(request.query_params.get("min_matches", 0))
+        except ValueError:
+            return Response({"error": "limit and min_matches must be integers"}, status=400)
+
+        qs = TeamRating.objects.select_related("team", "game").filter(matches__gte=min_matches)
+        game_id = request.query_params.get("game")
+        if game_id:
+            qs = qs.filter(game_id=game_id)
+        qs = qs.order_by("-rating", "team_id")[:limit]
+        return Response(TeamRatingSerializer(qs, many=True).data)
 
 
 class PopularTeamsReport(APIView):
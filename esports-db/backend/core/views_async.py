@@ -0,0 +1,261 @@
+"""
+Async-версии самых нагруженных read-эндпоинтов для запуска под ASGI
+(config/asgi.py, например `uvicorn config.asgi:application`).
+
+Те же URL, что и у синхронных ViewSet'ов, но с префиксом /api/async/:
+    tournaments/                     список (keyset, фильтры, ?fields/?expand)
+    tournaments/current/, upcoming/
+    tournaments/<id>/page/           страница турнира
+    matches/upcoming/
+    teams/<id>/roster/, current_tournaments/, history/, recent_matches/,
+    teams/<id>/rating/, teams/<id>/h2h/<other_id>/
+
+Запросы — async ORM (async for / afirst), выдача — те же сериализаторы,
+фильтры и querysets, что у синхронных view (views.py, serializers.py),
+поэтому JSON совпадает байт в байт. Сериализаторы получают уже загруженные
+строки: всё, что им нужно, подтянуто select_related, иначе ленивый запрос
+из async-контекста упал бы с SynchronousOnlyOperation. Кэш ответов и
+ETag/304 — те же (cached_async).
+
+Сам драйвер БД в Django синхронный: async ORM выполняет запрос в потоке
+(по одному на запрос, ThreadSensitiveContext), а event loop в это время
+обслуживает остальные соединения. Поэтому один ASGI-процесс держит много
+одновременных медленных запросов, не занимая воркер на каждый.
+Файловый бэкенд кэша ответов читает диск в потоке, locmem — прямо в loop.
+Сравнение с WSGI: locustfile.py --async-reads (см. его docstring).
+"""
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+
+from .fieldsets import apply_query_plan, expand_cache_scopes
+from .h2h import h2h_for
+from .models import Game, Tournament, Team
+from .pagination import TournamentCursorPagination
+from .renderers import render_json
+from .response_cache import cached_async, model_label, tournament_scope
+from .serializers import (
+    MatchSerializer,
+    PlayerSerializer,
+    StandingSerializer,
+    TeamMiniSerializer,
+    TeamRatingHistorySerializer,
+    TeamRatingSerializer,
+    TournamentSerializer,
+    tournament_matches,
+    tournament_participants,
+    tournament_standings,
+)
+from .views import (
+    RECENT_MATCHES_LIMIT,
+    UPCOMING_MATCHES_LIMIT,
+    MatchViewSet,
+    TeamViewSet,
+    TournamentViewSet,
+    current_tournament_row,
+    current_tournaments,
+    filter_tournaments,
+    history_row,
+    parse_limit,
+    rating_history_limit,
+    recent_match_row,
+    team_current_tournaments,
+    team_history,
+    team_ratings,
+    team_recent_matches,
+    team_roster,
+    upcoming_matches,
+    upcoming_tournaments,
+)
+
+# те же метки кэша, что у синхронных ViewSet'ов: запись сбрасывает обе версии
+TOURNAMENT_SCOPES = [model_label(m) for m in TournamentViewSet.cache_models]
+MATCH_SCOPES = [model_label(m) for m in MatchViewSet.cache_models]
+TEAM_SCOPES = [model_label(m) for m in TeamViewSet.cache_models]
+
+
+def _json(data, status=200):
+    # тот же рендерер, что у синхронных view (REST_FRAMEWORK DEFAULT_RENDERER_CLASSES)
+    return HttpResponse(render_json(data), content_type="application/json", status=status)
+
+
+def _not_found(model=None, detail=None):
+    # текст как у get_object() в синхронных view
+    if detail is None:
+        detail = f"No {model._meta.object_name} matches the given query."
+    return _json({"detail": detail}, status=404)
+
+
+async def _rows(qs):
+    return [obj async for obj in qs]
+
+
+async def _team(pk):
+    return await Team.objects.only("id", "name").filter(pk=pk).afirst()
+
+
+def _shaped(serializer_class, drf_request):
+    """Сериализатор с учётом ?fields/?omit/?expand — для плана запроса."""
+    return serializer_class(context={"request": drf_request})
+
+
+@require_GET
+async def tournament_list(request):
+    drf_request = Request(request)
+    scopes = TOURNAMENT_SCOPES + expand_cache_scopes(TournamentSerializer, request.GET)
+
+    async def build():
+        context = {"request": drf_request}
+        qs = filter_tournaments(Tournament.objects.all(), drf_request.query_params)
+        qs = apply_query_plan(qs, _shaped(TournamentSerializer, drf_request))
+        paginator = TournamentCursorPagination()
+        try:
+            rows = await paginator.apaginate_queryset(qs, drf_request)
+        except NotFound as e:
+            return _not_found(detail=str(e.detail))
+        data = TournamentSerializer(rows, many=True, context=context).data
+        return _json(paginator.get_paginated_data(data))
+
+    return await cached_async(request, scopes, build)
+
+
+@require_GET
+async def tournament_current(request):
+    async def build():
+        return _json(TournamentSerializer(await _rows(current_tournaments()), many=True).data)
+
+    return await cached_async(request, TOURNAMENT_SCOPES, build)
+
+
+@require_GET
+async def tournament_upcoming(request):
+    async def build():
+        return _json(TournamentSerializer(await _rows(upcoming_tournaments()), many=True).data)
+
+    return await cached_async(request, TOURNAMENT_SCOPES, build)
+
+
+@require_GET
+async def tournament_page(request, pk):
+    scopes = [tournament_scope(pk), model_label(Game), model_label(Team)]
+
+    async def build():
+        tournament = await Tournament.objects.select_related("game").filter(pk=pk).afirst()
+        if tournament is None:
+            return _not_found(Tournament)
+        data = TournamentSerializer(tournament).data
+        data["participants"] = TeamMiniSerializer(await _rows(tournament_participants(pk)), many=True).data
+        data["matches"] = MatchSerializer(await _rows(tournament_matches(pk)), many=True).data
+        data["standings"] = StandingSerializer(await _rows(tournament_standings(pk)), many=True).data
+        return _json(data)
+
+    return await cached_async(request, scopes, build)
+
+
+@require_GET
+async def match_upcoming(request):
+    drf_request = Request(request)
+    scopes = MATCH_SCOPES + expand_cache_scopes(MatchSerializer, request.GET)
+
+    try:
+        limit = parse_limit(request.GET, 20, UPCOMING_MATCHES_LIMIT)
+    except ValueError:
+        return _json({"error": "limit must be an integer"}, status=400)
+
+    async def build():
+        qs = apply_query_plan(upcoming_matches(), _shaped(MatchSerializer, drf_request))[:limit]
+        data = MatchSerializer(await _rows(qs), many=True, context={"request": drf_request}).data
+        return _json(data)
+
+    return await cached_async(request, scopes, build)
+
+
+@require_GET
+async def team_roster_view(request, pk):
+    async def build():
+        team = await _team(pk)
+        if team is None:
+            return _not_found(Team)
+        return _json(PlayerSerializer(await _rows(team_roster(team.pk)), many=True).data)
+
+    return await cached_async(request, TEAM_SCOPES, build)
+
+
+@require_GET
+async def team_current_tournaments_view(request, pk):
+    async def build():
+        team = await _team(pk)
+        if team is None:
+            return _not_found(Team)
+        return _json([current_tournament_row(t) for t in await _rows(team_current_tournaments(team.pk))])
+
+    return await cached_async(request, TEAM_SCOPES, build)
+
+
+@require_GET
+async def team_history_view(request, pk):
+    async def build():
+        team = await _team(pk)
+        if team is None:
+            return _not_found(Team)
+        data = [history_row(s) for s in await _rows(team_history(team.pk))]
+        return _json({"team": team.name, "history": data})
+
+    return await cached_async(request, TEAM_SCOPES, build)
+
+
+@require_GET
+async def team_recent_matches_view(request, pk):
+    try:
+        limit = parse_limit(request.GET, 10, RECENT_MATCHES_LIMIT)
+    except ValueError:
+        return _json({"error": "limit must be an integer"}, status=400)
+
+    async def build():
+        team = await _team(pk)
+        if team is None:
+            return _not_found(Team)
+        data = [recent_match_row(m) for m in await _rows(team_recent_matches(team.pk, limit))]
+        return _json({"team": team.name, "matches": data})
+
+    return await cached_async(request, TEAM_SCOPES, build)
+
+
+@require_GET
+async def team_rating_view(request, pk):
+    async def build():
+        team = await _team(pk)
+        if team is None:
+            return _not_found(Team)
+        ratings, history = team_ratings(team.pk, request.GET.get("game"))
+        limit = rating_history_limit(request.GET)
+        return _json({
+            "team": team.name,
+            "ratings": TeamRatingSerializer(await _rows(ratings), many=True).data,
+            "history": TeamRatingHistorySerializer(await _rows(history[:limit]), many=True).data,
+        })
+
+    return await cached_async(request, TEAM_SCOPES, build)
+
+
+@require_GET
+async def team_h2h_view(request, pk, other_id):
+    async def build():
+        team = await _team(pk)
+        if team is None:
+            return _not_found(Team)
+        other = await _team(other_id)
+        if other is None:
+            return _json({"error": "team not found"}, status=404)
+        if other.pk == team.pk:
+            return _json({"error": "other_id must differ from team id"}, status=400)
+        data = await sync_to_async(h2h_for)(team.pk, other.pk)
+        return _json({
+            "team": team.pk, "team_name": team.name,
+            "opponent": other.pk, "opponent_name": other.name,
+            **data,
+        })
+
+    return await cached_async(request, TEAM_SCOPES, build)
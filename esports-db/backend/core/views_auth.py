@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.http import HttpResponse
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
@@ -6,6 +7,10 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.generics import ListCreateAPIView, DestroyAPIView
 
+from .authentication import token_cache
+from .metrics import render_prometheus
+from .response_cache import get_response_cache
+from .view_history import get_history_buffer
 from .models import UserProfile, FavoriteTournament, FavoriteTeam, ViewHistory, Team
 from .serializers_auth import (
     RegisterSerializer,
@@ -50,18 +55,25 @@ class LogoutView(APIView):
 
     def post(self, request):
         Token.objects.filter(user=request.user).delete()
+        token_cache.evict_user(request.user.pk)
         return Response({"ok": True})
 
 
 class MeView(APIView):
     permission_classes = [IsAuthenticated]
 
-    def get(self, request):
+    @staticmethod
+    def _profile(request):
         profile, _ = UserProfile.objects.get_or_create(user=request.user)
-        return Response(ProfileSerializer(profile).data)
+        # пользователь уже есть в запросе — не перечитываем его для сериализатора
+        profile.user = request.user
+        return profile
+
+    def get(self, request):
+        return Response(ProfileSerializer(self._profile(request)).data)
 
     def patch(self, request):
-        profile, _ = UserProfile.objects.get_or_create(user=request.user)
+        profile = self._profile(request)
         s = ProfileSerializer(profile, data=request.data, partial=True)
         s.is_valid(raise_exception=True)
         s.save()
@@ -113,6 +125,23 @@ class ViewHistoryView(ListCreateAPIView):
     def get_queryset(self):
         return ViewHistory.objects.filter(user=self.request.user).order_by("-viewed_at")[:50]
 
+    def list(self, request, *args, **kwargs):
+        # свои просмотры пользователь должен видеть сразу
+        buffer = get_history_buffer()
+        if buffer is not None:
+            buffer.flush()
+        return super().list(request, *args, **kwargs)
+
+    def create(self, request, *args, **kwargs):
+        buffer = get_history_buffer()
+        if buffer is None:
+            return super().create(request, *args, **kwargs)
+
+        s = self.get_serializer(data=request.data)
+        s.is_valid(raise_exception=True)
+        buffer.add(request.user.pk, s.validated_data["item_type"], s.validated_data["item_id"])
+        return Response(s.data, status=status.HTTP_202_ACCEPTED)
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
@@ -123,7 +152,20 @@ class AdminDashboardView(APIView):
 
     def get(self, request):
         pending_teams = Team.objects.filter(is_approved=False).count()
-        return Response({"admin": request.user.username, "pending_teams": pending_teams})
+        cache = get_response_cache()
+        return Response({
+            "admin": request.user.username,
+            "pending_teams": pending_teams,
+            "response_cache": {"backend": cache.name, **cache.stats.as_dict()} if cache else None,
+        })
+
+
+class MetricsView(APIView):
+    """Гистограммы core/metrics.py в текстовом формате Prometheus."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 class ApproveTeamView(APIView):
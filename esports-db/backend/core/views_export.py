@@ -0,0 +1,145 @@
+"""
+Потоковые выгрузки для аналитиков: /api/export/<dataset>.<csv|ndjson>
+
+Строки читаются через .iterator(chunk_size=...) (на PostgreSQL — серверный
+курсор) и сразу уходят клиенту через StreamingHttpResponse, поэтому память
+воркера не зависит от размера выгрузки. Фильтры — те же, что у /api/matches/.
+
+Под ASGI отдаём async-итератор, который берёт у того же генератора по
+одному чанку через sync_to_async: синхронный итератор StreamingHttpResponse
+под ASGI сначала целиком собрал бы в список.
+"""
+import csv
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .models import Match, Standing
+from .views import filter_matches
+
+CHUNK_SIZE = 2000
+
+
+def _matches(params):
+    qs = filter_matches(Match.objects.all(), params).order_by("match_date", "id")
+    return qs.values_list(
+        "id", "tournament_id", "tournament__name", "match_date", "round", "status",
+        "team1_id", "team1__name", "team2_id", "team2__name",
+        "result__score_team1", "result__score_team2", "result__winner_id", "result__winner__name",
+    ), [
+        "id", "tournament_id", "tournament_name", "match_date", "round", "status",
+        "team1_id", "team1_name", "team2_id", "team2_name",
+        "score_team1", "score_team2", "winner_id", "winner_name",
+    ]
+
+
+def _results(params):
+    qs = (
+        filter_matches(Match.objects.all(), params)
+        .filter(result__isnull=False)
+        .order_by("match_date", "id")
+    )
+    return qs.values_list(
+        "id", "tournament_id", "match_date",
+        "team1_id", "team2_id",
+        "result__winner_id", "result__score_team1", "result__score_team2", "result__details",
+    ), [
+        "match_id", "tournament_id", "match_date",
+        "team1_id", "team2_id",
+        "winner_id", "score_team1", "score_team2", "details",
+    ]
+
+
+def _standings(params):
+    qs = Standing.objects.all()
+    tournament_id = params.get("tournament")
+    if tournament_id:
+        qs = qs.filter(tournament_id=tournament_id)
+    team_id = params.get("team")
+    if team_id:
+        qs = qs.filter(team_id=team_id)
+    qs = qs.order_by("tournament_id", "place", "id")
+    return qs.values_list(
+        "tournament_id", "tournament__name", "team_id", "team__name", "place",
+    ), [
+        "tournament_id", "tournament_name", "team_id", "team_name", "place",
+    ]
+
+
+DATASETS = {
+    "matches": _matches,
+    "results": _results,
+    "standings": _standings,
+}
+
+
+class _Echo:
+    """csv.writer пишет сюда, а мы сразу отдаём строку наружу."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_stream(rows, columns):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    batch = []
+    for row in rows:
+        batch.append(writer.writerow(row))
+        if len(batch) >= CHUNK_SIZE:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+def _ndjson_stream(rows, columns):
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    batch = []
+    for row in rows:
+        batch.append(encoder.encode(dict(zip(columns, row))) + "\n")
+        if len(batch) >= CHUNK_SIZE:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+async def _async_chunks(chunks):
+    # курсор открыт в потоке генератора: все шаги — в одном потоке (thread_sensitive)
+    step = sync_to_async(next, thread_sensitive=True)
+    try:
+        while (chunk := await step(chunks, None)) is not None:
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close, thread_sensitive=True)()
+
+
+FORMATS = {
+    "csv": (_csv_stream, "text/csv; charset=utf-8"),
+    "ndjson": (_ndjson_stream, "application/x-ndjson; charset=utf-8"),
+}
+
+
+class ExportView(APIView):
+    def get(self, request, dataset: str, fmt: str):
+        if dataset not in DATASETS or fmt not in FORMATS:
+            return Response(
+                {"error": f"unknown export {dataset}.{fmt}", "datasets": list(DATASETS), "formats": list(FORMATS)},
+                status=404,
+            )
+
+        qs, columns = DATASETS[dataset](request.query_params)
+        stream, content_type = FORMATS[fmt]
+        rows = qs.iterator(chunk_size=CHUNK_SIZE)
+
+        chunks = stream(rows, columns)
+        if isinstance(request._request, ASGIRequest):
+            chunks = _async_chunks(chunks)
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="{dataset}.{fmt}"'
+        return response
@@ -1,53 +1,362 @@
+"""
+Нагрузочный профиль API.
+
+Классы пользователей повторяют реальный трафик (веса — доли сессий):
+    BrowsingUser  6  турниры: список, страница, матчи, таблица, upcoming
+    TeamFanUser   3  команды: карточка, матчи, история, составы, h2h, рейтинг
+    SearchUser    2  /api/search/ по префиксам настоящих названий
+    AccountUser   1  регистрация/логин по токену, /auth/me/, избранное, история
+
+id турниров, команд и матчей при старте берутся из самого API (а не
+random.randint(1, 50)), поэтому профиль работает на любом объёме данных:
+турниры и команды — все (по ссылкам next), матчи — из случайных турниров,
+чтобы выборка покрывала всю историю, а не только самые старые матчи.
+
+Запуск без UI с проверкой регрессий:
+    locust -f locustfile.py -H http://127.0.0.1:8000 --headless -u 50 -r 10 -t 2m \\
+        --report-file loadtest/results.json --baseline loadtest/baseline.json
+
+По окончании в --report-file пишутся p50/p95/p99 по каждому эндпоинту.
+Если передан --baseline, p50/p95 сравниваются с ним (допуск --tolerance) и
+при регрессии процесс завершается с кодом 1. Baseline зависит от машины и
+объёма данных, поэтому в репозитории его нет: первый прогон на целевом
+стенде записывается с --update-baseline --baseline <файл>.
+
+WSGI против ASGI (async-эндпоинты core/views_async.py) — один и тот же
+профиль, имена в отчёте совпадают, так что прогоны сравниваются напрямую:
+    gunicorn config.wsgi -w 4 -b 127.0.0.1:8000
+    locust ... --report-file loadtest/wsgi.json --update-baseline --baseline loadtest/wsgi.json
+    uvicorn config.asgi:application --workers 4 --port 8000
+    locust ... --async-reads --report-file loadtest/asgi.json --baseline loadtest/wsgi.json
+С --async-reads запросы к перенесённым эндпоинтам идут на /api/async/...
+"""
+import json
 import random
-from locust import HttpUser, task, between
+import uuid
+from pathlib import Path
 
+import requests
+from locust import HttpUser, between, events, task
+from locust.runners import WorkerRunner
 
-class ApiUser(HttpUser):
-    """
-    Нагрузочный профиль:
-    - больше всего запросов на "списки"
-    - немного запросов на "детали"
-    - немного на "аналитические" эндпоинты (если есть)
-    """
-    wait_time = between(0.2, 1.2)
+API_PREFIX = "/api"
+# перенесённые в views_async.py GET-эндпоинты; с --async-reads — "/api/async"
+READ_PREFIX = API_PREFIX
+ASYNC_PREFIX = "/api/async"
+PERCENTILES = {"p50": 0.50, "p95": 0.95, "p99": 0.99}
+CHECKED = ("p50", "p95")
+# эндпоинты с меньшим числом запросов не сравниваем — слишком шумно
+MIN_REQUESTS = 20
+SAMPLE_SIZE = 500
+# из скольких случайных турниров набираются id матчей
+SAMPLE_TOURNAMENTS = 50
 
-    # Если ваш API начинается не с /api, поправьте.
-    # Если у вас API на другом порту/хосте, задаётся через -H при запуске.
-    API_PREFIX = "/api"
 
-    @task(6)
-    def games_list(self):
-        self.client.get(f"{self.API_PREFIX}/games/")
+class Dataset:
+    """id из реальной базы; заполняется один раз на процесс в test_start."""
+    tournament_ids = []
+    team_ids = []
+    match_ids = []
+    search_terms = []
+
+    @classmethod
+    def load(cls, host):
+        session = requests.Session()
+
+        def get(url):
+            response = session.get(url, timeout=30)
+            response.raise_for_status()
+            return response.json()
+
+        def get_all(path):
+            # списки с keyset-пагинацией отдают {"results": [...], "next": ...}
+            items, url = [], f"{host}{API_PREFIX}{path}"
+            while url:
+                data = get(url)
+                if not isinstance(data, dict):
+                    return data
+                items += data["results"]
+                url = data.get("next")
+            return items
+
+        tournaments = get_all(f"/tournaments/?page_size={SAMPLE_SIZE}&fields=id")
+        teams = get_all("/teams/")
+        cls.tournament_ids = [t["id"] for t in tournaments]
+        cls.team_ids = [t["id"] for t in teams]
+        cls.search_terms = sorted({t["name"][:4] for t in teams if len(t["name"]) >= 4})
+
+        per_tournament = max(SAMPLE_SIZE // SAMPLE_TOURNAMENTS, 1)
+        sampled = random.sample(cls.tournament_ids, min(SAMPLE_TOURNAMENTS, len(cls.tournament_ids)))
+        cls.match_ids = [
+            m["id"]
+            for tournament_id in sampled
+            for m in get(f"{host}{API_PREFIX}/matches/?tournament={tournament_id}"
+                         f"&page_size={per_tournament}&fields=id")["results"]
+        ]
+
+    @staticmethod
+    def pick(ids, k=1):
+        if len(ids) < k:
+            return None
+        return random.sample(ids, k) if k > 1 else random.choice(ids)
+
+
+@events.init_command_line_parser.add_listener
+def _add_arguments(parser):
+    parser.add_argument("--report-file", default="loadtest/results.json",
+                        help="куда записать p50/p95/p99 по эндпоинтам")
+    parser.add_argument("--baseline", default=None,
+                        help="baseline для сравнения (без него или если файла нет — только отчёт)")
+    parser.add_argument("--tolerance", type=float, default=0.20,
+                        help="допустимый рост перцентиля относительно baseline (0.2 = +20%%)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="записать этот прогон как новый baseline")
+    parser.add_argument("--async-reads", action="store_true",
+                        help="горячие GET-эндпоинты через async views (/api/async/...)")
+
+
+@events.test_start.add_listener
+def _load_dataset(environment, **kwargs):
+    global READ_PREFIX
+    options = environment.parsed_options
+    if options is not None and options.async_reads:
+        READ_PREFIX = ASYNC_PREFIX
+    if environment.host:
+        Dataset.load(environment.host.rstrip("/"))
+
+
+def collect_percentiles(stats):
+    report = {}
+    for (name, method), entry in sorted(stats.entries.items()):
+        if not entry.num_requests:
+            continue
+        row = {label: entry.get_response_time_percentile(p) for label, p in PERCENTILES.items()}
+        row.update(requests=entry.num_requests, failures=entry.num_failures)
+        report[f"{method} {name}"] = row
+    return report
+
+
+def find_regressions(current, baseline, tolerance):
+    """Список строк-описаний; пустой — регрессий нет."""
+    problems = []
+    for endpoint, base in sorted(baseline.items()):
+        now = current.get(endpoint)
+        if now is None or now["requests"] < MIN_REQUESTS or base.get("requests", 0) < MIN_REQUESTS:
+            continue
+        for label in CHECKED:
+            limit = base[label] * (1 + tolerance)
+            if now[label] > limit:
+                problems.append(f"{endpoint}: {label} {now[label]:.0f}ms > {limit:.0f}ms (baseline {base[label]:.0f}ms)")
+        if now["failures"] and not base.get("failures"):
+            problems.append(f"{endpoint}: {now['failures']} failures (baseline had none)")
+    return problems
+
+
+@events.quitting.add_listener
+def _write_report(environment, **kwargs):
+    if isinstance(environment.runner, WorkerRunner):
+        return  # статистику сводит master
+    options = environment.parsed_options
+    if options is None:
+        return
+
+    current = collect_percentiles(environment.stats)
+    report_path = Path(options.report_file)
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text(json.dumps(current, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"Percentiles written to {report_path}")
+
+    if not options.baseline:
+        if options.update_baseline:
+            print("--update-baseline needs --baseline <file>")
+        return
+    baseline_path = Path(options.baseline)
+    if options.update_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(current, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"Baseline updated: {baseline_path}")
+        return
+    if not baseline_path.exists():
+        print(f"No baseline at {baseline_path}, skipping regression check")
+        return
+
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    problems = find_regressions(current, baseline, options.tolerance)
+    for line in problems:
+        print(f"REGRESSION {line}")
+    if problems:
+        environment.process_exit_code = 1
+
+
+class BrowsingUser(HttpUser):
+    """Главная, список турниров, страница турнира — основная доля трафика."""
+    weight = 6
+    wait_time = between(0.5, 2.0)
 
     @task(6)
     def tournaments_list(self):
-        self.client.get(f"{self.API_PREFIX}/tournaments/")
+        self.client.get(f"{READ_PREFIX}/tournaments/", name="/tournaments/")
 
-    @task(6)
-    def matches_list(self):
-        # Если у вас нет /matches/ — замените на существующий эндпоинт
-        self.client.get(f"{self.API_PREFIX}/matches/")
+    @task(8)
+    def tournament_page(self):
+        tournament_id = Dataset.pick(Dataset.tournament_ids)
+        if tournament_id is None:
+            return
+        self.client.get(f"{READ_PREFIX}/tournaments/{tournament_id}/page/", name="/tournaments/[id]/page/")
+
+    @task(4)
+    def tournament_matches(self):
+        tournament_id = Dataset.pick(Dataset.tournament_ids)
+        if tournament_id is None:
+            return
+        self.client.get(f"{API_PREFIX}/matches/?tournament={tournament_id}", name="/matches/?tournament=")
 
     @task(3)
-    def standings_list(self):
-        self.client.get(f"{self.API_PREFIX}/standings/")
+    def standings(self):
+        tournament_id = Dataset.pick(Dataset.tournament_ids)
+        if tournament_id is None:
+            return
+        self.client.get(f"{API_PREFIX}/standings/by_tournament/?tournament_id={tournament_id}",
+                        name="/standings/by_tournament/")
 
-    @task(2)
-    def upcoming_matches(self):
-        # Если у вас есть кастомный эндпоинт upcoming:
-        # self.client.get(f"{self.API_PREFIX}/matches/upcoming/")
-        # Если нет — просто пропустите или оставьте matches_list
-        self.client.get(f"{self.API_PREFIX}/matches/")
+    @task(3)
+    def upcoming(self):
+        self.client.get(f"{READ_PREFIX}/matches/upcoming/", name="/matches/upcoming/")
+        self.client.get(f"{READ_PREFIX}/tournaments/upcoming/", name="/tournaments/upcoming/")
 
     @task(2)
+    def matches_list(self):
+        self.client.get(f"{API_PREFIX}/matches/", name="/matches/")
+
+    @task(1)
+    def games_list(self):
+        self.client.get(f"{API_PREFIX}/games/", name="/games/")
+
+
+class TeamFanUser(HttpUser):
+    """Страницы команд."""
+    weight = 3
+    wait_time = between(0.5, 2.0)
+
+    @task(4)
     def team_detail(self):
-        # Берём случайный id. Лучше, если у вас есть хотя бы 50+ команд.
-        team_id = random.randint(1, 50)
-        self.client.get(f"{self.API_PREFIX}/teams/{team_id}/")
+        team_id = Dataset.pick(Dataset.team_ids)
+        if team_id is None:
+            return
+        self.client.get(f"{API_PREFIX}/teams/{team_id}/", name="/teams/[id]/")
+
+    @task(4)
+    def recent_matches(self):
+        team_id = Dataset.pick(Dataset.team_ids)
+        if team_id is None:
+            return
+        self.client.get(f"{READ_PREFIX}/teams/{team_id}/recent_matches/", name="/teams/[id]/recent_matches/")
+
+    @task(2)
+    def history(self):
+        team_id = Dataset.pick(Dataset.team_ids)
+        if team_id is None:
+            return
+        self.client.get(f"{READ_PREFIX}/teams/{team_id}/history/", name="/teams/[id]/history/")
+
+    @task(2)
+    def current_tournaments(self):
+        team_id = Dataset.pick(Dataset.team_ids)
+        if team_id is None:
+            return
+        self.client.get(f"{READ_PREFIX}/teams/{team_id}/current_tournaments/",
+                        name="/teams/[id]/current_tournaments/")
+
+    @task(2)
+    def roster_by_tournament(self):
+        tournament_id = Dataset.pick(Dataset.tournament_ids)
+        if tournament_id is None:
+            return
+        self.client.get(f"{API_PREFIX}/tournament-teams/roster_by_tournament/?tournament_id={tournament_id}",
+                        name="/tournament-teams/roster_by_tournament/")
 
     @task(1)
-    def team_history(self):
-        # Если history action существует:
-        # /api/teams/{id}/history/
-        team_id = random.randint(1, 50)
-        self.client.get(f"{self.API_PREFIX}/teams/{team_id}/history/")
+    def h2h(self):
+        pair = Dataset.pick(Dataset.team_ids, k=2)
+        if pair is None:
+            return
+        self.client.get(f"{READ_PREFIX}/teams/{pair[0]}/h2h/{pair[1]}/", name="/teams/[id]/h2h/[id]/")
+
+    @task(1)
+    def rating(self):
+        team_id = Dataset.pick(Dataset.team_ids)
+        if team_id is None:
+            return
+        self.client.get(f"{READ_PREFIX}/teams/{team_id}/rating/", name="/teams/[id]/rating/")
+
+
+class SearchUser(HttpUser):
+    weight = 2
+    wait_time = between(1.0, 3.0)
+
+    @task
+    def search(self):
+        term = Dataset.pick(Dataset.search_terms)
+        if term is None:
+            return
+        self.client.get(f"{API_PREFIX}/search/", params={"q": term}, name="/search/")
+
+
+class AccountUser(HttpUser):
+    """Авторизованная сессия: токен, кабинет, избранное, история просмотров."""
+    weight = 1
+    wait_time = between(1.0, 3.0)
+    password = "load-test-password"
+
+    def on_start(self):
+        self.username = f"load_{uuid.uuid4().hex[:12]}"
+        response = self.client.post(
+            f"{API_PREFIX}/auth/register/",
+            json={"username": self.username, "password": self.password},
+            name="/auth/register/",
+        )
+        self.token = response.json().get("token") if response.ok else None
+        if self.token:
+            self.client.headers["Authorization"] = f"Token {self.token}"
+
+    def on_stop(self):
+        if self.token:
+            self.client.post(f"{API_PREFIX}/auth/logout/", name="/auth/logout/")
+
+    @task(4)
+    def me(self):
+        if self.token:
+            self.client.get(f"{API_PREFIX}/auth/me/", name="/auth/me/")
+
+    @task(2)
+    def login(self):
+        # повторный вход: тот же токен, но проверяет путь логина под нагрузкой
+        self.client.post(
+            f"{API_PREFIX}/auth/login/",
+            json={"username": self.username, "password": self.password},
+            name="/auth/login/",
+        )
+
+    @task(3)
+    def favorite_team(self):
+        team_id = Dataset.pick(Dataset.team_ids)
+        if not self.token or team_id is None:
+            return
+        with self.client.post(f"{API_PREFIX}/me/favorites/teams/", json={"team": team_id},
+                              name="/me/favorites/teams/ [add]", catch_response=True) as response:
+            if response.status_code == 400:
+                response.success()  # уже в избранном
+                return
+        if response.status_code == 201:
+            self.client.get(f"{API_PREFIX}/me/favorites/teams/", name="/me/favorites/teams/")
+            self.client.delete(f"{API_PREFIX}/me/favorites/teams/{response.json()['id']}/",
+                               name="/me/favorites/teams/[id]/ [delete]")
+
+    @task(3)
+    def view_history(self):
+        match_id = Dataset.pick(Dataset.match_ids)
+        if not self.token or match_id is None:
+            return
+        self.client.post(f"{API_PREFIX}/me/history/", json={"item_type": "match", "item_id": match_id},
+                         name="/me/history/ [add]")
+        self.client.get(f"{API_PREFIX}/me/history/", name="/me/history/")
@@ -49,6 +49,20 @@ async function fetchJSON(url) {
   return data;
 }
 
+async function fetchList(url) {
+  // /matches/ и /tournaments/ отдают keyset-страницы: таблице нужны все строки
+  const items = [];
+  let next = url;
+  while (next) {
+    const data = await fetchJSON(next);
+    if (!data || data._unauth || data._forbidden || data._error) return data ?? { _error: true };
+    if (Array.isArray(data)) return data;
+    items.push(...(data.results ?? []));
+    next = data.next;
+  }
+  return items;
+}
+
 async function postJSON(url, payload, method = "POST") {
   const res = await fetch(url, {
     method,
@@ -151,12 +165,12 @@ async function loadTab(resourceKey) {
     return;
   }
 
-  const data = await fetchJSON(r.url);
+  const data = await fetchList(r.url);
 
   if (data._unauth) { clearToken(); window.location.href = "./login.html"; return; }
   if (data._forbidden) { setMessage("Нет прав (403).", "err"); return; }
 
-  const items = Array.isArray(data) ? data : (data.results ?? []);
+  const items = Array.isArray(data) ? data : [];
   setMessage(`OK: ${r.title} (${items.length})`, "ok");
 
   crudBox.innerHTML = renderTable(resourceKey, items);
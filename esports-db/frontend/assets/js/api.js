@@ -37,6 +37,24 @@ async function getJSON(url, { timeoutMs = 7000 } = {}) {
   }
 }
 
+/**
+ * /matches/ и /tournaments/ отдают страницы { next, previous, results } (keyset-пагинация).
+ * Для списков, которые нужны целиком (фильтры, матчи одного турнира), идём по ссылкам next.
+ */
+export async function fetchAllPages(url, init = {}) {
+  const items = [];
+  let next = url;
+  while (next) {
+    const res = await fetch(next, init);
+    if (!res.ok) throw new Error(`HTTP ${res.status}`);
+    const data = await res.json();
+    if (Array.isArray(data)) return data;
+    items.push(...(data.results ?? []));
+    next = data.next;
+  }
+  return items;
+}
+
 function pick(obj, keys, fallback = null) {
   for (const k of keys) {
     if (obj && obj[k] !== undefined && obj[k] !== null) return obj[k];
@@ -32,6 +32,8 @@ function isUrl(x) {
   return /^https?:\/\/\S+$/i.test(s);
 }
 
+let liveSource = null;
+
 async function load() {
   const id = new URLSearchParams(location.search).get("id");
   if (!id) {
@@ -45,7 +47,24 @@ async function load() {
     return;
   }
 
-  const m = await r.json();
+  render(await r.json());
+  msg.textContent = "";
+
+  // счёт и статус приходят сами, без перезапроса карточки
+  if (window.EventSource) {
+    const live = new EventSource(`${API_BASE}/live/matches/?match=${encodeURIComponent(id)}`);
+    live.addEventListener("match", (e) => render(JSON.parse(e.data)));
+    live.addEventListener("resync", () => load());
+    live.addEventListener("match_deleted", () => {
+      live.close();
+      msg.textContent = "Матч удалён.";
+    });
+    liveSource?.close();
+    liveSource = live;
+  }
+}
+
+function render(m) {
   const res = m.result || null;
 
   mTitle.textContent = `${m.team1_name} vs ${m.team2_name}`;
@@ -74,8 +93,6 @@ async function load() {
   } else {
     vodLink.classList.add("hidden");
   }
-
-  msg.textContent = "";
 }
 
 load();
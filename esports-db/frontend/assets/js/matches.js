@@ -1,4 +1,4 @@
-import { API_BASE } from "./api.js";
+import { API_BASE, fetchAllPages } from "./api.js";
 
 const elTournament = document.getElementById("fTournament");
 const elTeam = document.getElementById("fTeam");
@@ -13,6 +13,7 @@ const btnReset = document.getElementById("btnReset");
 const grid = document.getElementById("matchesGrid");
 const empty = document.getElementById("emptyState");
 const count = document.getElementById("matchesCount");
+const btnMore = document.getElementById("btnMore");
 
 function statusBadge(status = "") {
   const s = String(status).toLowerCase();
@@ -29,40 +30,46 @@ function fmtDT(iso) {
 
 function safe(v){ return v ?? "—"; }
 
-function renderMatches(matches) {
-  grid.innerHTML = "";
-
-  count.textContent = String(matches.length);
-  empty.classList.toggle("hidden", matches.length !== 0);
-
-  for (const m of matches) {
-    const res = m.result || null;
-    const score = res ? `${res.score_team1}:${res.score_team2}` : "—";
-    const winner = res?.winner_name || "—";
-
-    const card = document.createElement("div");
-    card.className = "card";
-    card.innerHTML = `
-      <div class="card__top">
-        <div>
-          <h3 class="card__title">${safe(m.team1_name)} vs ${safe(m.team2_name)}</h3>
-          <div class="card__sub">${safe(m.tournament_name)} · ${fmtDT(m.match_date)}</div>
-        </div>
-        ${statusBadge(m.status)}
+function matchCard(m) {
+  const res = m.result || null;
+  const score = res ? `${res.score_team1}:${res.score_team2}` : "—";
+  const winner = res?.winner_name || "—";
+
+  const card = document.createElement("div");
+  card.className = "card";
+  card.dataset.matchId = m.id;
+  card.innerHTML = `
+    <div class="card__top">
+      <div>
+        <h3 class="card__title">${safe(m.team1_name)} vs ${safe(m.team2_name)}</h3>
+        <div class="card__sub">${safe(m.tournament_name)} · ${fmtDT(m.match_date)}</div>
       </div>
+      ${statusBadge(m.status)}
+    </div>
+
+    <div class="meta">
+      <div>Раунд: <strong>${safe(m.round)}</strong></div>
+      <div>Победитель: <strong>${winner}</strong></div>
+    </div>
+
+    <div class="card__bottom">
+      <div class="score">${score}</div>
+      <a class="btn btn--ghost" href="./match.html?id=${m.id}">Открыть</a>
+    </div>
+  `;
+  return card;
+}
 
-      <div class="meta">
-        <div>Раунд: <strong>${safe(m.round)}</strong></div>
-        <div>Победитель: <strong>${winner}</strong></div>
-      </div>
+function renderMatches(matches, append = false) {
+  if (!append) grid.innerHTML = "";
 
-      <div class="card__bottom">
-        <div class="score">${score}</div>
-        <a class="btn btn--ghost" href="./match.html?id=${m.id}">Открыть</a>
-      </div>
-    `;
-    grid.appendChild(card);
+  for (const m of matches) {
+    grid.appendChild(matchCard(m));
   }
+
+  const shown = grid.children.length;
+  count.textContent = String(shown);
+  empty.classList.toggle("hidden", shown !== 0);
 }
 
 function buildQuery() {
@@ -82,15 +89,12 @@ function buildQuery() {
 
 async function loadFilters() {
   // турниры
-  const tRes = await fetch(`${API_BASE}/tournaments/`);
-  if (tRes.ok) {
-    const tournaments = await tRes.json();
-    for (const t of tournaments) {
-      const opt = document.createElement("option");
-      opt.value = t.id;
-      opt.textContent = `${t.name} (${t.game_title || ""})`;
-      elTournament.appendChild(opt);
-    }
+  const tournaments = await fetchAllPages(`${API_BASE}/tournaments/`).catch(() => []);
+  for (const t of tournaments) {
+    const opt = document.createElement("option");
+    opt.value = t.id;
+    opt.textContent = `${t.name} (${t.game_title || ""})`;
+    elTournament.appendChild(opt);
   }
 
   // команды
@@ -106,14 +110,73 @@ async function loadFilters() {
   }
 }
 
+/**
+ * Выдача идёт keyset-страницами { next, results }: сначала первая,
+ * следующие — по кнопке «Показать ещё» (ссылка data.next).
+ */
+let nextUrl = null;
+let listVersion = 0;
+
+async function fetchMatchesPage(url) {
+  const res = await fetch(url);
+  const data = res.ok ? await res.json() : [];
+  nextUrl = Array.isArray(data) ? null : (data.next ?? null);
+  btnMore.classList.toggle("hidden", !nextUrl);
+  return Array.isArray(data) ? data : (data.results ?? []);
+}
+
 async function loadMatches() {
   const qs = buildQuery();
   const url = qs ? `${API_BASE}/matches/?${qs}` : `${API_BASE}/matches/`;
-  const res = await fetch(url);
-  const data = res.ok ? await res.json() : [];
-  renderMatches(Array.isArray(data) ? data : []);
+  listVersion += 1;
+  renderMatches(await fetchMatchesPage(url));
+  subscribeLive();
+}
+
+async function loadMoreMatches() {
+  if (!nextUrl) return;
+  const version = listVersion;
+  btnMore.disabled = true;
+  try {
+    const matches = await fetchMatchesPage(nextUrl);
+    // фильтры сменили, пока грузилась страница, — это уже чужой список
+    if (version === listVersion) renderMatches(matches, true);
+  } finally {
+    btnMore.disabled = false;
+  }
+}
+
+/**
+ * Живые обновления вместо перезапроса списка: сервер присылает матч
+ * (в форме /api/matches/{id}/), когда у него меняется статус или счёт.
+ * Карточку на странице меняем на месте, удалённый матч убираем; матчи не
+ * с этой страницы пропускаем. resync (клиент отстал) — перечитываем список.
+ */
+let live = null;
+
+function subscribeLive() {
+  if (!window.EventSource) return;
+  const p = new URLSearchParams();
+  if (elTournament.value) p.set("tournament", elTournament.value);
+  if (elTeam.value) p.set("team", elTeam.value);
+
+  if (live) live.close();
+  live = new EventSource(`${API_BASE}/live/matches/?${p}`);
+
+  live.addEventListener("match", (e) => {
+    const m = JSON.parse(e.data);
+    const card = grid.querySelector(`[data-match-id="${m.id}"]`);
+    if (card) card.replaceWith(matchCard(m));
+  });
+  live.addEventListener("match_deleted", (e) => {
+    const { id } = JSON.parse(e.data);
+    grid.querySelector(`[data-match-id="${id}"]`)?.remove();
+  });
+  live.addEventListener("resync", () => loadMatches());
 }
 
+btnMore.addEventListener("click", loadMoreMatches);
+
 form.addEventListener("submit", async (e) => {
   e.preventDefault();
   await loadMatches();
@@ -1,4 +1,4 @@
-import { API_BASE } from "./api.js";
+import { API_BASE, fetchAllPages } from "./api.js";
 
 const tName = document.getElementById("tName");
 const tMeta = document.getElementById("tMeta");
@@ -197,9 +197,8 @@ async function load() {
 
   // 4) матчи
   // Если у тебя DRF фильтр не включен — вернёт все матчи. Тогда лучше сделать отдельный action на бэке.
-  const mRes = await fetch(`${API_BASE}/matches/?tournament=${id}`);
-  const mPayload = mRes.ok ? await mRes.json() : [];
-  renderMatches(getList(mPayload));
+  const matches = await fetchAllPages(`${API_BASE}/matches/?tournament=${id}&page_size=500`).catch(() => []);
+  renderMatches(matches);
 }
 
 load().catch((e) => {
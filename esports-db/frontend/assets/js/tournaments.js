@@ -1,4 +1,4 @@
-import { API_BASE } from "./api.js";
+import { API_BASE, fetchAllPages } from "./api.js";
 
 
 const elGrid = document.getElementById("tournamentsGrid");
@@ -152,8 +152,10 @@ async function loadGames() {
 
 async function loadTournaments() {
   // Ожидаем /api/tournaments/
-  const data = await safeFetchJson(`${API_BASE}/tournaments/`);
-  ALL_TOURNAMENTS = Array.isArray(data) ? data : data.results || [];
+  // фильтры применяются на клиенте, поэтому собираем все страницы
+  ALL_TOURNAMENTS = await fetchAllPages(`${API_BASE}/tournaments/?page_size=500`, {
+    headers: { "Accept": "application/json" },
+  });
   renderTournaments(ALL_TOURNAMENTS);
 }
 